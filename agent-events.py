@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Command-line access to the agent's structured event stream (GET /events?since=N).
+
+The agent records every patch / rollback / stage / activate into a ring buffer
+with per-phase timings (lookup, validate, redefine, bookkeeping), byte size,
+history depth and outcome. Bench scripts use this instead of scraping
+"OK 12.345 ms" / METRIC text:
+
+  SINCE=$(python3 agent-events.py cursor)                      # before the op
+  python3 agent-events.py get --since "$SINCE" --op patch      # after: agent ms
+  python3 agent-events.py get --since "$SINCE" --op patch --field wall_ms
+  python3 agent-events.py dump [--since N] [--csv results/agent_events.csv]
+
+The agent port defaults to $AGENT_PORT (or 8088). `cursor` and `get` print
+nothing and exit 1 when the agent or a matching event is unavailable, so
+callers can fall back to their old parsing.
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+import benchutil as bu
+
+FIELDS = ["seq", "op", "outcome", "wall_ms", "lookup_ns", "validate_ns", "redefine_ns",
+          "bookkeeping_ns", "total_ns", "bytes", "history", "source", "detail"]
+
+
+def value(event, field):
+    if field == "total_ms":
+        return f"{bu.event_ms(event):.3f}"
+    return str(event[field])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=["cursor", "get", "dump"])
+    ap.add_argument("--port", type=int, default=int(os.environ.get("AGENT_PORT", bu.DEFAULT_AGENT_PORT)))
+    ap.add_argument("--since", type=int, default=0)
+    ap.add_argument("--op", help="only events of this op (patch, rollback, stage, activate)")
+    ap.add_argument("--field", default="total_ms", help="get: event field to print (default total_ms)")
+    ap.add_argument("--csv", help="dump: write events to this CSV instead of a table")
+    args = ap.parse_args()
+
+    if args.command == "cursor":
+        seq = bu.last_event_seq(args.port)
+        if seq is None:
+            sys.exit(1)
+        print(seq)
+        return
+
+    events = [e for e in bu.agent_events(args.port, args.since) if not args.op or e["op"] == args.op]
+
+    if args.command == "get":
+        # Latest successful matching op: a retried request leaves earlier error events
+        ok = [e for e in events if e["outcome"] == "ok"]
+        if not ok:
+            sys.exit(1)
+        print(value(ok[-1], args.field))
+        return
+
+    if args.csv:
+        os.makedirs(os.path.dirname(args.csv) or ".", exist_ok=True)
+        with open(args.csv, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(FIELDS)
+            w.writerows([e.get(k) for k in FIELDS] for e in events)
+        print(f"Saved {len(events)} events to {args.csv}")
+        return
+    print(f"{'seq':>6} {'op':<9} {'outcome':<9} {'lookup':>9} {'validate':>9} {'redefine':>9} "
+          f"{'bookkeep':>9} {'total ms':>9} {'bytes':>7} {'hist':>5}  source")
+    for e in events:
+        print(f"{e['seq']:>6} {e['op']:<9} {e['outcome']:<9} {e['lookup_ns'] / 1e6:>9.3f} "
+              f"{e['validate_ns'] / 1e6:>9.3f} {e['redefine_ns'] / 1e6:>9.3f} {e['bookkeeping_ns'] / 1e6:>9.3f} "
+              f"{bu.event_ms(e):>9.3f} {e['bytes']:>7} {e['history']:>5}  {e['source']}"
+              + (f"  ({e['detail']})" if e["detail"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ RUNID="${4:?}"
 CLASSES_DIR="target/classes"
 AGENT_JAR="target/hotpatch-agent.jar"
 PATCHED_CLASS="target/classes-patched/${VER}/com/hotpatch/demo/BusinessRules.class"
+SERVICE_PORT="${SERVICE_PORT:-8080}"
+AGENT_PORT="${AGENT_PORT:-8088}"
 
 # Classpath separator
 CP_SEP=":"; case "$OSTYPE" in msys*|cygwin*|win32*) CP_SEP=";";; esac
@@ -26,28 +28,35 @@ fi
 # ---------- IMPORTANT: Pre-warm to ensure the target class is loaded ----------
 # This prevents the agent from failing with "Target class not loaded"
 # and ensures agent_ms is present (not NaN).
-curl -s http://localhost:8080/api/verify >/dev/null 2>&1 || true
+curl -s "http://localhost:${SERVICE_PORT}/api/verify" >/dev/null 2>&1 || true
 # ------------------------------------------------------------------------------
 
+# Event cursor, taken before the timed window (empty if the agent has no /events)
+EV_SINCE=$(AGENT_PORT="$AGENT_PORT" python3 agent-events.py cursor 2>/dev/null || true)
+
 # Orchestration wall clock (includes all overhead)
 START_NS=$(date +%s%N 2>/dev/null || python3 -c "import time; print(int(time.time()*1e9))")
 
 # Execute patch
-OUT=$(java -cp "$CP" com.hotpatch.tool.PatchApplier "$PATCHED_CLASS" 2>&1) || true
+OUT=$(java -cp "$CP" com.hotpatch.tool.PatchApplier "$PATCHED_CLASS" "http://127.0.0.1:${AGENT_PORT}/patch" 2>&1) || true
 JAVA_RC=$?
 
 END_NS=$(date +%s%N 2>/dev/null || python3 -c "import time; print(int(time.time()*1e9))")
 ORCH_MS=$(awk -v n="$((END_NS-START_NS))" 'BEGIN{printf("%.3f", n/1e6)}')
 
-# Parse metrics (prefer METRIC line, fallback to human-readable)
+# Parse metrics (agent_ms from the agent's event stream; METRIC line, then human-readable as fallback)
 CLIENT_MS=""
 AGENT_MS=""
 SUCCESS="true"
 
+if [ -n "$EV_SINCE" ]; then
+    AGENT_MS=$(AGENT_PORT="$AGENT_PORT" python3 agent-events.py get --since "$EV_SINCE" --op patch 2>/dev/null || true)
+fi
+
 METRIC=$(echo "$OUT" | grep '^METRIC ' || true)
 if [ -n "$METRIC" ]; then
     CLIENT_MS=$(echo "$METRIC" | sed -nE 's/.*client_ms=([0-9.]+).*/\1/p')
-    AGENT_MS=$(echo "$METRIC" | sed -nE 's/.*agent_ms=([0-9.]+).*/\1/p')
+    [ -n "$AGENT_MS" ] || AGENT_MS=$(echo "$METRIC" | sed -nE 's/.*agent_ms=([0-9.]+).*/\1/p')
 fi
 
 # Fallback parsing
@@ -9,6 +9,7 @@ VERLAB="${4:?}"
 
 CLASSES_DIR="target/classes"
 AGENT_JAR="target/hotpatch-agent.jar"
+AGENT_PORT="${AGENT_PORT:-8088}"
 
 # Classpath separator for Windows bash (Git Bash/MSYS) vs Unix
 CP_SEP=":"
@@ -19,6 +20,9 @@ CP="${CLASSES_DIR}${CP_SEP}${AGENT_JAR}"
 
 ts() { date -u +"%Y-%m-%dT%H:%M:%SZ"; }
 
+# Event cursor, taken before the timed window (empty if the agent has no /events)
+EV_SINCE="$(AGENT_PORT="$AGENT_PORT" python3 agent-events.py cursor 2>/dev/null || true)"
+
 # Orchestration wall clock
 START_NS=$(date +%s%N 2>/dev/null || python3 - <<'PY'
 import time; print(int(time.time()*1e9))
@@ -26,7 +30,7 @@ PY
 )
 
 # Execute rollback (do not let non-zero exit abort the script)
-OUT="$(java -cp "$CP" com.hotpatch.tool.RollbackApplier 2>&1 || true)"
+OUT="$(java -cp "$CP" com.hotpatch.tool.RollbackApplier "http://127.0.0.1:${AGENT_PORT}/rollback" 2>&1 || true)"
 JAVA_RC=$?
 
 END_NS=$(date +%s%N 2>/dev/null || python3 - <<'PY'
@@ -35,15 +39,19 @@ PY
 )
 ORCH_MS=$(awk -v n="$((END_NS-START_NS))" 'BEGIN{printf("%.3f", n/1e6)}')
 
-# Parse metrics (prefer METRIC line, fallback to human-readable prints)
+# Parse metrics (agent_ms from the agent's event stream; METRIC line, then human-readable prints as fallback)
 CLIENT_MS=""
 AGENT_MS=""
 SUCCESS="true"
 
+if [ -n "$EV_SINCE" ]; then
+  AGENT_MS="$(AGENT_PORT="$AGENT_PORT" python3 agent-events.py get --since "$EV_SINCE" --op rollback 2>/dev/null || true)"
+fi
+
 METRIC="$(echo "$OUT" | grep '^METRIC ' || true)"
 if [ -n "$METRIC" ]; then
   CLIENT_MS="$(echo "$METRIC" | sed -nE 's/.*client_ms=([0-9.]+).*/\1/p')"
-  AGENT_MS="$(echo "$METRIC" | sed -nE 's/.*agent_ms=([0-9.]+).*/\1/p')"
+  [ -n "$AGENT_MS" ] || AGENT_MS="$(echo "$METRIC" | sed -nE 's/.*agent_ms=([0-9.]+).*/\1/p')"
 fi
 
 # Fallback parsing
@@ -0,0 +1,75 @@
+#!/bin/bash
+# bench-staged.sh: two-phase patch (stage, then activate) and record both as separate ops
+set -euo pipefail
+
+VER="${1:?Usage: bench-staged.sh <vN> <load_rps> <scenario> <run_id>}"
+LOAD="${2:?}"
+SCEN="${3:?}"
+RUNID="${4:?}"
+
+CLASSES_DIR="target/classes"
+AGENT_JAR="target/hotpatch-agent.jar"
+PATCHED_CLASS="target/classes-patched/${VER}/com/hotpatch/demo/BusinessRules.class"
+SERVICE_PORT="${SERVICE_PORT:-8080}"
+AGENT_PORT="${AGENT_PORT:-8088}"
+AGENT_BASE="http://127.0.0.1:${AGENT_PORT}"
+
+# Classpath separator
+CP_SEP=":"; case "$OSTYPE" in msys*|cygwin*|win32*) CP_SEP=";";; esac
+CP="${CLASSES_DIR}${CP_SEP}${AGENT_JAR}"
+
+ts() { date -u +"%Y-%m-%dT%H:%M:%SZ"; }
+now_ns() { date +%s%N 2>/dev/null || python3 -c "import time; print(int(time.time()*1e9))"; }
+
+if [ ! -f "$PATCHED_CLASS" ]; then
+    echo "$(ts),$SCEN,$RUNID,$LOAD,stage,$VER,NaN,NaN,NaN,false"
+    echo "$(ts),$SCEN,$RUNID,$LOAD,activate,$VER,NaN,NaN,NaN,false"
+    exit 1
+fi
+
+# Pre-warm so the target class is loaded (same as bench-apply.sh)
+curl -s "http://localhost:${SERVICE_PORT}/api/verify" >/dev/null 2>&1 || true
+
+# metric <output> <key>: value of key=... from the METRIC line
+metric() { echo "$1" | grep '^METRIC ' | sed -nE "s/.*$2=([^ ]+).*/\1/p" | head -1 || true; }
+# event_ms <since> <op>: agent-side ms from the agent's event stream (empty if unavailable)
+event_ms() { [ -n "$1" ] && AGENT_PORT="$AGENT_PORT" python3 agent-events.py get --since "$1" --op "$2" 2>/dev/null || true; }
+cursor() { AGENT_PORT="$AGENT_PORT" python3 agent-events.py cursor 2>/dev/null || true; }
+
+# ---------- Phase 1: stage (upload + validate, off the critical path) ----------
+EV_SINCE=$(cursor)
+START_NS=$(now_ns)
+OUT=$(java -cp "$CP" com.hotpatch.tool.StagedPatchApplier stage "$PATCHED_CLASS" "$AGENT_BASE" 2>&1) && RC=0 || RC=$?
+END_NS=$(now_ns)
+ORCH_MS=$(awk -v n="$((END_NS-START_NS))" 'BEGIN{printf("%.3f", n/1e6)}')
+
+CLIENT_MS=$(metric "$OUT" client_ms)
+AGENT_MS=$(event_ms "$EV_SINCE" stage)
+[ -n "$AGENT_MS" ] || AGENT_MS=$(metric "$OUT" agent_ms)
+STAGE_ID=$(metric "$OUT" id)
+SUCCESS="true"
+if [ "$RC" -ne 0 ] || [ -z "$STAGE_ID" ]; then
+    SUCCESS="false"
+fi
+echo "$(ts),$SCEN,$RUNID,$LOAD,stage,$VER,$ORCH_MS,${CLIENT_MS:-NaN},${AGENT_MS:-NaN},$SUCCESS"
+
+if [ "$SUCCESS" != "true" ]; then
+    echo "$(ts),$SCEN,$RUNID,$LOAD,activate,$VER,NaN,NaN,NaN,false"
+    exit 1
+fi
+
+# ---------- Phase 2: activate (the patch window the business sees) ----------
+EV_SINCE=$(cursor)
+START_NS=$(now_ns)
+OUT=$(java -cp "$CP" com.hotpatch.tool.StagedPatchApplier activate "$STAGE_ID" "$AGENT_BASE" 2>&1) && RC=0 || RC=$?
+END_NS=$(now_ns)
+ORCH_MS=$(awk -v n="$((END_NS-START_NS))" 'BEGIN{printf("%.3f", n/1e6)}')
+
+CLIENT_MS=$(metric "$OUT" client_ms)
+AGENT_MS=$(event_ms "$EV_SINCE" activate)
+[ -n "$AGENT_MS" ] || AGENT_MS=$(metric "$OUT" agent_ms)
+SUCCESS="true"
+if [ "$RC" -ne 0 ] || [ -z "$AGENT_MS" ]; then
+    SUCCESS="false"
+fi
+echo "$(ts),$SCEN,$RUNID,$LOAD,activate,$VER,$ORCH_MS,${CLIENT_MS:-NaN},${AGENT_MS:-NaN},$SUCCESS"
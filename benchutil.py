@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the Python benchmark drivers.
+Launches BusinessRuleService instances (agent pre-loaded) on chosen ports,
+talks to the service / agent over plain HTTP and summarises latencies.
+Only the standard library is used so drivers run without extra installs.
+"""
+
+import bisect
+import csv
+import json
+import math
+import os
+import subprocess
+import time
+from datetime import datetime, timezone
+import urllib.error
+import urllib.request
+
+CLASSES_DIR = "target/classes"
+AGENT_JAR = "target/hotpatch-agent.jar"
+PATCHED_DIR = "target/classes-patched"
+TARGET_CLASS_PATH = "com/hotpatch/demo/BusinessRules.class"
+
+DEFAULT_SERVICE_PORT = 8080
+DEFAULT_AGENT_PORT = 8088
+
+
+def check_build():
+    """Exit with the usual hint if build.sh has not been run."""
+    if not os.path.isfile(AGENT_JAR) or not os.path.isdir(CLASSES_DIR):
+        raise SystemExit("Build artifacts missing. Run: ./build.sh")
+
+
+def patched_class(version):
+    return os.path.join(PATCHED_DIR, version, TARGET_CLASS_PATH)
+
+
+def ts():
+    """UTC timestamp in the latency.csv format."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def csv_list(s, conv=str):
+    """Comma-separated CLI value -> list, skipping empty items."""
+    return [conv(x) for x in s.split(",") if x.strip()]
+
+
+def launch_service(service_port, agent_port, log_path=None, jvm_args=(), cpus=None):
+    """Start one BusinessRuleService JVM with the agent listening on agent_port."""
+    cmd = []
+    if cpus:
+        cmd += ["taskset", "-c", cpus]
+    cmd += ["java", f"-javaagent:{AGENT_JAR}",
+            f"-Dhotpatch.service.port={service_port}",
+            f"-Dhotpatch.agent.port={agent_port}"]
+    cmd += list(jvm_args)
+    cmd += ["-cp", CLASSES_DIR, "com.hotpatch.demo.BusinessRuleService"]
+    out = open(log_path, "w") if log_path else subprocess.DEVNULL
+    return subprocess.Popen(cmd, stdout=out, stderr=subprocess.STDOUT)
+
+
+def stop_process(proc, timeout=5.0):
+    if proc is None or proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def redefine_bench(bench_args, heap, classpath=CLASSES_DIR, jvm_args=(), what="RedefineBench"):
+    """One fresh JVM running com.hotpatch.agent.RedefineBench; returns [(version, nanos)]."""
+    cmd = ["java", f"-Xms{heap}", f"-Xmx{heap}", f"-javaagent:{AGENT_JAR}",
+           "-Dhotpatch.agent.http=false"] + list(jvm_args) + [
+           "-cp", classpath, "com.hotpatch.agent.RedefineBench"] + [str(a) for a in bench_args]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stdout[-2000:], proc.stderr[-2000:])
+        raise SystemExit(f"RedefineBench failed ({what})")
+    samples = []
+    for line in proc.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 4 and parts[0] == "RESULT":
+            samples.append((parts[1], int(parts[3])))
+    return samples
+
+
+def redefine_bench_forks(forks, bench_args, heap, classpath=CLASSES_DIR, jvm_args=(), what="RedefineBench"):
+    """Yield (fork, samples) for `forks` fresh RedefineBench JVMs (fork counts from 1)."""
+    for fork in range(1, forks + 1):
+        print(f"  {what}: fork {fork}/{forks}")
+        yield fork, redefine_bench(bench_args, heap, classpath, jvm_args, what)
+
+
+def find_service_pid(timeout=30.0):
+    """PID of the BusinessRuleService JVM (via jps), waiting for it to appear."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        out = subprocess.run(["jps", "-l"], capture_output=True, text=True).stdout
+        for line in out.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[1].endswith("BusinessRuleService"):
+                return int(parts[0])
+        time.sleep(0.5)
+    raise SystemExit("BusinessRuleService JVM not found (jps)")
+
+
+def http_get(url, timeout=2.0):
+    """GET url, returning (status, body); status is None on connection errors."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return resp.status, resp.read().decode("utf-8", "replace")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8", "replace")
+    except (urllib.error.URLError, OSError):
+        return None, ""
+
+
+def http_post(url, data=b"", timeout=10.0):
+    """POST raw bytes to url, returning (status, body)."""
+    req = urllib.request.Request(url, data=data, method="POST",
+                                 headers={"Content-Type": "application/octet-stream"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read().decode("utf-8", "replace")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8", "replace")
+    except (urllib.error.URLError, OSError) as e:
+        return None, str(e)
+
+
+def wait_ready(service_port, timeout=30.0, proc=None):
+    """Poll /api/health until the service answers; True when it did."""
+    deadline = time.monotonic() + timeout
+    url = f"http://localhost:{service_port}/api/health"
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            return False
+        status, _ = http_get(url, timeout=0.5)
+        if status == 200:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def rule_version(service_port, timeout=2.0):
+    """Rule version reported by /api/verify, or None if unreachable."""
+    status, body = http_get(f"http://localhost:{service_port}/api/verify", timeout=timeout)
+    if status != 200:
+        return None
+    for line in body.splitlines():
+        if line.startswith("Rule Version:"):
+            return line.split(":", 1)[1].strip()
+    return None
+
+
+def parse_agent_ms(body):
+    """Extract the latency from an agent reply such as 'OK 12.345 ms'."""
+    parts = body.replace("(rollback)", "").split()
+    if len(parts) >= 2 and parts[0] == "OK":
+        try:
+            return float(parts[1])
+        except ValueError:
+            pass
+    return float("nan")
+
+
+def agent_events(agent_port, since=0, timeout=2.0):
+    """Structured agent events with seq > since (GET /events), oldest first; [] if unreachable."""
+    status, body = http_get(f"http://127.0.0.1:{agent_port}/events?since={since}", timeout=timeout)
+    if status != 200:
+        return []
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+
+def last_event_seq(agent_port, timeout=2.0):
+    """Newest event seq (a cursor for agent_events), or None if the agent has no /events."""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{agent_port}/events?since={2**62}",
+                                    timeout=timeout) as r:
+            return int(r.headers.get("X-Events-Last-Seq", "0"))
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def event_ms(event):
+    """Agent-side latency of one event in ms (lookup + validate + redefine + bookkeeping)."""
+    return event["total_ns"] / 1e6
+
+
+def latency_rows(results_dir="results"):
+    """(epoch ms, row) for every row of latency.csv (timestamps have 1 s resolution)."""
+    with open(os.path.join(results_dir, "latency.csv"), newline="") as f:
+        for row in csv.DictReader(f):
+            t = datetime.strptime(row["timestamp"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+            yield int(t.timestamp() * 1000), row
+
+
+def scenario_ranges(results_dir="results"):
+    """scenario -> (first ms, last ms + 1 s) from latency.csv, ordered by start."""
+    ranges = {}
+    for t, row in latency_rows(results_dir):
+        lo, hi = ranges.get(row["scenario"], (t, t))
+        ranges[row["scenario"]] = (min(lo, t), max(hi, t + 1000))
+    return dict(sorted(ranges.items(), key=lambda kv: kv[1][0]))
+
+
+def op_times(results_dir="results", ops=("patch", "rollback", "activate")):
+    """Sorted (epoch ms, op) of successful agent operations.
+
+    Uses results/agent_events.csv (agent-side start time, ms resolution) when present,
+    else the 1 s resolution latency.csv rows.
+    """
+    events = os.path.join(results_dir, "agent_events.csv")
+    if os.path.isfile(events):
+        with open(events, newline="") as f:
+            return sorted((int(r["wall_ms"]), r["op"]) for r in csv.DictReader(f)
+                          if r["op"] in ops and r["outcome"] == "ok")
+    return sorted((t, row["op"]) for t, row in latency_rows(results_dir)
+                  if row["op"] in ops and row["success"] == "true")
+
+
+def op_rows(results_dir="results", ops=("patch", "rollback", "activate"), max_gap_ms=2000):
+    """Sorted (epoch ms, op, latency.csv row or None) per successful agent operation.
+
+    Times come from op_times(). With agent events each one is matched to the nearest
+    latency.csv row of the same op (timestamps there are the 1 s op end, so the
+    middle of that second is used); operations further than max_gap_ms from any row
+    (resets, warm-ups not logged) get None.
+    """
+    rows = [(t, row) for t, row in latency_rows(results_dir)
+            if row["op"] in ops and row["success"] == "true"]
+    if not os.path.isfile(os.path.join(results_dir, "agent_events.csv")):
+        return sorted(((t, row["op"], row) for t, row in rows), key=lambda r: r[0])
+    by_op = {}
+    for t, row in rows:
+        by_op.setdefault(row["op"], []).append((t + 500, row))
+    out = []
+    for t, op in op_times(results_dir, ops):
+        cands = by_op.get(op, [])
+        i = bisect.bisect_left([c[0] for c in cands], t)
+        near = [cands[j] for j in (i - 1, i) if 0 <= j < len(cands)]
+        best = min(near, key=lambda c: abs(c[0] - t), default=None)
+        out.append((t, op, best[1] if best and abs(best[0] - t) <= max_gap_ms else None))
+    return out
+
+
+def fmt(x):
+    """CSV cell for a ms value: 3 decimals, "NaN" for None / NaN."""
+    return "NaN" if x is None or (isinstance(x, float) and math.isnan(x)) else f"{x:.3f}"
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q in 0..100) of a non-empty sequence."""
+    s = sorted(values)
+    if not s:
+        return float("nan")
+    k = (len(s) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
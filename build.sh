@@ -18,7 +18,9 @@ echo "Compiling original business service..."
 javac -d target/classes \
     src/main/java/com/hotpatch/demo/BusinessRuleService.java \
     src/main/java/com/hotpatch/demo/BusinessRules.java \
-    src/main/java/com/hotpatch/demo/LoadGenerator.java
+    src/main/java/com/hotpatch/demo/LatencyHistogram.java \
+    src/main/java/com/hotpatch/demo/LoadGenerator.java \
+    src/main/java/com/hotpatch/demo/RequestLog.java
 
 # Compile all versioned patched rules into versioned output dirs
 echo "Compiling versioned patched business rules..."
@@ -39,7 +41,7 @@ done
 # Compile agent
 echo "Compiling hot patch agent..."
 javac -d target/classes \
-    src/main/java/com/hotpatch/agent/HotPatchAgent.java
+    src/main/java/com/hotpatch/agent/*.java
 
 # Compile patch applier tool (optional - only if tools.jar is available)
 echo "Compiling patch applier tool..."
@@ -48,6 +50,7 @@ javac --add-modules jdk.attach \
   src/main/java/com/hotpatch/tool/PatchApplier.java
 
 javac -d target/classes src/main/java/com/hotpatch/tool/RollbackApplier.java
+javac -d target/classes src/main/java/com/hotpatch/tool/StagedPatchApplier.java
 
 
 # Create agent manifest
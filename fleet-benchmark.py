@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Fleet fan-out benchmark: push the same patch to N local BusinessRuleService JVMs.
+
+Launches max(--sizes) instances (each with its own service + agent port), then for
+every fleet size / concurrency limit pushes patches to all agents concurrently and
+measures fleet-wide convergence: the time until every instance's /api/verify
+reports the new rule version, plus p50/p99 across instances. A single poller
+walks the fleet round-robin (sweeps at least --poll-ms apart), so the observer's
+request rate does not grow with fleet size; the per-instance poll interval it
+achieved is recorded as poll_ms.
+
+Partial failures are tolerated: a push is retried --retries times, failed instances
+are excluded from convergence, and once more than --max-failures pushes fail in a
+round the remaining queued pushes are cancelled (rollout aborted).
+
+Usage:
+  python3 fleet-benchmark.py --sizes 1,2,4,8,16 --concurrency 0,4 --rounds 5
+
+Outputs:
+  results/fleet.csv          one row per instance per round
+  results/fleet_summary.csv  one row per round (fleet-wide numbers)
+"""
+
+import argparse
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import benchutil as bu
+
+INSTANCE_HEADER = ["timestamp", "fleet_size", "concurrency", "round", "instance", "version",
+                   "queue_ms", "client_ms", "agent_ms", "converge_ms", "attempts", "success"]
+SUMMARY_HEADER = ["timestamp", "fleet_size", "concurrency", "round", "version", "ok", "failed",
+                  "aborted", "converged", "fleet_converge_ms", "converge_p50_ms",
+                  "converge_p99_ms", "agent_p50_ms", "agent_p99_ms", "poll_ms"]
+
+
+class Instance:
+    def __init__(self, idx, service_port, agent_port, proc):
+        self.idx = idx
+        self.service_port = service_port
+        self.agent_port = agent_port
+        self.proc = proc
+
+    @property
+    def patch_url(self):
+        return f"http://127.0.0.1:{self.agent_port}/patch"
+
+
+def push(inst, payload, t0, args, abort):
+    """Send one patch with retries. Returns (queue_ms, client_ms, agent_ms, attempts, ok)."""
+    start = time.perf_counter()
+    queue_ms = (start - t0) * 1000.0
+    if abort.is_set():
+        return queue_ms, float("nan"), float("nan"), 0, False
+    attempts = 0
+    while attempts <= args.retries:
+        attempts += 1
+        status, body = bu.http_post(inst.patch_url, payload, timeout=args.timeout)
+        if status == 200:
+            client_ms = (time.perf_counter() - start) * 1000.0
+            return queue_ms, client_ms, bu.parse_agent_ms(body), attempts, True
+    return queue_ms, float("nan"), float("nan"), attempts, False
+
+
+def with_event_ms(inst, result, since):
+    """Replace the reply-parsed agent_ms with the agent's own event timing when available."""
+    if since is None or not result[4]:
+        return result
+    ok = [e for e in bu.agent_events(inst.agent_port, since) if e["op"] == "patch" and e["outcome"] == "ok"]
+    if not ok:
+        return result
+    return result[:2] + (bu.event_ms(ok[-1]),) + result[3:]
+
+
+def watch(fleet, expected, t0, deadline, poll_s, result, skip, stats):
+    """Poll every instance's /api/verify round-robin from this one thread until all
+    report the expected version; store ms since t0 per instance.
+
+    Instances whose idx lands in `skip` (failed pushes) are dropped. Sweeps start at
+    least poll_s apart; stats["poll_ms"] is the mean time between sweeps, i.e. the
+    per-instance poll interval.
+    """
+    pending = list(fleet)
+    sweeps = []
+    while pending and time.perf_counter() < deadline:
+        start = time.perf_counter()
+        for inst in list(pending):
+            if inst.idx in skip:
+                pending.remove(inst)
+            elif bu.rule_version(inst.service_port, timeout=1.0) == expected:
+                result[inst.idx] = (time.perf_counter() - t0) * 1000.0
+                pending.remove(inst)
+        time.sleep(max(0.0, poll_s - (time.perf_counter() - start)))
+        sweeps.append((time.perf_counter() - start) * 1000.0)
+    stats["poll_ms"] = sum(sweeps) / len(sweeps) if sweeps else float("nan")
+
+
+def sync_fleet(fleet, payload, expected):
+    """Untimed: bring every instance to the same known version."""
+    with ThreadPoolExecutor(max_workers=len(fleet)) as ex:
+        list(ex.map(lambda i: bu.http_post(i.patch_url, payload), fleet))
+    for inst in fleet:
+        if bu.rule_version(inst.service_port) != expected:
+            print(f"  ! instance {inst.idx} did not reach {expected} during sync")
+
+
+def run_round(fleet, concurrency, version, payload, expected, args):
+    """One fan-out of `payload` to every instance in `fleet`."""
+    n = len(fleet)
+    workers = concurrency if concurrency > 0 else n
+    converged = {}
+    failures = [0]
+    abort = threading.Event()
+    skip = set()
+    poll = {}
+    lock = threading.Lock()
+    # Event cursors (untimed) so agent_ms comes from each agent's /events stream
+    cursors = {inst.idx: bu.last_event_seq(inst.agent_port) for inst in fleet}
+
+    t0 = time.perf_counter()
+    deadline = t0 + args.converge_timeout
+    watcher = threading.Thread(target=watch, daemon=True,
+                               args=(fleet, expected, t0, deadline, args.poll_ms / 1000.0, converged, skip, poll))
+    watcher.start()
+
+    def task(inst):
+        res = push(inst, payload, t0, args, abort)
+        if not res[4]:
+            with lock:
+                failures[0] += 1
+                if args.max_failures >= 0 and failures[0] > args.max_failures:
+                    abort.set()
+        return res
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pushes = list(ex.map(task, fleet))
+
+    ok_instances = [inst for inst, p in zip(fleet, pushes) if p[4]]
+    # Failed pushes will never converge; stop waiting on them early.
+    skip.update(inst.idx for inst in fleet if inst not in ok_instances)
+    watcher.join()
+
+    pushes = [with_event_ms(inst, p, cursors[inst.idx]) for inst, p in zip(fleet, pushes)]
+    rows = []
+    for inst, (queue_ms, client_ms, agent_ms, attempts, ok) in zip(fleet, pushes):
+        rows.append([bu.ts(), n, concurrency, None, inst.idx, version,
+                     f"{queue_ms:.3f}", f"{client_ms:.3f}", f"{agent_ms:.3f}",
+                     f"{converged[inst.idx]:.3f}" if inst.idx in converged else "NaN",
+                     attempts, "true" if ok else "false"])
+
+    conv = [converged[i.idx] for i in ok_instances if i.idx in converged]
+    agent = [p[2] for p in pushes if p[4] and p[2] == p[2]]
+    all_converged = len(conv) == len(ok_instances) == n
+    summary = [bu.ts(), n, concurrency, None, version, len(ok_instances), n - len(ok_instances),
+               "true" if abort.is_set() else "false", "true" if all_converged else "false",
+               f"{max(conv):.3f}" if conv else "NaN",
+               f"{bu.percentile(conv, 50):.3f}" if conv else "NaN",
+               f"{bu.percentile(conv, 99):.3f}" if conv else "NaN",
+               f"{bu.percentile(agent, 50):.3f}" if agent else "NaN",
+               f"{bu.percentile(agent, 99):.3f}" if agent else "NaN",
+               f"{poll.get('poll_ms', float('nan')):.3f}"]
+    return rows, summary
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1,2,4,8", help="fleet sizes to sweep (comma separated)")
+    ap.add_argument("--concurrency", default="0",
+                    help="max in-flight pushes, comma separated; 0 = whole fleet at once")
+    ap.add_argument("--versions", default="v1,v2",
+                    help="patch versions alternated across rounds (need at least two)")
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--base-service-port", type=int, default=9080)
+    ap.add_argument("--base-agent-port", type=int, default=9580)
+    ap.add_argument("--timeout", type=float, default=10.0, help="per-push HTTP timeout (s)")
+    ap.add_argument("--retries", type=int, default=1, help="extra attempts per failed push")
+    ap.add_argument("--max-failures", type=int, default=-1,
+                    help="abort the rest of a round after this many failed pushes (-1 = never)")
+    ap.add_argument("--converge-timeout", type=float, default=30.0, help="seconds")
+    ap.add_argument("--poll-ms", type=float, default=2.0, help="minimum time between /api/verify sweeps over the fleet")
+    ap.add_argument("--results-dir", default="results")
+    args = ap.parse_args()
+
+    sizes = bu.csv_list(args.sizes, int)
+    concurrencies = bu.csv_list(args.concurrency, int)
+    versions = bu.csv_list(args.versions)
+    if any(a == b for a, b in zip(versions, versions[1:] + versions[:1])):
+        raise SystemExit("--versions must cycle through distinct neighbours (e.g. v1,v2)")
+    bu.check_build()
+    payloads = {}
+    for v in versions:
+        path = bu.patched_class(v)
+        if not os.path.isfile(path):
+            raise SystemExit(f"Missing patch class: {path} (run ./build.sh)")
+        with open(path, "rb") as f:
+            payloads[v] = f.read()
+
+    log_dir = os.path.join(args.results_dir, "fleet")
+    os.makedirs(log_dir, exist_ok=True)
+
+    n_max = max(sizes)
+    print(f"=== Fleet Fan-out Benchmark: launching {n_max} instances ===")
+    fleet = []
+    try:
+        for i in range(n_max):
+            sp, ap_ = args.base_service_port + i, args.base_agent_port + i
+            proc = bu.launch_service(sp, ap_, log_path=os.path.join(log_dir, f"instance_{i}.log"))
+            fleet.append(Instance(i, sp, ap_, proc))
+        for inst in fleet:
+            if not bu.wait_ready(inst.service_port, proc=inst.proc):
+                raise SystemExit(f"ERROR: instance {inst.idx} failed to start (port {inst.service_port})")
+            bu.rule_version(inst.service_port)  # pre-warm: make sure the target class is loaded
+        print("✓ Fleet running")
+
+        # Warm-up: walk every instance through each version once and learn the
+        # rule-version string each patch reports.
+        # Every instance must accept the patch and agree on the version string: a
+        # None here would make unreachable instances look converged later on.
+        expected = {}
+        for v in versions:
+            with ThreadPoolExecutor(max_workers=n_max) as ex:
+                statuses = list(ex.map(lambda inst: bu.http_post(inst.patch_url, payloads[v])[0], fleet))
+            failed = [inst.idx for inst, status in zip(fleet, statuses) if status != 200]
+            if failed:
+                raise SystemExit(f"ERROR: warm-up patch {v} failed on instances {failed}")
+            seen = {bu.rule_version(inst.service_port) for inst in fleet}
+            if None in seen or len(seen) != 1:
+                raise SystemExit(f"ERROR: instances report {sorted(map(str, seen))} after warm-up patch {v}")
+            expected[v] = seen.pop()
+            print(f"  {v} -> {expected[v]}")
+        if len(set(expected.values())) != len(expected):
+            raise SystemExit(f"ERROR: versions do not report distinct rule versions: {expected}")
+
+        inst_csv = os.path.join(args.results_dir, "fleet.csv")
+        sum_csv = os.path.join(args.results_dir, "fleet_summary.csv")
+        with open(inst_csv, "w", newline="") as fi, open(sum_csv, "w", newline="") as fs:
+            wi, ws = csv.writer(fi), csv.writer(fs)
+            wi.writerow(INSTANCE_HEADER)
+            ws.writerow(SUMMARY_HEADER)
+            for size in sizes:
+                for conc in concurrencies:
+                    print(f"  Fleet size {size}, concurrency {conc or size}")
+                    sync_fleet(fleet, payloads[versions[-1]], expected[versions[-1]])
+                    for r in range(1, args.rounds + 1):
+                        v = versions[(r - 1) % len(versions)]
+                        rows, summary = run_round(fleet[:size], conc, v, payloads[v], expected[v], args)
+                        for row in rows:
+                            row[3] = r
+                            wi.writerow(row)
+                        summary[3] = r
+                        ws.writerow(summary)
+                        fi.flush(); fs.flush()
+                        print(f"    round {r}: {v} ok={summary[5]} failed={summary[6]} "
+                              f"converge max={summary[9]} p50={summary[10]} p99={summary[11]} ms (poll {summary[14]} ms)")
+                        time.sleep(0.2)
+        print(f"Results: {inst_csv}, {sum_csv}")
+    finally:
+        for inst in fleet:
+            bu.stop_process(inst.proc)
+
+
+if __name__ == "__main__":
+    main()
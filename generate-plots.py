@@ -8,7 +8,13 @@ Generate publication-quality plots for JVM hot patching research.
 - Fig4: NEW clearer component comparison (three options: 4A, 4B, 4C)
 - Fig5: unchanged
 - Fig6: REMOVED
-- Fig7: unchanged
+- Fig6b: NEW JIT deopt/re-warm cost per patch version (results/jit_summary.csv)
+- Fig7: NEW fleet-wide convergence vs fleet size (results/fleet_summary.csv)
+- Fig8: NEW two-phase staging: stage vs activate vs one-shot patch (S7)
+- Fig9: NEW redefinition cost vs class shape (results/synthetic_sweep.csv + synthetic_fit.csv)
+- Fig10: NEW version propagation by load and executor (results/propagation_summary.csv)
+- Fig11: NEW Metaspace / heap over the run + per-patch growth (results/resources.csv, resource_growth.csv)
+- Fig12: NEW per-thread CPU over time per scenario + request rate (results/thread_cpu.csv, throughput_loss_summary.csv)
 """
 
 import pandas as pd
@@ -17,6 +23,7 @@ import seaborn as sns
 import numpy as np
 from scipy import stats
 import warnings
+from pathlib import Path
 warnings.filterwarnings('ignore')
 
 # Style
@@ -374,6 +381,394 @@ if not s6.empty:
 else:
     print("  Skipping Figure 6: no S6 data.")
 
+# ============================================================================
+# Figure 6b: JIT deoptimization & re-warm after redefinition (run-jit-benchmark.sh)
+# ============================================================================
+print("Generating Figure 6b: JIT Re-warm Cost per Version...")
+
+jit_csv = Path("results/jit_summary.csv")
+if jit_csv.exists():
+    jit = pd.read_csv(jit_csv)
+    for c in ["deopt_ms", "tier3_ms", "tier4_ms", "penalty_ms", "window_mean_ms", "baseline_mean_ms"]:
+        jit[c] = pd.to_numeric(jit[c], errors="coerce")
+
+    by_ver = jit.groupby("version").agg(
+        deopt=("deopt_ms", "median"),
+        c1=("tier3_ms", "median"),
+        c2=("tier4_ms", "median"),
+        penalty=("penalty_ms", "median"),
+        window_mean=("window_mean_ms", "median"),
+        baseline_mean=("baseline_mean_ms", "median"),
+    )
+    by_ver = by_ver.reindex(sorted(by_ver.index, key=lambda v: int(str(v).lstrip("v") or 0)))
+
+    if not by_ver.empty:
+        x = np.arange(len(by_ver))
+        width = 0.27
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4.5))
+
+        ax1.bar(x - width, by_ver["deopt"], width, label="Deoptimized")
+        ax1.bar(x, by_ver["c1"], width, label="C1 recompiled (tier 3)")
+        ax1.bar(x + width, by_ver["c2"], width, label="C2 recompiled (tier 4)")
+        ax1.set_xticks(x)
+        ax1.set_xticklabels(by_ver.index)
+        ax1.set_xlabel("Patch version")
+        ax1.set_ylabel("Time after patch (ms, median)")
+        ax1.set_title("(a) calculateDiscount deopt → recompile")
+        ax1.grid(True, axis="y", alpha=0.3)
+        ax1.legend()
+
+        ax2.bar(x - width / 2, by_ver["baseline_mean"], width, label="Pre-patch mean latency")
+        ax2.bar(x + width / 2, by_ver["window_mean"], width, label="Mean until affected methods recompiled")
+        ax2.set_xticks(x)
+        ax2.set_xticklabels(by_ver.index)
+        ax2.set_xlabel("Patch version")
+        ax2.set_ylabel("Request latency (ms)")
+        ax2.set_title("(b) Request latency during the re-warm window")
+        ax2.grid(True, axis="y", alpha=0.3)
+        ax2.legend()
+        for xi, pen in zip(x, by_ver["penalty"]):
+            if not np.isnan(pen):
+                ax2.annotate(f"+{pen:.0f} ms", (xi, 0), xytext=(0, 3), textcoords="offset points",
+                             ha="center", fontsize=8)
+
+        plt.tight_layout()
+        plt.savefig("results/fig6b_jit_rewarm.png", bbox_inches="tight"); saved_figs += 1
+        plt.savefig("results/fig6b_jit_rewarm.pdf", bbox_inches="tight"); saved_figs += 1
+        print("  ✓ Saved: fig6b_jit_rewarm.png/.pdf")
+        plt.close()
+else:
+    print("  Skipping Figure 6b: no results/jit_summary.csv (run run-jit-benchmark.sh).")
+
+# ============================================================================
+# Figure 7: Fleet convergence vs fleet size (fleet-benchmark.py)
+# ============================================================================
+print("Generating Figure 7: Fleet Convergence vs Fleet Size...")
+
+fleet_csv = Path("results/fleet_summary.csv")
+if fleet_csv.exists():
+    fleet = pd.read_csv(fleet_csv)
+    for c in ["fleet_size", "concurrency", "fleet_converge_ms", "converge_p50_ms", "converge_p99_ms"]:
+        fleet[c] = pd.to_numeric(fleet[c], errors="coerce")
+    fleet = fleet[fleet["ok"] > 0]
+
+    if not fleet.empty:
+        fig, ax = plt.subplots(figsize=(10, 4.5))
+        for conc, grp in fleet.groupby("concurrency"):
+            by_size = grp.groupby("fleet_size").agg(
+                p50=("converge_p50_ms", "median"),
+                p99=("converge_p99_ms", "median"),
+                fleet_max=("fleet_converge_ms", "median"),
+            ).reset_index()
+            label = "unbounded" if conc == 0 else f"concurrency {int(conc)}"
+            line, = ax.plot(by_size["fleet_size"], by_size["fleet_max"], marker='o',
+                            label=f"Fleet converged ({label})")
+            ax.plot(by_size["fleet_size"], by_size["p99"], marker='s', linestyle='--',
+                    color=line.get_color(), alpha=0.7, label=f"Instance p99 ({label})")
+            ax.plot(by_size["fleet_size"], by_size["p50"], marker='^', linestyle=':',
+                    color=line.get_color(), alpha=0.7, label=f"Instance p50 ({label})")
+
+        ax.set_xlabel("Fleet size (instances)")
+        ax.set_ylabel("Time to converge (ms)")
+        ax.set_title("Fleet-wide Patch Convergence vs Fleet Size (median over rounds)")
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+
+        plt.tight_layout()
+        plt.savefig("results/fig7_fleet_convergence.png", bbox_inches="tight"); saved_figs += 1
+        plt.savefig("results/fig7_fleet_convergence.pdf", bbox_inches="tight"); saved_figs += 1
+        print("  ✓ Saved: fig7_fleet_convergence.png/.pdf")
+        plt.close()
+    else:
+        print("  Skipping Figure 7: no successful fleet rounds.")
+else:
+    print("  Skipping Figure 7: no results/fleet_summary.csv (run fleet-benchmark.py).")
+
+# ============================================================================
+# Figure 8: Two-phase staging – stage vs activate vs one-shot patch (S7)
+# ============================================================================
+print("Generating Figure 8: Staged Patch (stage vs activate)...")
+
+s7 = df_success[df_success["scenario"] == "S7_staged"].copy()
+one_shot = df_success[
+    (df_success["scenario"] == "S1_patch_vs_load") &
+    (df_success["op"] == "patch")
+].copy()
+
+if not s7.empty:
+    series = [("One-shot /patch (S1)", one_shot),
+              ("Stage (upload + validate)", s7[s7["op"] == "stage"]),
+              ("Activate (patch window)", s7[s7["op"] == "activate"])]
+    series = [(label, d) for label, d in series if not d.empty]
+    loads = sorted(set().union(*[set(d["load_rps"].dropna()) for _, d in series]))
+    x = np.arange(len(loads))
+    width = 0.8 / len(series)
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4.5))
+    for i, (label, d) in enumerate(series):
+        g = d.groupby("load_rps").agg(agent=("agent_ms", "median"), client=("client_ms", "median"))
+        g = g.reindex(loads)
+        offset = (i - (len(series) - 1) / 2) * width
+        ax1.bar(x + offset, g["agent"], width, label=label)
+        ax2.bar(x + offset, g["client"], width, label=label)
+
+    for ax, what in ((ax1, "Agent-side"), (ax2, "Client request→response")):
+        ax.set_xticks(x)
+        ax.set_xticklabels([f"{int(l)}" for l in loads])
+        ax.set_xlabel("Load (requests/sec)")
+        ax.set_ylabel(f"{what} latency (ms, median)")
+        ax.grid(True, axis="y", alpha=0.3)
+    ax1.set_title("(a) Agent time per phase")
+    ax2.set_title("(b) Client time per phase")
+    ax1.legend()
+
+    plt.tight_layout()
+    plt.savefig("results/fig8_staged_patch.png", bbox_inches="tight"); saved_figs += 1
+    plt.savefig("results/fig8_staged_patch.pdf", bbox_inches="tight"); saved_figs += 1
+    print("  ✓ Saved: fig8_staged_patch.png/.pdf")
+    plt.close()
+else:
+    print("  Skipping Figure 8: no S7 data.")
+
+# ============================================================================
+# Figure 9: Redefinition cost vs class shape (synthetic-patches.py)
+# ============================================================================
+print("Generating Figure 9: Redefinition Cost vs Class Shape...")
+
+sweep_csv = Path("results/synthetic_sweep.csv")
+fit_csv = Path("results/synthetic_fit.csv")
+if sweep_csv.exists():
+    sweep = pd.read_csv(sweep_csv)
+    fits = pd.read_csv(fit_csv) if fit_csv.exists() else pd.DataFrame(columns=["model", "term", "coefficient"])
+    dims = [("bytecode", "code_bytes", "Code bytes"),
+            ("constants", "cp_entries", "Constant-pool entries"),
+            ("methods", "methods", "Methods"),
+            ("instances", "instances", "Live instances"),
+            ("frames", "frames", "Active stack frames")]
+
+    fig, axes = plt.subplots(2, 3, figsize=(14, 8))
+    for ax, (dim, feature, label) in zip(axes.flat, dims):
+        d = sweep[sweep["dimension"] == dim].sort_values(feature)
+        if d.empty:
+            ax.set_visible(False)
+            continue
+        ax.errorbar(d[feature], d["p50_ms"], yerr=[np.zeros(len(d)), d["p99_ms"] - d["p50_ms"]],
+                    fmt='o', capsize=4, label="p50 (bar to p99)")
+        f = fits[fits["model"] == dim].set_index("term")["coefficient"]
+        if feature in f and "intercept" in f:
+            xs = np.linspace(d[feature].min(), d[feature].max(), 50)
+            ax.plot(xs, f["intercept"] + f[feature] * xs, linestyle='--',
+                    label=f"fit: {f[feature]:.2e} ms/unit (R²={f.get('r2', np.nan):.2f})")
+        ax.set_xlabel(label)
+        ax.set_ylabel("Redefinition time (ms)")
+        ax.set_title(f"vs {label.lower()}")
+        ax.grid(True, alpha=0.3)
+        ax.legend(fontsize=8)
+
+    ax = axes.flat[5]
+    multi = fits[fits["model"] == "multivariate"].set_index("term")["coefficient"]
+    terms = ["code_bytes", "cp_entries", "methods", "instances", "frames"]
+    if all(t in multi for t in ["intercept"] + terms):
+        pred = multi["intercept"] + sum(multi[t] * sweep[t] for t in terms)
+        ax.scatter(sweep["p50_ms"], pred, alpha=0.8)
+        lim = [0, max(sweep["p50_ms"].max(), pred.max()) * 1.05]
+        ax.plot(lim, lim, color="gray", linestyle=':')
+        ax.set_xlabel("Measured p50 (ms)")
+        ax.set_ylabel("Predicted (ms)")
+        ax.set_title(f"Multivariate model (R²={multi.get('r2', np.nan):.2f})")
+        ax.grid(True, alpha=0.3)
+    else:
+        ax.set_visible(False)
+
+    plt.suptitle("In-process Redefinition Cost vs Class Shape (synthetic patches)")
+    plt.tight_layout()
+    plt.savefig("results/fig9_synthetic_sweep.png", bbox_inches="tight"); saved_figs += 1
+    plt.savefig("results/fig9_synthetic_sweep.pdf", bbox_inches="tight"); saved_figs += 1
+    print("  ✓ Saved: fig9_synthetic_sweep.png/.pdf")
+    plt.close()
+else:
+    print("  Skipping Figure 9: no results/synthetic_sweep.csv (run synthetic-patches.py).")
+
+# ============================================================================
+# Figure 10: Version propagation by load and executor (version-propagation.py)
+# ============================================================================
+print("Generating Figure 10: Version Propagation...")
+
+prop_csv = Path("results/propagation_summary.csv")
+if prop_csv.exists():
+    prop = pd.read_csv(prop_csv)
+    for c in ["load_rps", "first_new_p50_ms", "first_new_p95_ms", "last_old_p50_ms", "overlap_p50_ms",
+              "overlap_max_ms"]:
+        prop[c] = pd.to_numeric(prop[c], errors="coerce")
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4.5))
+    for executor, grp in prop.groupby("executor"):
+        grp = grp.sort_values("load_rps")
+        line, = ax1.plot(grp["load_rps"], grp["first_new_p50_ms"], marker='o', label=f"First new ({executor})")
+        ax1.plot(grp["load_rps"], grp["last_old_p50_ms"], marker='s', linestyle='--',
+                 color=line.get_color(), alpha=0.7, label=f"Last old ({executor})")
+        ax2.plot(grp["load_rps"], grp["overlap_p50_ms"], marker='o', color=line.get_color(),
+                 label=f"p50 ({executor})")
+        ax2.plot(grp["load_rps"], grp["overlap_max_ms"], marker='^', linestyle=':',
+                 color=line.get_color(), alpha=0.7, label=f"max ({executor})")
+
+    ax1.set_title("(a) Time from patch request to new / last old response")
+    ax1.set_ylabel("Time after patch (ms, median)")
+    ax2.set_title("(b) Mixed-version overlap across client threads")
+    ax2.set_ylabel("Overlap (ms)")
+    for ax in (ax1, ax2):
+        ax.set_xlabel("Load (requests/sec)")
+        ax.grid(True, alpha=0.3)
+        ax.legend(fontsize=8)
+
+    plt.tight_layout()
+    plt.savefig("results/fig10_version_propagation.png", bbox_inches="tight"); saved_figs += 1
+    plt.savefig("results/fig10_version_propagation.pdf", bbox_inches="tight"); saved_figs += 1
+    print("  ✓ Saved: fig10_version_propagation.png/.pdf")
+    plt.close()
+else:
+    print("  Skipping Figure 10: no results/propagation_summary.csv (run run-propagation-benchmark.sh).")
+
+# ============================================================================
+# Figure 11: Metaspace / heap growth across the run (resource-sampler.py)
+# ============================================================================
+print("Generating Figure 11: Memory Growth Across Patches...")
+
+res_csv = Path("results/resources.csv")
+growth_csv = Path("results/resource_growth.csv")
+if res_csv.exists():
+    res = pd.read_csv(res_csv)
+    res["t_s"] = (res["timestamp_ms"] - res["timestamp_ms"].min()) / 1000.0
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 4.5), gridspec_kw={"width_ratios": [3, 2]})
+    ax1.plot(res["t_s"], res["metaspace_used_kb"] / 1024, label="Metaspace used")
+    ax1.plot(res["t_s"], res["class_space_used_kb"] / 1024, label="Class space used")
+    ax1b = ax1.twinx()
+    ax1b.plot(res["t_s"], res["heap_used_kb"] / 1024, color="gray", alpha=0.4, linewidth=0.8, label="Heap used")
+    ax1b.set_ylabel("Heap used (MB)")
+
+    # Scenario boundaries from latency.csv
+    ts = pd.to_datetime(df["timestamp"], format="%Y-%m-%dT%H:%M:%SZ", utc=True, errors="coerce")
+    starts = ((ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)).groupby(df["scenario"]).min()
+    for scen, start_ms in starts.sort_values().items():
+        x = (start_ms - res["timestamp_ms"].min()) / 1000.0
+        if 0 <= x <= res["t_s"].max() and not scen.endswith(("_warmup", "_setup")):
+            ax1.axvline(x, color="black", alpha=0.15, linestyle=":")
+            ax1.text(x, ax1.get_ylim()[1], scen.split("_")[0], fontsize=7, va="top", rotation=90)
+    ax1.set_xlabel("Time since sampling start (s)")
+    ax1.set_ylabel("Metadata (MB)")
+    ax1.set_title("(a) Service JVM memory during the benchmark")
+    ax1.grid(True, alpha=0.3)
+    lines = ax1.get_legend_handles_labels()[0] + ax1b.get_legend_handles_labels()[0]
+    ax1.legend(lines, [l.get_label() for l in lines], loc="upper left")
+
+    if growth_csv.exists():
+        growth = pd.read_csv(growth_csv)
+        piv = growth.pivot(index="scenario", columns="metric", values="slope_kb_per_op")
+        flag = growth.pivot(index="scenario", columns="metric", values="flagged").astype(str) == "True"
+        metrics = [m for m in ["metaspace_used_kb", "class_space_used_kb", "heap_used_kb"] if m in piv.columns]
+        x = np.arange(len(piv))
+        width = 0.8 / max(1, len(metrics))
+        for i, m in enumerate(metrics):
+            bars = ax2.bar(x + (i - (len(metrics) - 1) / 2) * width, piv[m], width,
+                           label=m.replace("_used_kb", "").replace("_", " "))
+            for bar, bad in zip(bars, flag[m]):
+                if bad:
+                    bar.set_edgecolor("red")
+                    bar.set_linewidth(2)
+        ax2.set_xticks(x)
+        ax2.set_xticklabels(piv.index, rotation=30, ha="right", fontsize=8)
+        ax2.axhline(0, color="black", linewidth=0.8)
+        ax2.set_ylabel("Growth (KB per patch op)")
+        ax2.set_title("(b) Per-operation growth (red edge = above threshold)")
+        ax2.grid(True, axis="y", alpha=0.3)
+        ax2.legend()
+    else:
+        ax2.set_visible(False)
+
+    plt.tight_layout()
+    plt.savefig("results/fig11_memory_growth.png", bbox_inches="tight"); saved_figs += 1
+    plt.savefig("results/fig11_memory_growth.pdf", bbox_inches="tight"); saved_figs += 1
+    print("  ✓ Saved: fig11_memory_growth.png/.pdf")
+    plt.close()
+else:
+    print("  Skipping Figure 11: no results/resources.csv (run resource-sampler.py).")
+
+# ============================================================================
+# Figure 12: Per-thread CPU over time per scenario (thread-cpu-sampler.py)
+# ============================================================================
+print("Generating Figure 12: Thread CPU and Throughput Around Patches...")
+
+cpu_csv = Path("results/thread_cpu.csv")
+if cpu_csv.exists():
+    cpu = pd.read_csv(cpu_csv)
+    cats = ["service", "agent", "vm", "gc", "jit", "other"]
+    # % of one core per sample interval
+    share = cpu[[f"cpu_{c}_ms" for c in cats]].div(cpu["interval_ms"], axis=0) * 100
+
+    hist_csv = Path("results/server_hist.csv")
+    rps = None
+    if hist_csv.exists():
+        hist = pd.read_csv(hist_csv)
+        rps = hist[hist["endpoint"] == "discount"].groupby("timestamp_ms")["count"].sum().sort_index()
+        rps = rps / (rps.index.to_series().diff().fillna(250) / 1000.0)
+
+    ev_csv = Path("results/agent_events.csv")
+    ev = pd.read_csv(ev_csv) if ev_csv.exists() else None
+
+    ts = pd.to_datetime(df["timestamp"], format="%Y-%m-%dT%H:%M:%SZ", utc=True, errors="coerce")
+    ms = (ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)
+    spans = ms.groupby(df["scenario"]).agg(["min", "max"]).sort_values("min")
+    spans = spans[[not s.endswith(("_warmup", "_setup")) for s in spans.index]]
+    spans = spans[[((cpu["timestamp_ms"] >= lo) & (cpu["timestamp_ms"] <= hi + 1000)).any()
+                   for lo, hi in zip(spans["min"], spans["max"])]]
+
+    if len(spans):
+        ncols = 2
+        nrows = (len(spans) + ncols - 1) // ncols
+        fig, axes = plt.subplots(nrows, ncols, figsize=(14, 3.2 * nrows), squeeze=False)
+        for ax, (scen, (lo, hi)) in zip(axes.flat, spans.iterrows()):
+            hi += 1000
+            m = (cpu["timestamp_ms"] >= lo) & (cpu["timestamp_ms"] <= hi)
+            t = (cpu.loc[m, "timestamp_ms"] - lo) / 1000.0
+            ax.stackplot(t, [share.loc[m, f"cpu_{c}_ms"] for c in cats], labels=cats, alpha=0.8)
+            if ev is not None:
+                for _, e in ev[(ev["wall_ms"] >= lo) & (ev["wall_ms"] <= hi) & (ev["outcome"] == "ok")].iterrows():
+                    if e["op"] in ("patch", "rollback", "activate"):
+                        ax.axvline((e["wall_ms"] - lo) / 1000.0, color="black", alpha=0.4, linewidth=0.7,
+                                   linestyle="--" if e["op"] == "rollback" else "-")
+            if rps is not None:
+                r = rps[(rps.index >= lo) & (rps.index <= hi)]
+                axr = ax.twinx()
+                axr.plot((r.index - lo) / 1000.0, r.values, color="black", linewidth=0.9, label="req/s")
+                axr.set_ylabel("Requests/s", fontsize=8)
+                axr.set_ylim(bottom=0)
+            ax.set_title(scen, fontsize=10)
+            ax.set_xlabel("Time in scenario (s)")
+            ax.set_ylabel("CPU (% of a core)")
+            ax.grid(True, alpha=0.3)
+        for ax in list(axes.flat)[len(spans):]:
+            ax.set_visible(False)
+        axes.flat[0].legend(loc="upper left", ncol=3, fontsize=7)
+        fig.suptitle("Service JVM CPU by thread group (stacked), request rate (line) and patch ops (vertical lines)")
+        plt.tight_layout()
+        plt.savefig("results/fig12_thread_cpu.png", bbox_inches="tight"); saved_figs += 1
+        plt.savefig("results/fig12_thread_cpu.pdf", bbox_inches="tight"); saved_figs += 1
+        print("  ✓ Saved: fig12_thread_cpu.png/.pdf")
+        plt.close()
+
+        loss_csv = Path("results/throughput_loss_summary.csv")
+        if loss_csv.exists():
+            loss = pd.read_csv(loss_csv)
+            print("  Throughput lost per patch op:")
+            for _, r in loss.iterrows():
+                print(f"    {r['scenario']:<36} {r['lost_requests_mean']:>8.1f} req  "
+                      f"(baseline {r['baseline_rps']:.0f} req/s, {int(r['ops'])} ops)")
+    else:
+        print("  Skipping Figure 12: thread_cpu.csv does not overlap any scenario.")
+else:
+    print("  Skipping Figure 12: no results/thread_cpu.csv (run thread-cpu-sampler.py).")
+
 print()
 print("=" * 60)
 print("All requested plots generated.")
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+JIT deoptimization and re-warm analysis for run-jit-benchmark.sh.
+
+Redefining BusinessRules throws away the compiled code for calculateDiscount
+and for every compiled caller that inlined it (DiscountHandler.handle); those
+run interpreted until the JIT recompiles them, which agent_ms never shows.
+For every patch this script finds, in the -XX:+PrintCompilation log:
+  - the affected methods: calculateDiscount, the --callers, and any other method
+    whose pre-patch code was made not entrant during the redefinition (inlining
+    callers are deoptimized through their dependency on the redefined class)
+  - per affected method, its deoptimization ("made not entrant") and the first
+    C1 (tier 1-3) and C2 (tier 4) recompilation
+and, from the binary request log, the request-latency penalty (excess over the
+pre-patch mean) in the interpreted window: from the redefinition until every
+affected method has compiled code again (first C1 or C2 compile).
+
+Inputs (in --jit-dir):  compilation.log, meta.txt (vm_start_ms=...),
+                        patches.csv, requests.bin (optional)
+Outputs:                results/jit_summary.csv  (one row per patch; tier columns
+                                                  are calculateDiscount's)
+                        results/jit_methods.csv  (one row per patch per affected method)
+"""
+
+import argparse
+import csv
+import os
+import re
+
+import benchutil as bu
+
+METHOD = "com.hotpatch.demo.BusinessRules::calculateDiscount"
+CALLERS = "com.hotpatch.demo.BusinessRuleService$DiscountHandler::handle"
+
+# PrintCompilation line, optionally behind unified-logging decorations ("[...][...]")
+LINE_RE = re.compile(
+    r"^(?:\[[^\]]*\])*\s*(?P<t>\d+)\s+(?P<id>\d+)\s+(?P<attrs>[%sbn! ]*?)\s*(?P<tier>[0-4])\s+"
+    r"(?P<method>\S+::\S+)(?:\s+@\s+\d+)?\s+\((?P<size>\d+) bytes\)(?P<rest>.*)$"
+)
+
+SUMMARY_HEADER = ["version", "patch_ms", "agent_ms", "deopt_ms",
+                  "tier1_ms", "tier2_ms", "tier3_ms", "tier4_ms", "rewarm_ms",
+                  "baseline_mean_ms", "window_requests", "window_mean_ms",
+                  "window_max_ms", "penalty_ms", "affected_methods", "interp_window_ms"]
+METHODS_HEADER = ["version", "patch_ms", "method", "deopt_ms", "first_c1_ms", "first_c2_ms", "interp_window_ms"]
+
+
+def parse_compilation_log(path, vm_start_ms):
+    """Events per method: {method: [dicts with t_ms (epoch), id, tier, osr, not_entrant]}."""
+    events = {}
+    with open(path, errors="replace") as f:
+        for line in f:
+            if "::" not in line:
+                continue
+            m = LINE_RE.match(line.rstrip("\n"))
+            if not m:
+                continue
+            events.setdefault(m.group("method"), []).append({
+                "t_ms": vm_start_ms + int(m.group("t")),
+                "id": int(m.group("id")),
+                "tier": int(m.group("tier")),
+                "osr": "%" in m.group("attrs"),
+                "not_entrant": "made not entrant" in m.group("rest"),
+            })
+    for evs in events.values():
+        evs.sort(key=lambda e: e["t_ms"])
+    return events
+
+
+def method_window(evs, lo, end_ms):
+    """Deopt and first C1/C2 recompile of one method after a patch (epoch ms, or None)."""
+    before_ids = {e["id"] for e in evs if e["t_ms"] < lo and not e["not_entrant"]}
+    after = [e for e in evs if lo <= e["t_ms"] < end_ms]
+    deopt = next((e["t_ms"] for e in after if e["not_entrant"] and e["id"] in before_ids), None)
+    tiers = {}
+    for e in after:
+        if not e["not_entrant"] and not e["osr"] and e["id"] not in before_ids:
+            tiers.setdefault(e["tier"], e["t_ms"])
+    c1 = min((tiers[t] for t in (1, 2, 3) if t in tiers), default=None)
+    return deopt, tiers, c1, tiers.get(4)
+
+
+def read_meta(path):
+    meta = {}
+    with open(path) as f:
+        for line in f:
+            if "=" in line:
+                k, v = line.strip().split("=", 1)
+                meta[k] = v
+    return meta
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--jit-dir", default="results/jit")
+    ap.add_argument("--out", default="results/jit_summary.csv")
+    ap.add_argument("--baseline-s", type=float, default=3.0, help="pre-patch window for the baseline mean")
+    ap.add_argument("--slack-ms", type=float, default=5.0,
+                    help="tolerance for VM-uptime vs wall-clock skew when matching events")
+    ap.add_argument("--callers", default=CALLERS,
+                    help="callers of calculateDiscount to always track (comma separated, Class::method)")
+    ap.add_argument("--methods-out", default="results/jit_methods.csv")
+    args = ap.parse_args()
+
+    meta = read_meta(os.path.join(args.jit_dir, "meta.txt"))
+    if "vm_start_ms" not in meta:
+        raise SystemExit("meta.txt has no vm_start_ms (was /api/metrics reachable?)")
+    events = parse_compilation_log(os.path.join(args.jit_dir, "compilation.log"), int(meta["vm_start_ms"]))
+
+    with open(os.path.join(args.jit_dir, "patches.csv"), newline="") as f:
+        patches = [(int(r["patch_ms"]), r["version"], r["agent_ms"]) for r in csv.DictReader(f)]
+    patches.sort()
+
+    log = None
+    reqlog_path = os.path.join(args.jit_dir, "requests.bin")
+    if os.path.isfile(reqlog_path):
+        from reqlog import RequestLog  # numpy is only needed for the latency part
+        log = RequestLog(reqlog_path)
+    else:
+        print(f"  No {reqlog_path}: latency penalty columns will be NaN")
+
+    tracked = [METHOD] + [m for m in bu.csv_list(args.callers) if m != METHOD]
+    rows, method_rows = [], []
+    for i, (p_ms, version, agent_ms) in enumerate(patches):
+        end_ms = patches[i + 1][0] if i + 1 < len(patches) else float("inf")
+        lo = p_ms - args.slack_ms
+        # Code made not entrant while the redefinition ran was invalidated by it
+        redefine_ms = float(agent_ms) if agent_ms not in ("", "NaN") else 0.0
+        hi = p_ms + redefine_ms + args.slack_ms
+        windows = {}
+        for method, evs in events.items():
+            w = method_window(evs, lo, end_ms)
+            if method in tracked or (w[0] is not None and w[0] <= hi):
+                windows[method] = w
+        windows.setdefault(METHOD, (None, {}, None, None))
+
+        deopt, tiers, _, _ = windows[METHOD]
+        rel = {t: max(0.0, tiers[t] - p_ms) for t in tiers}
+        rewarm = rel.get(4)
+        affected = [m for m, w in windows.items() if m == METHOD or w[0] is not None]
+        # Interpreted window: until every affected method has compiled code again
+        recompiled = [min(x for x in (w[2], w[3]) if x is not None) for m, w in windows.items()
+                      if m in affected and (w[2] is not None or w[3] is not None)]
+        all_back = len(recompiled) == len(affected)
+        interp_end = max(recompiled) if recompiled and all_back else None
+        for m in sorted(affected):
+            m_deopt, _, c1, c2 = windows[m]
+            first = min((x for x in (c1, c2) if x is not None), default=None)
+            method_rows.append([version, p_ms, m] + [bu.fmt(None if x is None else max(0.0, x - p_ms))
+                                                     for x in (m_deopt, c1, c2, first)])
+
+        base_mean = win_n = win_mean = win_max = penalty = None
+        if log is not None:
+            base = log.slice(int((p_ms - args.baseline_s * 1000) * 1e6), int(p_ms * 1e6))
+            win_end = interp_end if interp_end is not None else min(end_ms, p_ms + 60_000)
+            # requests that *started* after the patch and before all affected code was recompiled
+            win = log.slice(int(p_ms * 1e6), int((win_end + 60_000) * 1e6))
+            starts_ms = win["t_ns"] / 1e6 - win["latency_us"] / 1e3
+            lat_ms = (win["latency_us"] / 1e3)[(starts_ms >= p_ms) & (starts_ms < win_end)]
+            if len(base):
+                base_mean = float((base["latency_us"] / 1e3).mean())
+            win_n = int(len(lat_ms))
+            if win_n:
+                win_mean = float(lat_ms.mean())
+                win_max = float(lat_ms.max())
+                if base_mean is not None:
+                    penalty = float((lat_ms - base_mean).clip(min=0).sum())
+
+        rows.append([version, p_ms, agent_ms, bu.fmt(None if deopt is None else max(0.0, deopt - p_ms)),
+                     bu.fmt(rel.get(1)), bu.fmt(rel.get(2)), bu.fmt(rel.get(3)), bu.fmt(rel.get(4)), bu.fmt(rewarm),
+                     bu.fmt(base_mean), "NaN" if win_n is None else win_n, bu.fmt(win_mean), bu.fmt(win_max),
+                     bu.fmt(penalty), len(affected),
+                     bu.fmt(None if interp_end is None else max(0.0, interp_end - p_ms))])
+        print(f"  {version}: deopt {rows[-1][3]} ms, C1 {rows[-1][6]} ms, C2 {rows[-1][7]} ms, "
+              f"{len(affected)} methods interpreted for {rows[-1][15]} ms, "
+              f"penalty {rows[-1][13]} ms over {rows[-1][10]} requests")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(SUMMARY_HEADER)
+        w.writerows(rows)
+    os.makedirs(os.path.dirname(args.methods_out) or ".", exist_ok=True)
+    with open(args.methods_out, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(METHODS_HEADER)
+        w.writerows(method_rows)
+    print(f"Saved {args.out} and {args.methods_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Scrape BusinessRuleService's /api/metrics during a benchmark and store interval deltas.
+
+Scrape mode (default) polls the endpoint every --interval-ms and appends the change
+since the previous sample, so long runs stay small and need no per-request logging:
+  results/server_hist.csv      timestamp_ms,endpoint,bucket_lo_us,bucket_hi_us,count
+  results/server_versions.csv  timestamp_ms,rule_version,version,count
+
+Analyze mode turns those deltas into server-side percentiles around each patch /
+rollback / activate. The split is the agent-side operation start from
+results/agent_events.csv (ms resolution) when present, else the 1 s latency.csv
+timestamp; rows are labelled from latency.csv:
+  results/server_latency_around_patch.csv
+
+Usage:
+  python3 metrics-scraper.py [--url http://localhost:8080/api/metrics] [--interval-ms 250] &
+  python3 metrics-scraper.py --analyze [--window-s 2]
+"""
+
+import argparse
+import csv
+import json
+import os
+import signal
+import time
+
+import benchutil as bu
+
+HIST_HEADER = ["timestamp_ms", "endpoint", "bucket_lo_us", "bucket_hi_us", "count"]
+VERSION_HEADER = ["timestamp_ms", "rule_version", "version", "count"]
+AROUND_HEADER = ["timestamp", "scenario", "run_id", "load_rps", "op", "version", "endpoint",
+                 "before_count", "before_p50_us", "before_p99_us",
+                 "after_count", "after_p50_us", "after_p99_us", "split_ms"]
+
+
+def scrape(args):
+    hist_path = os.path.join(args.results_dir, "server_hist.csv")
+    ver_path = os.path.join(args.results_dir, "server_versions.csv")
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(1))
+    signal.signal(signal.SIGINT, lambda *_: stop.append(1))
+
+    prev_buckets, prev_versions = None, None
+    deadline = time.monotonic() + args.duration if args.duration > 0 else None
+    with open(hist_path, "w", newline="") as fh, open(ver_path, "w", newline="") as fv:
+        wh, wv = csv.writer(fh), csv.writer(fv)
+        wh.writerow(HIST_HEADER)
+        wv.writerow(VERSION_HEADER)
+        next_t = time.monotonic()
+        while not stop and (deadline is None or time.monotonic() < deadline):
+            status, body = bu.http_get(args.url, timeout=1.0)
+            now_ms = int(time.time() * 1000)
+            if status == 200:
+                m = json.loads(body)
+                buckets = {(ep, lo, hi): c
+                           for ep, h in m["endpoints"].items()
+                           for lo, hi, c in h["buckets"]}
+                versions = m["requests_by_version"]
+                if prev_buckets is not None:
+                    for key, c in buckets.items():
+                        d = c - prev_buckets.get(key, 0)
+                        if d > 0:
+                            wh.writerow([now_ms, *key, d])
+                    for v, c in versions.items():
+                        d = c - prev_versions.get(v, 0)
+                        if d > 0:
+                            wv.writerow([now_ms, m["rule_version"], v, d])
+                    fh.flush(); fv.flush()
+                prev_buckets, prev_versions = buckets, versions
+            next_t += args.interval_ms / 1000.0
+            time.sleep(max(0.0, next_t - time.monotonic()))
+
+
+def bucket_percentile(buckets, q):
+    """q-th percentile (0..100) from [(lo, hi, count)], reported as the bucket midpoint."""
+    total = sum(c for _, _, c in buckets)
+    if total == 0:
+        return float("nan")
+    rank = total * q / 100.0
+    cum = 0
+    for lo, hi, c in sorted(buckets):
+        cum += c
+        if cum >= rank:
+            return (lo + hi) / 2.0
+    return float("nan")
+
+
+def analyze(args):
+    hist_path = os.path.join(args.results_dir, "server_hist.csv")
+    lat_path = os.path.join(args.results_dir, "latency.csv")
+    out_path = os.path.join(args.results_dir, "server_latency_around_patch.csv")
+    if not (os.path.isfile(hist_path) and os.path.isfile(lat_path)):
+        raise SystemExit(f"Need {hist_path} and {lat_path}")
+
+    samples = {}  # endpoint -> list of (ts_ms, lo, hi, count)
+    with open(hist_path, newline="") as f:
+        for row in csv.DictReader(f):
+            samples.setdefault(row["endpoint"], []).append(
+                (int(row["timestamp_ms"]), int(row["bucket_lo_us"]), int(row["bucket_hi_us"]), int(row["count"])))
+
+    window_ms = int(args.window_s * 1000)
+    # The scraper may only have run around some scenarios (run-benchmark.sh SIDECARS)
+    stamps = [ts for rows in samples.values() for ts, *_ in rows]
+    first, last = (min(stamps), max(stamps)) if stamps else (0, -1)
+    with open(out_path, "w", newline="") as fo:
+        w = csv.writer(fo)
+        w.writerow(AROUND_HEADER)
+        for t_ms, _, row in bu.op_rows(args.results_dir):
+            if row is None:
+                continue                            # agent op without a latency.csv row (reset, warm-up)
+            if not (first <= t_ms - window_ms and t_ms + window_ms <= last):
+                continue                            # not covered by the scrape
+            for ep, rows in samples.items():
+                before = [(lo, hi, c) for ts, lo, hi, c in rows if t_ms - window_ms <= ts < t_ms]
+                after = [(lo, hi, c) for ts, lo, hi, c in rows if t_ms <= ts < t_ms + window_ms]
+                w.writerow([row["timestamp"], row["scenario"], row["run_id"], row["load_rps"], row["op"],
+                            row["version"], ep,
+                            sum(c for *_, c in before),
+                            f"{bucket_percentile(before, 50):.1f}", f"{bucket_percentile(before, 99):.1f}",
+                            sum(c for *_, c in after),
+                            f"{bucket_percentile(after, 50):.1f}", f"{bucket_percentile(after, 99):.1f}",
+                            t_ms])
+    print(f"Saved {out_path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default=f"http://localhost:{bu.DEFAULT_SERVICE_PORT}/api/metrics")
+    ap.add_argument("--interval-ms", type=float, default=250.0)
+    ap.add_argument("--duration", type=float, default=0.0, help="seconds; 0 = until SIGTERM/SIGINT")
+    ap.add_argument("--results-dir", default="results")
+    ap.add_argument("--analyze", action="store_true", help="compute percentiles around each patch")
+    ap.add_argument("--window-s", type=float, default=2.0, help="analysis window before/after a patch")
+    args = ap.parse_args()
+    os.makedirs(args.results_dir, exist_ok=True)
+    if args.analyze:
+        analyze(args)
+    else:
+        scrape(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Patch-storm benchmark: concurrent /patch requests against one agent, with the
+agent's patch queue coalescing off vs on (-Dhotpatch.agent.coalesce=true).
+
+For every mode a fresh BusinessRuleService JVM is started. Each round first brings
+the service back to --base (untimed), then releases N callers at once, each
+POSTing one of --versions (cycled). The agent executes patches on a single writer
+thread; with coalescing on, patches that are still queued when the writer picks
+up work collapse to the newest one, so N requests cost fewer redefinitions
+(= safepoints). The agent's /events stream says how many were applied vs coalesced;
+safepoints_saved counts the coalesced events only, so failed or lost requests
+never count as savings.
+
+Usage:
+  python3 patch-burst.py --bursts 1,2,4,8,16 --rounds 10 [--modes off,on]
+
+Outputs:
+  results/patch_burst.csv          one row per caller (end-to-end latency, reply)
+  results/patch_burst_summary.csv  one row per burst (redefinitions, safepoints saved)
+"""
+
+import argparse
+import csv
+import os
+import threading
+import time
+
+import benchutil as bu
+
+CALLER_HEADER = ["timestamp", "mode", "burst", "round", "caller", "version", "client_ms", "status",
+                 "coalesced", "success"]
+SUMMARY_HEADER = ["timestamp", "mode", "burst", "round", "redefinitions", "coalesced", "safepoints_saved",
+                  "failed", "client_p50_ms", "client_max_ms", "burst_ms", "redefine_ms", "final_version"]
+
+
+def fire(url, payloads, timeout):
+    """POST payloads[i] from one thread each, all released together.
+
+    Returns (burst_ms, [(client_ms, status, body), ...]).
+    """
+    n = len(payloads)
+    gate = threading.Barrier(n + 1)
+    results = [None] * n
+
+    def caller(i):
+        gate.wait()
+        start = time.perf_counter()
+        status, body = bu.http_post(url, payloads[i], timeout=timeout)
+        results[i] = ((time.perf_counter() - start) * 1000.0, status, body)
+
+    threads = [threading.Thread(target=caller, args=(i,), daemon=True) for i in range(n)]
+    for t in threads:
+        t.start()
+    gate.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return (time.perf_counter() - t0) * 1000.0, results
+
+
+def run_mode(mode, args, payloads, wc, ws):
+    coalesce = mode == "on"
+    log = os.path.join(args.results_dir, f"patch_burst_{mode}.log")
+    proc = bu.launch_service(args.service_port, args.agent_port, log_path=log,
+                             jvm_args=[f"-Dhotpatch.agent.coalesce={'true' if coalesce else 'false'}",
+                                       f"-Dhotpatch.agent.threads={max(args.bursts) + 2}"])
+    patch_url = f"http://127.0.0.1:{args.agent_port}/patch"
+    summaries = []
+    try:
+        if not bu.wait_ready(args.service_port, proc=proc):
+            raise SystemExit(f"ERROR: service failed to start (see {log})")
+        bu.rule_version(args.service_port)  # make sure the target class is loaded
+        # Warm-up: every version once (JIT, class-file parsing paths)
+        for v in [args.base] + args.versions:
+            bu.http_post(patch_url, payloads[v])
+
+        for burst in args.bursts:
+            for r in range(1, args.rounds + 1):
+                bu.http_post(patch_url, payloads[args.base])        # untimed reset
+                time.sleep(args.gap_ms / 1000.0)
+                since = bu.last_event_seq(args.agent_port)
+                versions = [args.versions[i % len(args.versions)] for i in range(burst)]
+                burst_ms, replies = fire(patch_url, [payloads[v] for v in versions], args.timeout)
+
+                events = [e for e in bu.agent_events(args.agent_port, since) if e["op"] == "patch"]
+                applied = [e for e in events if e["outcome"] == "ok"]
+                merged = [e for e in events if e["outcome"] == "coalesced"]
+                final = bu.rule_version(args.service_port)
+                client = [ms for ms, status, _ in replies if status == 200]
+                failed = sum(1 for _, status, _ in replies if status != 200)
+                for i, (v, (ms, status, body)) in enumerate(zip(versions, replies)):
+                    wc.writerow([bu.ts(), mode, burst, r, i, v, f"{ms:.3f}", status,
+                                 "true" if "(coalesced)" in body else "false",
+                                 "true" if status == 200 else "false"])
+                # Only successfully coalesced requests saved a safepoint; failed or lost ones did not
+                summary = [bu.ts(), mode, burst, r, len(applied), len(merged), len(merged), failed,
+                           f"{bu.percentile(client, 50):.3f}" if client else "NaN",
+                           f"{max(client):.3f}" if client else "NaN",
+                           f"{burst_ms:.3f}",
+                           f"{sum(e['redefine_ns'] for e in applied) / 1e6:.3f}",
+                           final]
+                ws.writerow(summary)
+                summaries.append(summary)
+            print(f"  coalesce={mode:<3} burst {burst:>3}: "
+                  f"redefinitions/burst {sum(s[4] for s in summaries[-args.rounds:]) / args.rounds:>5.1f}, "
+                  f"saved {sum(s[6] for s in summaries[-args.rounds:]) / args.rounds:>5.1f}, "
+                  f"client p50 {bu.percentile([float(s[8]) for s in summaries[-args.rounds:]], 50):>8.3f} ms, "
+                  f"max {max(float(s[9]) for s in summaries[-args.rounds:]):>8.3f} ms")
+    finally:
+        bu.stop_process(proc)
+    return summaries
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--bursts", default="1,2,4,8,16", help="concurrent callers per burst (comma separated)")
+    ap.add_argument("--modes", default="off,on", help="coalescing modes to compare")
+    ap.add_argument("--base", default="v1", help="version every round starts from")
+    ap.add_argument("--versions", default="v2,v3,v4,v5", help="versions the callers push (cycled)")
+    ap.add_argument("--rounds", type=int, default=10)
+    ap.add_argument("--gap-ms", type=float, default=200.0, help="pause between reset and burst")
+    ap.add_argument("--service-port", type=int, default=9180)
+    ap.add_argument("--agent-port", type=int, default=9680)
+    ap.add_argument("--timeout", type=float, default=30.0, help="per-request HTTP timeout (s)")
+    ap.add_argument("--results-dir", default="results")
+    args = ap.parse_args()
+    args.bursts = bu.csv_list(args.bursts, int)
+    args.versions = bu.csv_list(args.versions)
+    modes = bu.csv_list(args.modes)
+    if any(m not in ("off", "on") for m in modes):
+        raise SystemExit("--modes takes off and/or on")
+
+    bu.check_build()
+    payloads = {}
+    for v in [args.base] + args.versions:
+        path = bu.patched_class(v)
+        if not os.path.isfile(path):
+            raise SystemExit(f"Missing patch class: {path} (run ./build.sh)")
+        with open(path, "rb") as f:
+            payloads[v] = f.read()
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    caller_csv = os.path.join(args.results_dir, "patch_burst.csv")
+    sum_csv = os.path.join(args.results_dir, "patch_burst_summary.csv")
+    print(f"=== Patch Burst Benchmark: bursts {args.bursts}, {args.rounds} rounds, coalescing {modes} ===")
+    with open(caller_csv, "w", newline="") as fc, open(sum_csv, "w", newline="") as fs:
+        wc, ws = csv.writer(fc), csv.writer(fs)
+        wc.writerow(CALLER_HEADER)
+        ws.writerow(SUMMARY_HEADER)
+        for mode in modes:
+            run_mode(mode, args, payloads, wc, ws)
+    print(f"Results: {caller_csv}, {sum_csv}")
+
+
+if __name__ == "__main__":
+    main()
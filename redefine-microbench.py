@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Driver for the in-process redefinition microbenchmark (com.hotpatch.agent.RedefineBench).
+
+RedefineBench times Instrumentation.redefineClasses alone, so the numbers exclude
+HTTP, the client JVM start and the agent's bookkeeping that agent_ms includes.
+This driver runs it in --forks fresh JVMs for every heap size x worker-thread
+configuration and writes the samples in the latency.csv layout (op=redefine,
+time in agent_ms) so the existing summaries and plots can read them:
+
+  scenario = M1_redefine_micro_heap<H>_threads<T>
+  load_rps = worker threads executing the target during redefinition
+
+Usage:
+  python3 redefine-microbench.py --heaps 256m,2g --threads 0,4 --forks 3
+  python3 redefine-microbench.py --append --out results/latency.csv
+"""
+
+import argparse
+import csv
+import os
+
+import benchutil as bu
+
+HEADER = ["timestamp", "scenario", "run_id", "load_rps", "op", "version",
+          "orchestration_ms", "client_ms", "agent_ms", "success"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--versions", default="v1,v2,v3,v4,v5,v6,v7,v8,v9,v10,v11")
+    ap.add_argument("--heaps", default="256m,1g", help="comma-separated -Xms/-Xmx values")
+    ap.add_argument("--threads", default="0,4", help="comma-separated worker thread counts")
+    ap.add_argument("--forks", type=int, default=3)
+    ap.add_argument("--warmup", type=int, default=20)
+    ap.add_argument("--iterations", type=int, default=100)
+    ap.add_argument("--jvm-arg", action="append", default=[], help="extra JVM option (repeatable)")
+    ap.add_argument("--out", default="results/latency_micro.csv")
+    ap.add_argument("--append", action="store_true", help="append rows to an existing --out file")
+    args = ap.parse_args()
+
+    bu.check_build()
+    versions = bu.csv_list(args.versions)
+    for v in versions:
+        if not os.path.isfile(bu.patched_class(v)):
+            raise SystemExit(f"Missing {bu.patched_class(v)}. Run: ./build.sh")
+    heaps = bu.csv_list(args.heaps)
+    thread_counts = bu.csv_list(args.threads, int)
+
+    rows = []
+    summary = []
+    for heap in heaps:
+        for threads in thread_counts:
+            scenario = f"M1_redefine_micro_heap{heap}_threads{threads}"
+            by_version = {v: [] for v in versions}
+            bench_args = ["--patches", bu.PATCHED_DIR, "--versions", ",".join(versions),
+                          "--warmup", args.warmup, "--iterations", args.iterations, "--threads", threads]
+            for fork, samples in bu.redefine_bench_forks(args.forks, bench_args, heap,
+                                                         jvm_args=args.jvm_arg, what=scenario):
+                stamp = bu.ts()
+                for version, nanos in samples:
+                    by_version[version].append(nanos / 1e6)
+                    rows.append([stamp, scenario, fork, threads, "redefine", version,
+                                 "NaN", "NaN", f"{nanos / 1e6:.6f}", "true"])
+            for v in versions:
+                ms = by_version[v]
+                if ms:
+                    summary.append((scenario, v, len(ms), bu.percentile(ms, 50), bu.percentile(ms, 99), max(ms)))
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    write_header = not (args.append and os.path.isfile(args.out))
+    with open(args.out, "a" if args.append else "w", newline="") as f:
+        w = csv.writer(f)
+        if write_header:
+            w.writerow(HEADER)
+        w.writerows(rows)
+
+    print()
+    print(f"{'scenario':<44} {'version':<8} {'n':>5} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for scenario, v, n, p50, p99, mx in summary:
+        print(f"{scenario:<44} {v:<8} {n:>5} {p50:>9.3f} {p99:>9.3f} {mx:>9.3f}")
+    print(f"\nResults: {args.out} ({len(rows)} rows)")
+
+
+if __name__ == "__main__":
+    main()
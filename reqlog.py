@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Reader for the compact binary per-request log written by LoadGenerator
+(-Dhotpatch.reqlog=<file>, see RequestLog.java for the byte layout).
+
+Records are exposed as a numpy structured array backed by np.memmap, so
+multi-GB logs are never copied or parsed; only the pages actually touched
+are read. Time-range slicing goes through a sparse timestamp index (every
+`index_stride`-th record), which is valid because records are appended in
+completion order and t_ns is non-decreasing.
+
+Usage as a module:
+    from reqlog import RequestLog
+    log = RequestLog("results/requests.bin")
+    window = log.slice(t0_ns, t1_ns)          # memmap view, no copy
+    window["latency_us"], log.version_names(window["version"])
+
+Usage from the shell (summary):
+    python3 reqlog.py results/requests.bin [--from-s EPOCH_S] [--to-s EPOCH_S]
+"""
+
+import argparse
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"HPRL"
+HEADER_STRUCT = struct.Struct("<4sHHIHHqI")  # magic, format, record size, header size, slots used, slot size, start ns, cell
+SLOTS_OFFSET = 64
+
+RECORD_DTYPE = np.dtype([
+    ("t_ns", "<i8"),        # completion time, epoch ns
+    ("latency_us", "<u4"),
+    ("status", "<u2"),      # HTTP status, 0 = transport error
+    ("version", "<u2"),     # rule version id, 0 = unknown (see version_names)
+    ("cell", "<u4"),        # load cell id
+    ("thread", "<u2"),      # client thread id
+    ("_pad", "<u2"),
+])
+
+
+class RequestLog:
+    def __init__(self, path, index_stride=4096):
+        self.path = path
+        with open(path, "rb") as f:
+            raw = f.read(SLOTS_OFFSET)
+            (magic, self.format_version, record_size, self.header_size,
+             slots_used, slot_size, self.start_ns, self.cell) = HEADER_STRUCT.unpack_from(raw)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a request log (magic {magic!r})")
+            if record_size != RECORD_DTYPE.itemsize:
+                raise ValueError(f"{path}: record size {record_size}, reader expects {RECORD_DTYPE.itemsize}")
+            f.seek(SLOTS_OFFSET)
+            slots = f.read(slots_used * slot_size)
+        self.versions = ["<unknown>"] + [
+            slots[i * slot_size:(i + 1) * slot_size].split(b"\0", 1)[0].decode("utf-8", "replace")
+            for i in range(slots_used)
+        ]
+
+        # A live file may end in a partially flushed record; ignore the tail.
+        n = max(0, (os.path.getsize(path) - self.header_size) // RECORD_DTYPE.itemsize)
+        if n:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=self.header_size, shape=(n,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+        self.index_stride = index_stride
+        self._index = None
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def sparse_index(self):
+        """t_ns of every index_stride-th record (touches one page per stride)."""
+        if self._index is None:
+            self._index = np.array(self.records["t_ns"][::self.index_stride])
+        return self._index
+
+    def _position(self, t_ns):
+        """First record index with t_ns >= the given time."""
+        idx = self.sparse_index
+        block = int(np.searchsorted(idx, t_ns, side="left"))
+        lo = max(0, (block - 1) * self.index_stride)
+        hi = min(len(self.records), block * self.index_stride + 1)
+        return lo + int(np.searchsorted(self.records["t_ns"][lo:hi], t_ns, side="left"))
+
+    def slice(self, t0_ns=None, t1_ns=None):
+        """Records with t0_ns <= t_ns < t1_ns as a view into the memmap (no copy)."""
+        lo = 0 if t0_ns is None else self._position(t0_ns)
+        hi = len(self.records) if t1_ns is None else self._position(t1_ns)
+        return self.records[lo:max(lo, hi)]
+
+    def version_names(self, ids):
+        """Map version id(s) to rule-version strings."""
+        names = np.array(self.versions, dtype=object)
+        return names[np.asarray(ids)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarise a binary request log")
+    ap.add_argument("path")
+    ap.add_argument("--from-s", type=float, help="epoch seconds, inclusive")
+    ap.add_argument("--to-s", type=float, help="epoch seconds, exclusive")
+    args = ap.parse_args()
+
+    log = RequestLog(args.path)
+    t0 = int(args.from_s * 1e9) if args.from_s is not None else None
+    t1 = int(args.to_s * 1e9) if args.to_s is not None else None
+    recs = log.slice(t0, t1)
+
+    print(f"File: {args.path}  (cell {log.cell}, {len(log)} records)")
+    print(f"Versions seen: {', '.join(log.versions[1:]) or '-'}")
+    if len(recs) == 0:
+        print("No records in range")
+        return
+    span_s = (recs["t_ns"][-1] - recs["t_ns"][0]) / 1e9
+    lat_ms = recs["latency_us"] / 1000.0
+    ok = np.count_nonzero(recs["status"] == 200)
+    print(f"Selected: {len(recs)} records over {span_s:.1f} s ({len(recs) / max(span_s, 1e-9):.1f} rps)")
+    print(f"Success: {ok}/{len(recs)}")
+    print(f"Latency ms  p50={np.percentile(lat_ms, 50):.3f}  p99={np.percentile(lat_ms, 99):.3f}  "
+          f"max={lat_ms.max():.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Sample heap, Metaspace and class-space usage of BusinessRuleService during a
+benchmark, and check for per-patch memory growth.
+
+Every redefinition creates new class metadata and the agent's history keeps every
+previous class file, so long patch sequences (S3 stack, S5 60-patch run) may grow.
+
+Sample mode (default) writes results/resources.csv:
+  timestamp_ms,heap_used_kb,heap_committed_kb,metaspace_used_kb,metaspace_committed_kb,
+  class_space_used_kb,class_space_committed_kb,gc_count
+Sources:
+  jstat (default)  one long-running `jstat -gc <pid> <interval>`; reads the JVM's
+                   perf-data counters, so it neither attaches nor adds safepoints
+                   that would land in the measured patch latencies
+  jcmd             `jcmd <pid> GC.heap_info` + `VM.metaspace basic` per sample
+                   (local attach; heavier, for JVMs started with -XX:-UsePerfData)
+
+Analyze mode splits the run by scenario (latency.csv) and, per scenario, fits
+memory against the cumulative number of patch/rollback/activate operations
+(agent events in results/agent_events.csv if present, else latency.csv). Heap is
+fitted on post-GC samples only (gc_count changed). Slopes above the thresholds
+are flagged:
+  results/resource_growth.csv  scenario,metric,ops,samples,start_kb,end_kb,slope_kb_per_op,flagged
+
+Usage:
+  python3 resource-sampler.py [--pid PID] [--interval-ms 1000] [--source jstat|jcmd] &
+  python3 resource-sampler.py --analyze [--metaspace-threshold-kb 16] [--heap-threshold-kb 256]
+"""
+
+import argparse
+import bisect
+import csv
+import os
+import re
+import signal
+import subprocess
+import time
+
+import benchutil as bu
+
+HEADER = ["timestamp_ms", "heap_used_kb", "heap_committed_kb", "metaspace_used_kb", "metaspace_committed_kb",
+          "class_space_used_kb", "class_space_committed_kb", "gc_count"]
+GROWTH_HEADER = ["scenario", "metric", "ops", "samples", "start_kb", "end_kb", "slope_kb_per_op", "flagged"]
+OPS = ("patch", "rollback", "activate")
+
+UNIT_KB = {"K": 1, "M": 1024, "G": 1024 * 1024}
+METASPACE_RE = re.compile(r"^\s*Metaspace\s+used (\d+)([KMG]), committed (\d+)([KMG])")
+CLASS_SPACE_RE = re.compile(r"^\s*class space\s+used (\d+)([KMG]), committed (\d+)([KMG])")
+# "garbage-first heap   total 262144K, used 2048K", JDK 21+ "total reserved ..., committed 262144K, used 2048K",
+# serial/parallel generations ("DefNew", "PSYoungGen", ...) and ZGC ("ZHeap used 8M, capacity 512M")
+HEAP_RE = re.compile(r"total (?:reserved \d+[KMG], committed )?(\d+)([KMG]), used (\d+)([KMG])")
+ZHEAP_RE = re.compile(r"used (\d+)([KMG]), capacity (\d+)([KMG])")
+
+
+def kb(value, unit):
+    return int(value) * UNIT_KB[unit]
+
+
+def parse_jcmd(text):
+    """Sample dict from GC.heap_info + VM.metaspace output (gc_count unknown)."""
+    s = {"heap_used_kb": 0, "heap_committed_kb": 0}
+    for line in text.splitlines():
+        m = METASPACE_RE.match(line)
+        if m:
+            s.setdefault("metaspace_used_kb", kb(*m.group(1, 2)))
+            s.setdefault("metaspace_committed_kb", kb(*m.group(3, 4)))
+            continue
+        m = CLASS_SPACE_RE.match(line)
+        if m:
+            s.setdefault("class_space_used_kb", kb(*m.group(1, 2)))
+            s.setdefault("class_space_committed_kb", kb(*m.group(3, 4)))
+            continue
+        m = HEAP_RE.search(line)
+        if m:
+            s["heap_committed_kb"] += kb(*m.group(1, 2))
+            s["heap_used_kb"] += kb(*m.group(3, 4))
+            continue
+        m = ZHEAP_RE.search(line)
+        if m and line.lstrip().startswith("ZHeap"):
+            s["heap_used_kb"] += kb(*m.group(1, 2))
+            s["heap_committed_kb"] += kb(*m.group(3, 4))
+    s["gc_count"] = ""
+    return s
+
+
+def parse_jstat(columns, line):
+    """Sample dict from one `jstat -gc` row (values in KB; '-' = not applicable)."""
+    vals = dict(zip(columns, line.split()))
+
+    def num(k):
+        v = vals.get(k, "-")
+        return float(v) if v not in ("-", "") else 0.0
+
+    used = num("S0U") + num("S1U") + num("EU") + num("OU")
+    committed = num("S0C") + num("S1C") + num("EC") + num("OC")
+    return {
+        "heap_used_kb": round(used), "heap_committed_kb": round(committed),
+        "metaspace_used_kb": round(num("MU")), "metaspace_committed_kb": round(num("MC")),
+        "class_space_used_kb": round(num("CCSU")), "class_space_committed_kb": round(num("CCSC")),
+        "gc_count": int(num("YGC") + num("FGC") + num("CGC")),
+    }
+
+
+def sample(args):
+    pid = args.pid or bu.find_service_pid()
+    out_path = os.path.join(args.results_dir, "resources.csv")
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(1))
+    signal.signal(signal.SIGINT, lambda *_: stop.append(1))
+    deadline = time.monotonic() + args.duration if args.duration > 0 else None
+    print(f"Sampling PID {pid} every {args.interval_ms:.0f} ms via {args.source} -> {out_path}")
+
+    with open(out_path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+
+        def emit(s):
+            w.writerow([int(time.time() * 1000)] + [s.get(k, "") for k in HEADER[1:]])
+            f.flush()
+
+        if args.source == "jstat":
+            proc = subprocess.Popen(["jstat", "-gc", str(pid), str(int(args.interval_ms))],
+                                    stdout=subprocess.PIPE, text=True, bufsize=1)
+            try:
+                columns = None
+                for line in proc.stdout:
+                    if stop or (deadline is not None and time.monotonic() >= deadline):
+                        break
+                    if line.split()[:1] == ["S0C"]:
+                        columns = line.split()      # header (repeated by some jstat versions)
+                    elif columns and line.strip():
+                        emit(parse_jstat(columns, line))
+            finally:
+                proc.terminate()
+                proc.wait()
+            return
+
+        next_t = time.monotonic()
+        while not stop and (deadline is None or time.monotonic() < deadline):
+            text = ""
+            for cmd in (["GC.heap_info"], ["VM.metaspace", "basic"]):
+                r = subprocess.run(["jcmd", str(pid)] + cmd, capture_output=True, text=True)
+                if r.returncode != 0:
+                    return                          # JVM gone
+                text += r.stdout
+            emit(parse_jcmd(text))
+            next_t += args.interval_ms / 1000.0
+            time.sleep(max(0.0, next_t - time.monotonic()))
+
+
+# ---------------------------------------------------------------------------
+# Analysis
+# ---------------------------------------------------------------------------
+
+def slope(xs, ys):
+    n = len(xs)
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sxx if sxx > 0 else float("nan")
+
+
+def analyze(args):
+    res_path = os.path.join(args.results_dir, "resources.csv")
+    if not (os.path.isfile(res_path) and os.path.isfile(os.path.join(args.results_dir, "latency.csv"))):
+        raise SystemExit(f"Need {res_path} and {args.results_dir}/latency.csv")
+    with open(res_path, newline="") as f:
+        samples = list(csv.DictReader(f))
+    ops = [t for t, _ in bu.op_times(args.results_dir, OPS)]
+    ranges = bu.scenario_ranges(args.results_dir)
+
+    thresholds = {"metaspace_used_kb": args.metaspace_threshold_kb,
+                  "class_space_used_kb": args.metaspace_threshold_kb,
+                  "heap_used_kb": args.heap_threshold_kb}
+    rows, flagged = [], []
+    for scen, (t0, t1) in ranges.items():
+        window = [s for s in samples if t0 <= int(s["timestamp_ms"]) <= t1]
+        n_ops = bisect.bisect_right(ops, t1) - bisect.bisect_left(ops, t0)
+        if n_ops < args.min_ops or len(window) < 3:
+            continue
+        for metric, limit in thresholds.items():
+            pts = window
+            if metric == "heap_used_kb" and window[0]["gc_count"] != "":
+                # post-GC samples only; otherwise allocation sawtooth dominates the slope
+                pts = [s for prev, s in zip(window, window[1:]) if s["gc_count"] != prev["gc_count"]]
+            pts = [s for s in pts if s[metric] != ""]
+            if len(pts) < 3:
+                continue
+            xs = [bisect.bisect_right(ops, int(s["timestamp_ms"])) for s in pts]
+            ys = [float(s[metric]) for s in pts]
+            k = slope(xs, ys)
+            bad = k == k and k > limit
+            rows.append([scen, metric, n_ops, len(pts), f"{ys[0]:.0f}", f"{ys[-1]:.0f}", f"{k:.3f}",
+                         "true" if bad else "false"])
+            if bad:
+                flagged.append(f"{scen} {metric}: {k:.1f} KB/op (threshold {limit} KB/op)")
+
+    out_path = os.path.join(args.results_dir, "resource_growth.csv")
+    with open(out_path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(GROWTH_HEADER)
+        w.writerows(rows)
+    for r in rows:
+        print(f"  {r[0]:<32} {r[1]:<20} {r[2]:>4} ops  {r[4]:>8} -> {r[5]:>8} KB  "
+              f"{float(r[6]):>9.2f} KB/op" + ("  ⚠" if r[7] == "true" else ""))
+    print(f"Saved {out_path}")
+    if flagged:
+        print("⚠ Per-patch memory growth above threshold:")
+        for msg in flagged:
+            print(f"    {msg}")
+        if args.strict:
+            raise SystemExit(1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pid", type=int, help="service JVM pid (default: find BusinessRuleService via jps)")
+    ap.add_argument("--source", choices=["jstat", "jcmd"], default="jstat")
+    ap.add_argument("--interval-ms", type=float, default=1000.0)
+    ap.add_argument("--duration", type=float, default=0.0, help="seconds; 0 = until SIGTERM/SIGINT")
+    ap.add_argument("--results-dir", default="results")
+    ap.add_argument("--analyze", action="store_true", help="per-scenario growth per operation")
+    ap.add_argument("--metaspace-threshold-kb", type=float, default=16.0,
+                    help="flag Metaspace / class-space growth above this many KB per operation")
+    ap.add_argument("--heap-threshold-kb", type=float, default=256.0,
+                    help="flag post-GC heap growth above this many KB per operation")
+    ap.add_argument("--min-ops", type=int, default=5, help="skip scenarios with fewer operations")
+    ap.add_argument("--strict", action="store_true", help="exit 1 when growth is flagged")
+    args = ap.parse_args()
+    os.makedirs(args.results_dir, exist_ok=True)
+    if args.analyze:
+        analyze(args)
+    else:
+        sample(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,12 +20,16 @@ LOADS=(0 50 100 200 400 800)  # Wider range
 VERSIONS=(v1 v2 v3 v4 v5 v6 v7 v8 v9 v10)
 REPEATS=5  # Multiple runs for statistical validity
 WARMUP_RUNS=2
+# Sidecars (metrics scraper, resource + thread-CPU samplers) load the host, so by
+# default they only run around S7; SIDECARS=1 runs them through S1-S6 as well.
+SIDECARS="${SIDECARS:-0}"
 
 echo "Configuration:"
 echo "  Loads: ${LOADS[*]}"
 echo "  Versions: ${VERSIONS[*]}"
 echo "  Repeats per condition: $REPEATS"
 echo "  Warmup runs: $WARMUP_RUNS"
+echo "  Sidecars during S1-S6: $([ "$SIDECARS" = "1" ] && echo yes || echo no)"
 
 
 # Rebuild to ensure latest code
@@ -51,6 +55,43 @@ fi
 echo "✓ Service running (PID: $SERVICE_PID)"
 echo
 
+# Server-side metrics sidecar (samples /api/metrics, stores interval deltas)
+SCRAPER_PID=""
+SAMPLER_PID=""
+THREAD_PID=""
+start_sidecars() {
+    command -v python3 >/dev/null 2>&1 || return 0
+    [ -n "$SCRAPER_PID" ] && return 0
+    python3 metrics-scraper.py --results-dir "$RESULTS_DIR" > "$RESULTS_DIR/metrics_scraper.log" 2>&1 &
+    SCRAPER_PID=$!
+    echo "✓ Metrics scraper running (PID: $SCRAPER_PID)"
+
+    # Heap / Metaspace / class-space sampler (jstat, no attach) -> results/resources.csv
+    python3 resource-sampler.py --results-dir "$RESULTS_DIR" > "$RESULTS_DIR/resource_sampler.log" 2>&1 &
+    SAMPLER_PID=$!
+    echo "✓ Resource sampler running (PID: $SAMPLER_PID)"
+
+    # Per-thread CPU (service / agent / VM / GC / JIT) from /proc -> results/thread_cpu.csv
+    python3 thread-cpu-sampler.py --results-dir "$RESULTS_DIR" > "$RESULTS_DIR/thread_cpu_sampler.log" 2>&1 &
+    THREAD_PID=$!
+    echo "✓ Thread CPU sampler running (PID: $THREAD_PID)"
+    echo
+}
+
+stop_sidecars() {
+    for PID in $SCRAPER_PID $SAMPLER_PID $THREAD_PID; do
+        kill "$PID" 2>/dev/null || true
+        wait "$PID" 2>/dev/null || true
+    done
+    SCRAPER_PID=""
+    SAMPLER_PID=""
+    THREAD_PID=""
+}
+
+if [ "$SIDECARS" = "1" ]; then
+    start_sidecars
+fi
+
 # Helper functions
 run_load() {
     local rps="$1"
@@ -77,6 +118,11 @@ run_apply() {
     ./bench-apply.sh "$ver" "$load" "$scen" "$run" 2>&1 || echo "$(date -u +"%Y-%m-%dT%H:%M:%SZ"),$scen,$run,$load,patch,$ver,NaN,NaN,NaN,false"
 }
 
+run_staged() {
+    local ver="$1" load="$2" scen="$3" run="$4"
+    ./bench-staged.sh "$ver" "$load" "$scen" "$run" 2>&1 || true
+}
+
 run_rollback() {
     local load="$1" scen="$2" run="$3" label="$4"
     ./bench-rollback.sh "$load" "$scen" "$run" "$label" 2>&1 || echo "$(date -u +"%Y-%m-%dT%H:%M:%SZ"),$scen,$run,$load,rollback,$label,NaN,NaN,NaN,false"
@@ -248,9 +294,39 @@ echo "✓ Scenario 6 complete"
 echo
 
 
+# Scenario 7: Two-phase staged patch (stage ahead, activate by id)
+echo "=== Scenario 7: Staged Patch (stage + activate) ==="
+SCENARIO="S7_staged"
+RUN=1
+start_sidecars
+
+for L in "${LOADS[@]}"; do
+    echo "  Testing load: ${L} rps"
+    run_load "$L"
+
+    for ((r=1; r<=REPEATS; r++)); do
+        for V in "${VERSIONS[@]}"; do
+            run_staged "$V" "$L" "$SCENARIO" "$RUN" >> "$CSV"
+            RUN=$((RUN+1))
+            sleep 0.1
+        done
+    done
+
+    stop_load
+    echo "    ✓ Completed ${L} rps"
+done
+
+stop_sidecars
+echo "✓ Scenario 7 complete"
+echo
+
+
 # Cleanup
 echo "Cleaning up..."
 stop_load
+stop_sidecars
+# Agent events (ms-resolution op times) for the memory-growth and throughput-loss analyses
+python3 agent-events.py dump --csv "$RESULTS_DIR/agent_events.csv" > /dev/null 2>&1 || true
 kill $SERVICE_PID 2>/dev/null || true
 wait $SERVICE_PID 2>/dev/null || true
 
@@ -261,8 +337,11 @@ echo "Results saved to: $CSV"
 # Generate plots
 echo "Generating visualizations..."
 if command -v python3 >/dev/null 2>&1; then
+    python3 resource-sampler.py --analyze --results-dir "$RESULTS_DIR" || true
+    python3 thread-cpu-sampler.py --analyze --results-dir "$RESULTS_DIR" || true
     python generate-plots.py
     python generate-dashboard.py
+    python3 metrics-scraper.py --analyze --results-dir "$RESULTS_DIR" || true
     echo "✓ Plots and dashboard generated"
     echo "  View results: results/dashboard.html"
 else
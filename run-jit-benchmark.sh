@@ -0,0 +1,83 @@
+#!/bin/bash
+# JIT deoptimization / re-warm benchmark
+# Runs the service with -XX:+PrintCompilation, keeps steady load on it (with the
+# binary request log enabled), applies each patch version in turn and leaves time
+# for calculateDiscount and its inlining callers to recompile. jit-analysis.py
+# then pairs each patch with the deoptimizations and per-tier recompilations it
+# triggered.
+set -euo pipefail
+
+RESULTS_DIR="results"
+JIT_DIR="$RESULTS_DIR/jit"
+mkdir -p "$JIT_DIR"
+
+LOAD=${LOAD:-50}              # rps during the run (v11 is slow while interpreted)
+VERSIONS=(${VERSIONS:-v1 v11 v2 v11 v3 v11})
+WARM_S=${WARM_S:-15}          # initial warm-up so calculateDiscount reaches C2
+SETTLE_S=${SETTLE_S:-10}      # time after each patch for recompilation
+
+CP_SEP=":"; case "$OSTYPE" in msys*|cygwin*|win32*) CP_SEP=";";; esac
+CP="target/classes${CP_SEP}target/hotpatch-agent.jar"
+
+echo "=== JIT Re-warm Benchmark ==="
+echo "  Load: ${LOAD} rps"
+echo "  Versions: ${VERSIONS[*]}"
+echo
+
+echo "Building project..."
+./build.sh > /dev/null 2>&1
+echo "✓ Build complete"
+
+if jps | grep -q BusinessRuleService; then
+    pkill -f BusinessRuleService || true
+    sleep 2
+fi
+JAVA_OPTS="-XX:+PrintCompilation" ./run-service.sh > "$JIT_DIR/compilation.log" 2>&1 &
+SERVICE_PID=$!
+sleep 3
+if ! jps | grep -q BusinessRuleService; then
+    echo "ERROR: Service failed to start"
+    exit 1
+fi
+echo "✓ Service running with compilation logging"
+
+# Maps PrintCompilation's VM-relative timestamps to wall clock
+curl -s http://localhost:8080/api/metrics \
+    | sed -nE 's/.*"vm_start_ms":([0-9]+).*/vm_start_ms=\1/p' > "$JIT_DIR/meta.txt"
+
+REQLOG="$JIT_DIR/requests.bin" ./run-load.sh 5 "$LOAD" > /dev/null 2>&1 &
+LOAD_PID=$!
+echo "  Warming up for ${WARM_S}s..."
+sleep "$WARM_S"
+
+echo "patch_ms,version,agent_ms" > "$JIT_DIR/patches.csv"
+for V in "${VERSIONS[@]}"; do
+    EV_SINCE=$(python3 agent-events.py cursor 2>/dev/null || true)
+    PATCH_MS=$(date +%s%3N)
+    OUT=$(java -cp "$CP" com.hotpatch.tool.PatchApplier "target/classes-patched/${V}/com/hotpatch/demo/BusinessRules.class" 2>&1 || true)
+    AGENT_MS=$(echo "$OUT" | sed -nE 's/.*agent_ms=([0-9.]+).*/\1/p' | head -1)
+    if [ -n "$EV_SINCE" ]; then
+        # Prefer the agent's own start time and timing over the client-side estimate
+        EV_WALL=$(python3 agent-events.py get --since "$EV_SINCE" --op patch --field wall_ms 2>/dev/null || true)
+        EV_MS=$(python3 agent-events.py get --since "$EV_SINCE" --op patch 2>/dev/null || true)
+        PATCH_MS=${EV_WALL:-$PATCH_MS}
+        AGENT_MS=${EV_MS:-$AGENT_MS}
+    fi
+    echo "$PATCH_MS,$V,${AGENT_MS:-NaN}" >> "$JIT_DIR/patches.csv"
+    echo "  Applied $V (agent ${AGENT_MS:-NaN} ms), settling ${SETTLE_S}s..."
+    sleep "$SETTLE_S"
+done
+
+# Stop load first so the request log is flushed by its shutdown hook
+pkill -f LoadGenerator 2>/dev/null || true
+wait "$LOAD_PID" 2>/dev/null || true
+pkill -f BusinessRuleService 2>/dev/null || true
+wait "$SERVICE_PID" 2>/dev/null || true
+
+echo
+if command -v python3 >/dev/null 2>&1; then
+    python3 jit-analysis.py --jit-dir "$JIT_DIR" --out "$RESULTS_DIR/jit_summary.csv" \
+        --methods-out "$RESULTS_DIR/jit_methods.csv"
+else
+    echo "Python3 not found - run: python3 jit-analysis.py"
+fi
@@ -5,8 +5,15 @@
 echo "=== Starting Load Generator ==="
 echo
 
-# Default: 5 threads, 10 RPS
+# Default: 5 threads, 10 RPS, service on port 8080 (override with SERVICE_PORT)
 THREADS=${1:-5}
 RPS=${2:-10}
+SERVICE_PORT=${SERVICE_PORT:-8080}
 
-java -cp target/classes com.hotpatch.demo.LoadGenerator $THREADS $RPS
\ No newline at end of file
+# Optional binary per-request log (see reqlog.py): REQLOG=<file> [REQLOG_CELL=<id>]
+LOG_OPTS=()
+if [ -n "${REQLOG:-}" ]; then
+    LOG_OPTS=(-Dhotpatch.reqlog="$REQLOG" -Dhotpatch.reqlog.cell="${REQLOG_CELL:-0}")
+fi
+
+java -Dhotpatch.service.port=$SERVICE_PORT "${LOG_OPTS[@]}" -cp target/classes com.hotpatch.demo.LoadGenerator $THREADS $RPS
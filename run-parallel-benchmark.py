@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Parallel runner for the S1-S6 scenario matrix of run-benchmark.sh.
+
+The matrix is split into independent cells (one scenario at one load, one
+version for S4, and S3 / S5 as one self-contained cell each). Each of --groups
+isolated groups gets its own service + agent ports and a disjoint CPU set; the
+service, its load generator and the bench clients of a group are all pinned to
+that set with taskset (when available). Group workers pull cells from a shared
+queue and the rows are merged into one CSV (latency.csv layout plus a `group`
+column). The default output is results/latency_parallel.csv so the serial
+results and the figures built from them are left alone.
+
+Every group first runs the serial script's warm-up ops (--warmup-runs apply +
+rollback, then the S6 simple/heavy apply), recorded as *_warmup rows, so no
+measured op hits a cold agent path.
+
+Interference check: after the warm-up, one cell (--check-cell) runs alone on
+group 0 while the other groups sit idle; group 0 then runs it again as its first
+cell of the parallel phase, so both samples come from the same warm JVM.
+Medians of both runs are compared and written to results/interference.csv,
+flagging metrics that moved more than --threshold.
+
+Usage:
+  python3 run-parallel-benchmark.py --groups 4 --loads 0,100,400 --repeats 3
+"""
+
+import argparse
+import csv
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import benchutil as bu
+
+HEADER = ["timestamp", "scenario", "run_id", "load_rps", "op", "version",
+          "orchestration_ms", "client_ms", "agent_ms", "success", "group"]
+INTERFERENCE_HEADER = ["cell", "metric", "alone_n", "alone_median", "parallel_n",
+                       "parallel_median", "ratio", "flagged"]
+
+
+class Cell:
+    """One independent unit of the matrix: a load level plus a list of bench ops."""
+
+    def __init__(self, scenario, load, ops, key=None, gap_s=0.1, settle_s=2.0):
+        self.scenario = scenario
+        self.load = load
+        self.ops = ops                # [("apply", version, scenario) | ("rollback", label, scenario)]
+        self.key = key or f"{scenario}:{load}"
+        self.gap_s = gap_s            # pause after each op (as in run-benchmark.sh)
+        self.settle_s = settle_s      # load stabilisation before the first op
+
+
+def warmup_cell(versions, warmup_runs, load):
+    """run-benchmark.sh's warm-up ops (S1 apply + rollback, S6 simple/heavy apply)."""
+    ops = []
+    for _ in range(warmup_runs):
+        ops += [("apply", versions[0], "S1_patch_vs_load_warmup"), ("rollback", "warmup", "S1_patch_vs_load_warmup")]
+    ops += [("apply", "v1", "S6_simple_vs_heavy_apply_only_warmup"),
+            ("apply", "v11", "S6_simple_vs_heavy_apply_only_warmup")]
+    return Cell("warmup", load, ops, key=f"warmup:{load}")
+
+
+def build_matrix(loads, versions, repeats):
+    cells = []
+    for L in loads:
+        ops = [("apply", v, "S1_patch_vs_load") for _ in range(repeats) for v in versions]
+        cells.append(Cell("S1_patch_vs_load", L, ops))
+    for L in loads:
+        ops = []
+        for _ in range(repeats):
+            ops += [("apply", "v5", "S2_rollback_vs_load_setup"), ("rollback", "v5_to_v0", "S2_rollback_vs_load")]
+        cells.append(Cell("S2_rollback_vs_load", L, ops))
+    # S3: apply every version, then unwind the stack; one cell so the stack stays on one JVM
+    ops = [("apply", v, "S3_sequential_apply") for v in versions]
+    ops += [("rollback", f"step_{i}", "S3_sequential_rollback") for i in range(1, len(versions) + 1)]
+    cells.append(Cell("S3_sequential", 400, ops, gap_s=0.2, settle_s=4.0))
+    for v in versions:
+        ops = []
+        for _ in range(10):
+            ops += [("apply", v, "S4_complexity"), ("rollback", v, "S4_complexity_rollback")]
+        cells.append(Cell("S4_complexity", 400, ops, key=f"S4_complexity:400:{v}"))
+    # S5: 60 applies under sustained load, one cell
+    ops = [("apply", versions[i % len(versions)], "S5_sustained") for i in range(1, 61)]
+    cells.append(Cell("S5_sustained", 400, ops, gap_s=0.5))
+    for L in loads:
+        ops = []
+        for _ in range(repeats):
+            ops += [("apply", "v1", "S6_simple_vs_heavy_apply_only"), ("apply", "v11", "S6_simple_vs_heavy_apply_only")]
+        cells.append(Cell("S6_simple_vs_heavy_apply_only", L, ops))
+    return cells
+
+
+def partition_cpus(groups):
+    """Split this process's CPUs into `groups` disjoint contiguous sets (taskset -c syntax)."""
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < groups:
+        raise SystemExit(f"Only {len(cpus)} CPUs available for {groups} groups")
+    per = len(cpus) // groups
+    return [",".join(str(c) for c in cpus[g * per:(g + 1) * per]) for g in range(groups)]
+
+
+class Group:
+    def __init__(self, gid, service_port, agent_port, cpus, log_dir):
+        self.gid = gid
+        self.service_port = service_port
+        self.agent_port = agent_port
+        self.cpus = cpus
+        self.log_dir = log_dir
+        self.proc = None
+        self.env = dict(os.environ, SERVICE_PORT=str(service_port), AGENT_PORT=str(agent_port))
+
+    def pinned(self, cmd):
+        return (["taskset", "-c", self.cpus] + cmd) if self.cpus else cmd
+
+    def start(self):
+        self.proc = bu.launch_service(self.service_port, self.agent_port, cpus=self.cpus,
+                                      log_path=os.path.join(self.log_dir, f"service_g{self.gid}.log"))
+        if not bu.wait_ready(self.service_port, proc=self.proc):
+            raise SystemExit(f"ERROR: group {self.gid} service failed to start")
+
+    def stop(self):
+        bu.stop_process(self.proc)
+
+    def run_cell(self, cell, run_ids, scenario_suffix=""):
+        """Run every op of the cell under load; returns CSV rows (lists) tagged with the group id."""
+        load_proc = None
+        if cell.load > 0:
+            load_proc = subprocess.Popen(self.pinned(["bash", "run-load.sh", "5", str(cell.load)]), env=self.env,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                         start_new_session=True)
+            time.sleep(cell.settle_s)  # let load stabilise (as run-benchmark.sh does)
+        rows = []
+        try:
+            for kind, arg, scen in cell.ops:
+                scen = scen + scenario_suffix
+                run = run_ids(scen)
+                if kind == "apply":
+                    cmd = ["bash", "bench-apply.sh", arg, str(cell.load), scen, str(run)]
+                else:
+                    cmd = ["bash", "bench-rollback.sh", str(cell.load), scen, str(run), arg]
+                out = subprocess.run(self.pinned(cmd), env=self.env, capture_output=True, text=True).stdout
+                line = out.strip().splitlines()[-1] if out.strip() else ""
+                fields = line.split(",")
+                if len(fields) != len(HEADER) - 1:
+                    fields = [time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), scen, str(run), str(cell.load),
+                              "patch" if kind == "apply" else "rollback", arg, "NaN", "NaN", "NaN", "false"]
+                rows.append(fields + [str(self.gid)])
+                time.sleep(cell.gap_s)
+        finally:
+            if load_proc is not None:
+                os.killpg(load_proc.pid, 15)
+                load_proc.wait()
+                time.sleep(1)
+        return rows
+
+
+def samples(rows, scenario, cell):
+    """Successful orchestration/client/agent ms values of `scenario` rows belonging to `cell`."""
+    labels = {arg for _, arg, _ in cell.ops}
+    out = {}
+    for i, metric in ((6, "orchestration_ms"), (7, "client_ms"), (8, "agent_ms")):
+        vals = []
+        for r in rows:
+            if r[1] == scenario and r[3] == str(cell.load) and r[5] in labels and r[9] == "true":
+                try:
+                    v = float(r[i])
+                except ValueError:
+                    continue
+                if v == v:
+                    vals.append(v)
+        out[metric] = vals
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--groups", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)))
+    ap.add_argument("--loads", default="0,50,100,200,400,800")
+    ap.add_argument("--versions", default="v1,v2,v3,v4,v5,v6,v7,v8,v9,v10")
+    ap.add_argument("--repeats", type=int, default=5)
+    ap.add_argument("--warmup-runs", type=int, default=2, help="warm-up apply+rollback pairs per group")
+    ap.add_argument("--check-cell", default=None,
+                    help="cell key for the interference check (default: S1 at the highest load)")
+    ap.add_argument("--threshold", type=float, default=0.10,
+                    help="flag median shifts larger than this fraction")
+    ap.add_argument("--base-service-port", type=int, default=10080)
+    ap.add_argument("--base-agent-port", type=int, default=10580)
+    ap.add_argument("--out", default="results/latency_parallel.csv",
+                    help="merged rows (kept apart from the serial results/latency.csv)")
+    args = ap.parse_args()
+
+    loads = bu.csv_list(args.loads, int)
+    versions = bu.csv_list(args.versions)
+    cells = build_matrix(loads, versions, args.repeats)
+    check_key = args.check_cell or f"S1_patch_vs_load:{max(loads)}"
+    check = next((c for c in cells if c.key == check_key), None)
+    if check is None:
+        raise SystemExit(f"Unknown --check-cell {check_key}; known: {', '.join(c.key for c in cells)}")
+
+    print("Building project...")
+    subprocess.run(["bash", "build.sh"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    bu.check_build()
+
+    results_dir = os.path.dirname(args.out) or "."
+    log_dir = os.path.join(results_dir, "parallel")
+    os.makedirs(log_dir, exist_ok=True)
+    if shutil.which("taskset"):
+        cpusets = partition_cpus(args.groups)
+    else:
+        print("⚠ taskset not found - groups will share all CPUs (results may interfere)")
+        cpusets = [None] * args.groups
+
+    groups = [Group(g, args.base_service_port + g, args.base_agent_port + g, cpusets[g], log_dir)
+              for g in range(args.groups)]
+
+    counters, counter_lock = {}, threading.Lock()
+
+    def run_ids(scen):
+        with counter_lock:
+            counters[scen] = counters.get(scen, 0) + 1
+            return counters[scen]
+
+    all_rows, rows_lock = [], threading.Lock()
+    try:
+        for g in groups:
+            g.start()
+            print(f"✓ Group {g.gid}: service :{g.service_port}, agent :{g.agent_port}, cpus {g.cpus or 'all'}")
+
+        # Warm every group (concurrently) before anything is measured
+        print(f"=== Warm-up: {args.warmup_runs} apply+rollback pairs + S6 pair per group ===")
+        warm = warmup_cell(versions, args.warmup_runs, check.load)
+
+        def warm_up(group):
+            rows = group.run_cell(warm, run_ids)
+            with rows_lock:
+                all_rows.extend(rows)
+
+        warm_threads = [threading.Thread(target=warm_up, args=(g,)) for g in groups]
+        for t in warm_threads:
+            t.start()
+        for t in warm_threads:
+            t.join()
+
+        # Interference check, phase 1: the check cell alone (other groups idle)
+        print(f"=== Interference check: {check.key} alone on group 0 ===")
+        alone_rows = groups[0].run_cell(check, run_ids, scenario_suffix="_alone")
+        all_rows += alone_rows
+
+        # Parallel phase: group 0 reruns the check cell first (same JVM as the alone run),
+        # overlapping with the other groups' first cells; everything else is shared
+        work = queue.Queue()
+        for c in cells:
+            if c is not check:
+                work.put(c)
+        durations = []
+
+        def worker(group, first=None):
+            while True:
+                if first is not None:
+                    cell, first = first, None
+                else:
+                    try:
+                        cell = work.get_nowait()
+                    except queue.Empty:
+                        return
+                t0 = time.monotonic()
+                rows = group.run_cell(cell, run_ids)
+                with rows_lock:
+                    all_rows.extend(rows)
+                    durations.append(time.monotonic() - t0)
+                print(f"  group {group.gid}: {cell.key} done ({len(rows)} ops, {durations[-1]:.1f}s)")
+
+        print(f"=== Parallel phase: {len(cells)} cells on {len(groups)} groups ===")
+        t_start = time.monotonic()
+        threads = [threading.Thread(target=worker, args=(g, check if g is groups[0] else None)) for g in groups]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.monotonic() - t_start
+        print(f"✓ Parallel phase: {wall:.1f}s wall vs {sum(durations):.1f}s serial estimate "
+              f"(speedup {sum(durations) / max(wall, 1e-9):.2f}x)")
+    finally:
+        for g in groups:
+            g.stop()
+
+    with open(args.out, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        w.writerows(all_rows)
+    print(f"Results: {args.out}")
+
+    # Interference check, phase 2: compare the alone run with the parallel run of the same cell
+    check_scenarios = sorted({scen for _, _, scen in check.ops if not scen.endswith("_setup")})
+    flagged = False
+    path = os.path.join(results_dir, "interference.csv")
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(INTERFERENCE_HEADER)
+        for scen in check_scenarios:
+            alone = samples(all_rows, scen + "_alone", check)
+            par = samples(all_rows, scen, check)
+            for metric in alone:
+                a, p = alone[metric], par[metric]
+                if not a or not p:
+                    continue
+                ma, mp = bu.percentile(a, 50), bu.percentile(p, 50)
+                ratio = mp / ma if ma > 0 else float("nan")
+                bad = ratio == ratio and abs(ratio - 1.0) > args.threshold
+                flagged |= bad
+                w.writerow([f"{check.key}/{scen}", metric, len(a), f"{ma:.3f}", len(p), f"{mp:.3f}",
+                            f"{ratio:.3f}", "true" if bad else "false"])
+                print(f"  {scen} {metric}: alone {ma:.3f} ms, parallel {mp:.3f} ms (x{ratio:.2f})"
+                      + ("  ⚠ interference" if bad else ""))
+    print(f"Interference check: {path}")
+    if flagged:
+        print(f"⚠ Parallel run shifted medians by more than {args.threshold:.0%}; "
+              f"consider fewer groups or compare against the serial run-benchmark.sh")
+
+
+if __name__ == "__main__":
+    main()
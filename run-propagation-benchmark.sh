@@ -0,0 +1,90 @@
+#!/bin/bash
+# Version-propagation benchmark
+# For every service executor model x load level: start the service, keep load on
+# it with the binary request log enabled (LoadGenerator records the Rule Version
+# each response reports), apply alternating patches and dump the agent's events.
+# version-propagation.py then measures, per patch, how long until the request
+# threads actually serve the new rule.
+set -euo pipefail
+
+RESULTS_DIR="results"
+PROP_DIR="$RESULTS_DIR/propagation"
+mkdir -p "$PROP_DIR"
+
+EXECUTORS=(${EXECUTORS:-default fixed:8 cached})
+LOADS=(${LOADS:-50 200 800})
+VERSIONS=(${VERSIONS:-v1 v2 v1 v2 v1 v2})   # consecutive versions must differ
+CLIENT_THREADS=${CLIENT_THREADS:-8}
+WARM_S=${WARM_S:-5}
+GAP_S=${GAP_S:-3}                           # time between patches
+SERVICE_PORT=${SERVICE_PORT:-8080}
+AGENT_PORT=${AGENT_PORT:-8088}
+export SERVICE_PORT AGENT_PORT
+
+CP_SEP=":"; case "$OSTYPE" in msys*|cygwin*|win32*) CP_SEP=";";; esac
+CP="target/classes${CP_SEP}target/hotpatch-agent.jar"
+
+echo "=== Version Propagation Benchmark ==="
+echo "  Executors: ${EXECUTORS[*]}"
+echo "  Loads: ${LOADS[*]} rps (${CLIENT_THREADS} client threads)"
+echo "  Versions: ${VERSIONS[*]}"
+echo
+
+echo "Building project..."
+./build.sh > /dev/null 2>&1
+echo "✓ Build complete"
+
+if jps | grep -q BusinessRuleService; then
+    pkill -f BusinessRuleService || true
+    sleep 2
+fi
+
+MANIFEST="$RESULTS_DIR/propagation_cells.csv"
+echo "cell,executor,load_rps,reqlog,events" > "$MANIFEST"
+CELL=0
+for EXEC in "${EXECUTORS[@]}"; do
+    for LOAD in "${LOADS[@]}"; do
+        CELL=$((CELL + 1))
+        TAG="${EXEC//:/}_${LOAD}"
+        echo "--- Cell $CELL: executor=$EXEC load=${LOAD} rps ---"
+
+        JAVA_OPTS="-Dhotpatch.service.executor=$EXEC" ./run-service.sh > "$PROP_DIR/service_$TAG.log" 2>&1 &
+        SERVICE_PID=$!
+        sleep 3
+        if ! jps | grep -q BusinessRuleService; then
+            echo "ERROR: Service failed to start (see $PROP_DIR/service_$TAG.log)"
+            exit 1
+        fi
+        EV_SINCE=$(python3 agent-events.py cursor)
+
+        REQLOG="$PROP_DIR/requests_$TAG.bin" REQLOG_CELL="$CELL" \
+            ./run-load.sh "$CLIENT_THREADS" "$LOAD" > /dev/null 2>&1 &
+        LOAD_PID=$!
+        sleep "$WARM_S"
+
+        for V in "${VERSIONS[@]}"; do
+            java -cp "$CP" com.hotpatch.tool.PatchApplier \
+                "target/classes-patched/${V}/com/hotpatch/demo/BusinessRules.class" \
+                "http://127.0.0.1:${AGENT_PORT}/patch" > /dev/null 2>&1 || echo "  ! patch $V failed"
+            sleep "$GAP_S"
+        done
+
+        python3 agent-events.py dump --since "$EV_SINCE" --op patch --csv "$PROP_DIR/events_$TAG.csv"
+
+        # Stop load first so the request log is flushed by its shutdown hook
+        pkill -f LoadGenerator 2>/dev/null || true
+        wait "$LOAD_PID" 2>/dev/null || true
+        pkill -f BusinessRuleService 2>/dev/null || true
+        wait "$SERVICE_PID" 2>/dev/null || true
+        sleep 1
+
+        echo "$CELL,$EXEC,$LOAD,$PROP_DIR/requests_$TAG.bin,$PROP_DIR/events_$TAG.csv" >> "$MANIFEST"
+    done
+done
+
+echo
+if command -v python3 >/dev/null 2>&1; then
+    python3 version-propagation.py --cells "$MANIFEST"
+else
+    echo "Python3 not found - run: python3 version-propagation.py"
+fi
@@ -1,6 +1,11 @@
 #!/bin/bash
 
 # Run the business service with agent pre-loaded
+# Ports can be overridden: SERVICE_PORT (default 8080), AGENT_PORT (default 8088)
+# Extra JVM flags (e.g. -XX:+PrintCompilation) can be passed via JAVA_OPTS
+
+SERVICE_PORT=${SERVICE_PORT:-8080}
+AGENT_PORT=${AGENT_PORT:-8088}
 
 echo "=== Starting Business Rule Service ==="
 echo
@@ -13,6 +18,8 @@ if jps | grep -q BusinessRuleService; then
 fi
 
 # Run with agent loaded (allows hot patching)
-java -javaagent:target/hotpatch-agent.jar \
+java ${JAVA_OPTS:-} -javaagent:target/hotpatch-agent.jar \
+     -Dhotpatch.service.port=$SERVICE_PORT \
+     -Dhotpatch.agent.port=$AGENT_PORT \
      -cp target/classes \
-     com.hotpatch.demo.BusinessRuleService
\ No newline at end of file
+     com.hotpatch.demo.BusinessRuleService
@@ -0,0 +1,117 @@
+package com.hotpatch.agent;
+
+/**
+ * Fixed-size ring buffer of structured agent operation events.
+ *
+ * All slots are preallocated as parallel primitive arrays, so recording an event
+ * only stores fields (no allocation, no I/O) and can sit right after the timed
+ * region. Events carry a sequence number starting at 1; {@link #appendSince}
+ * renders every retained event with seq > since as one compact JSON object per
+ * line. When the buffer wraps, the oldest events are overwritten and readers see
+ * the gap as a jump in seq.
+ *
+ * Capacity: -Dhotpatch.agent.events=N (default 4096).
+ */
+final class AgentEvents {
+    static final String[] OPS = {"patch", "rollback", "stage", "activate"};
+    static final int OP_PATCH = 0, OP_ROLLBACK = 1, OP_STAGE = 2, OP_ACTIVATE = 3;
+
+    // coalesced: superseded in the patch queue by a newer patch; detail names the event that carried it
+    // (recorded as error, with the same detail, when that newer patch failed)
+    static final String[] OUTCOMES = {"ok", "error", "invalid", "coalesced"};
+    static final int OK = 0, ERROR = 1, INVALID = 2, COALESCED = 3;
+
+    private final int capacity;
+    private final long[] seq;
+    private final byte[] op;
+    private final byte[] outcome;
+    private final long[] wallMs;        // epoch ms at operation start
+    private final long[] lookupNs;      // find the loaded target class
+    private final long[] validateNs;    // stage only: parse + compatibility + format check
+    private final long[] redefineNs;    // Instrumentation.redefineClasses
+    private final long[] bookkeepingNs; // history / currentBytes / staged map updates
+    private final int[] bytes;
+    private final int[] historyDepth;   // rollback history size after the operation
+    private final String[] source;      // e.g. "http-body", "staged:s3"
+    private final String[] detail;      // error message, null when ok
+
+    private long next = 1;
+
+    AgentEvents(int capacity) {
+        this.capacity = capacity;
+        seq = new long[capacity];
+        op = new byte[capacity];
+        outcome = new byte[capacity];
+        wallMs = new long[capacity];
+        lookupNs = new long[capacity];
+        validateNs = new long[capacity];
+        redefineNs = new long[capacity];
+        bookkeepingNs = new long[capacity];
+        bytes = new int[capacity];
+        historyDepth = new int[capacity];
+        source = new String[capacity];
+        detail = new String[capacity];
+    }
+
+    synchronized long record(int opCode, int outcomeCode, long startWallMs, long lookup, long validate,
+                             long redefine, long bookkeeping, int byteCount, int depth, String src, String err) {
+        long s = next++;
+        int i = (int) (s % capacity);
+        seq[i] = s;
+        op[i] = (byte) opCode;
+        outcome[i] = (byte) outcomeCode;
+        wallMs[i] = startWallMs;
+        lookupNs[i] = lookup;
+        validateNs[i] = validate;
+        redefineNs[i] = redefine;
+        bookkeepingNs[i] = bookkeeping;
+        bytes[i] = byteCount;
+        historyDepth[i] = depth;
+        source[i] = src;
+        detail[i] = err;
+        return s;
+    }
+
+    synchronized void appendSince(long since, StringBuilder sb) {
+        long from = Math.max(since + 1, Math.max(1, next - capacity));
+        for (long s = from; s < next; s++) {
+            int i = (int) (s % capacity);
+            long total = lookupNs[i] + validateNs[i] + redefineNs[i] + bookkeepingNs[i];
+            sb.append("{\"seq\":").append(seq[i])
+              .append(",\"op\":\"").append(OPS[op[i]]).append('"')
+              .append(",\"outcome\":\"").append(OUTCOMES[outcome[i]]).append('"')
+              .append(",\"wall_ms\":").append(wallMs[i])
+              .append(",\"lookup_ns\":").append(lookupNs[i])
+              .append(",\"validate_ns\":").append(validateNs[i])
+              .append(",\"redefine_ns\":").append(redefineNs[i])
+              .append(",\"bookkeeping_ns\":").append(bookkeepingNs[i])
+              .append(",\"total_ns\":").append(total)
+              .append(",\"bytes\":").append(bytes[i])
+              .append(",\"history\":").append(historyDepth[i])
+              .append(",\"source\":");
+            appendString(sb, source[i]);
+            sb.append(",\"detail\":");
+            appendString(sb, detail[i]);
+            sb.append("}\n");
+        }
+    }
+
+    synchronized long lastSeq() {
+        return next - 1;
+    }
+
+    private static void appendString(StringBuilder sb, String s) {
+        if (s == null) {
+            sb.append("null");
+            return;
+        }
+        sb.append('"');
+        for (int k = 0; k < s.length(); k++) {
+            char c = s.charAt(k);
+            if (c == '"' || c == '\\') sb.append('\\').append(c);
+            else if (c < 0x20) sb.append(String.format("\\u%04x", (int) c));
+            else sb.append(c);
+        }
+        sb.append('"');
+    }
+}
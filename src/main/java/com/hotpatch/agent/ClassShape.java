@@ -0,0 +1,149 @@
+package com.hotpatch.agent;
+
+import java.io.ByteArrayInputStream;
+import java.io.DataInputStream;
+import java.io.IOException;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.TreeSet;
+
+/**
+ * Minimal class-file reader: just enough structure (name, super, interfaces,
+ * field and method signatures) to tell whether a patch is hot-swap compatible
+ * with the loaded class before it goes anywhere near redefineClasses.
+ */
+final class ClassShape {
+    private static final int ACC_PRIVATE = 0x0002;
+    private static final int ACC_STATIC = 0x0008;
+    private static final int ACC_FINAL = 0x0010;
+
+    final int majorVersion;
+    final int access;
+    final String name;       // internal form, e.g. com/hotpatch/demo/BusinessRules
+    final String superName;
+    final TreeSet<String> interfaces = new TreeSet<>();
+    final TreeSet<String> fields = new TreeSet<>();   // "flags name:descriptor"
+    final TreeSet<String> methods = new TreeSet<>();  // "flags name descriptor"
+
+    private ClassShape(int majorVersion, int access, String name, String superName) {
+        this.majorVersion = majorVersion;
+        this.access = access;
+        this.name = name;
+        this.superName = superName;
+    }
+
+    static ClassShape parse(byte[] bytes) {
+        try (DataInputStream in = new DataInputStream(new ByteArrayInputStream(bytes))) {
+            if (in.readInt() != 0xCAFEBABE) throw new ClassFormatError("bad magic number");
+            in.readUnsignedShort(); // minor
+            int major = in.readUnsignedShort();
+
+            int cpCount = in.readUnsignedShort();
+            String[] utf8 = new String[cpCount];
+            int[] classNameIdx = new int[cpCount];
+            for (int i = 1; i < cpCount; i++) {
+                int tag = in.readUnsignedByte();
+                switch (tag) {
+                    case 1: utf8[i] = in.readUTF(); break;                 // Utf8
+                    case 7: classNameIdx[i] = in.readUnsignedShort(); break; // Class
+                    case 8: case 16: case 19: case 20: in.skipBytes(2); break;
+                    case 15: in.skipBytes(3); break;                        // MethodHandle
+                    case 3: case 4: case 9: case 10: case 11: case 12: case 17: case 18:
+                        in.skipBytes(4); break;
+                    case 5: case 6: in.skipBytes(8); i++; break;            // Long/Double take two slots
+                    default: throw new ClassFormatError("bad constant pool tag " + tag + " at #" + i);
+                }
+            }
+
+            int access = in.readUnsignedShort();
+            String name = utf8At(utf8, classNameIdx, in.readUnsignedShort());
+            int superIdx = in.readUnsignedShort();
+            String superName = superIdx == 0 ? null : utf8At(utf8, classNameIdx, superIdx);
+            ClassShape shape = new ClassShape(major, access, name, superName);
+
+            int ifaceCount = in.readUnsignedShort();
+            for (int i = 0; i < ifaceCount; i++) {
+                shape.interfaces.add(utf8At(utf8, classNameIdx, in.readUnsignedShort()));
+            }
+            readMembers(in, utf8, shape.fields, ":");
+            readMembers(in, utf8, shape.methods, " ");
+            return shape;
+        } catch (IOException | ArrayIndexOutOfBoundsException | NullPointerException e) {
+            throw new ClassFormatError("truncated or malformed class file: " + e);
+        }
+    }
+
+    /** Differences that redefineClasses would reject; empty if the patch is compatible. */
+    List<String> incompatibilities(ClassShape loaded) {
+        List<String> out = new ArrayList<>();
+        if (!name.equals(loaded.name)) out.add("class name " + name + " != " + loaded.name);
+        if (superName == null ? loaded.superName != null : !superName.equals(loaded.superName)) {
+            out.add("superclass changed: " + loaded.superName + " -> " + superName);
+        }
+        if (access != loaded.access) out.add("class modifiers changed");
+        if (!interfaces.equals(loaded.interfaces)) out.add("interfaces changed: " + loaded.interfaces + " -> " + interfaces);
+        diff("field", loaded.fields, fields, false, out);
+        diff("method", loaded.methods, methods, true, out);
+        return out;
+    }
+
+    /**
+     * HotSpot lets a redefinition add or remove private static and private final
+     * methods (this covers the static lambda$ bodies javac emits when a patch adds
+     * a non-capturing lambda); any other added or removed member, and any modifier
+     * change on a kept one, is rejected.
+     */
+    private static void diff(String kind, TreeSet<String> before, TreeSet<String> after,
+                             boolean privateMethodsMayChange, List<String> out) {
+        for (String m : before) {
+            if (after.contains(m)) continue;
+            if (hasSignature(after, m)) out.add(kind + " modifiers changed: " + m);
+            else if (!(privateMethodsMayChange && isPrivateStaticOrFinal(m))) out.add(kind + " removed: " + m);
+        }
+        for (String m : after) {
+            if (!before.contains(m) && !hasSignature(before, m) && !(privateMethodsMayChange && isPrivateStaticOrFinal(m))) {
+                out.add(kind + " added: " + m);
+            }
+        }
+    }
+
+    /** Whether members holds an entry with the same name and descriptor as member, whatever its flags. */
+    private static boolean hasSignature(TreeSet<String> members, String member) {
+        String signature = member.substring(member.indexOf(' '));
+        for (String m : members) if (m.endsWith(signature) && m.indexOf(' ') == m.length() - signature.length()) return true;
+        return false;
+    }
+
+    /** Whether a "flags name descriptor" member entry is private and static or final. */
+    private static boolean isPrivateStaticOrFinal(String member) {
+        int flags = Integer.parseInt(member.substring(2, member.indexOf(' ')), 16);
+        return (flags & ACC_PRIVATE) != 0 && (flags & (ACC_STATIC | ACC_FINAL)) != 0;
+    }
+
+    private static void readMembers(DataInputStream in, String[] utf8, TreeSet<String> into, String sep) throws IOException {
+        int count = in.readUnsignedShort();
+        for (int i = 0; i < count; i++) {
+            int flags = in.readUnsignedShort();
+            String memberName = utf8[in.readUnsignedShort()];
+            String desc = utf8[in.readUnsignedShort()];
+            if (memberName == null || desc == null) throw new ClassFormatError("member name/descriptor is not Utf8");
+            into.add(String.format("0x%04x %s%s%s", flags, memberName, sep, desc));
+            skipAttributes(in);
+        }
+    }
+
+    private static void skipAttributes(DataInputStream in) throws IOException {
+        int attrs = in.readUnsignedShort();
+        for (int a = 0; a < attrs; a++) {
+            in.readUnsignedShort();
+            int len = in.readInt();
+            if (in.skipBytes(len) != len) throw new ClassFormatError("truncated attribute");
+        }
+    }
+
+    private static String utf8At(String[] utf8, int[] classNameIdx, int classIdx) {
+        String s = utf8[classNameIdx[classIdx]];
+        if (s == null) throw new ClassFormatError("constant #" + classIdx + " is not a Class entry");
+        return s;
+    }
+}
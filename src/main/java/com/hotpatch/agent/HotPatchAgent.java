@@ -8,7 +8,15 @@ import java.lang.instrument.Instrumentation;
 import java.net.InetSocketAddress;
 import java.nio.charset.StandardCharsets;
 import java.util.ArrayDeque;
+import java.util.Collections;
 import java.util.Deque;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Map;
+import java.util.concurrent.Executors;
+import java.util.concurrent.TimeoutException;
+import java.util.concurrent.atomic.AtomicInteger;
+import java.util.concurrent.atomic.AtomicLong;
 
 import com.sun.net.httpserver.HttpExchange;
 import com.sun.net.httpserver.HttpServer;
@@ -17,12 +25,52 @@ public class HotPatchAgent {
     private static Instrumentation instrumentation;
 
     private static final String TARGET_CLASS_NAME = "com.hotpatch.demo.BusinessRules";
-    private static final int PORT = 8088; // localhost only
+    private static final int PORT = Integer.getInteger("hotpatch.agent.port", 8088); // localhost only
+    // -Dhotpatch.agent.http=false keeps the control channel closed (e.g. for RedefineBench)
+    private static final boolean HTTP_ENABLED = Boolean.parseBoolean(System.getProperty("hotpatch.agent.http", "true"));
+    // HTTP handler threads; they only parse/validate and wait on the patch queue
+    private static final int HTTP_THREADS = Integer.getInteger("hotpatch.agent.threads", 8);
 
-    // Version tracking (latest-only rollback)
+    // Version tracking (latest-only rollback). history is only touched by the patch
+    // queue's writer thread; other threads read historyDepth.
     private static volatile boolean httpStarted = false;
     private static volatile byte[] currentBytes = null;  // bytes of current active version
     private static final Deque<byte[]> history = new ArrayDeque<>(); // previous versions (top = last)
+    private static volatile int historyDepth = 0;
+
+    // Two-phase patching: validated bytes waiting for /activate (id -> bytes). Bounded by
+    // -Dhotpatch.agent.staged.max (default 16); the oldest never-activated entry is evicted.
+    private static final int STAGED_MAX = Integer.getInteger("hotpatch.agent.staged.max", 16);
+    private static final Map<String, byte[]> staged = Collections.synchronizedMap(
+            new LinkedHashMap<String, byte[]>() {
+                @Override
+                protected boolean removeEldestEntry(Map.Entry<String, byte[]> eldest) {
+                    return size() > STAGED_MAX;
+                }
+            });
+    private static final AtomicLong stageSeq = new AtomicLong(0);
+
+    // Structured per-operation events, served by GET /events?since=N
+    private static final AgentEvents events = new AgentEvents(Integer.getInteger("hotpatch.agent.events", 4096));
+    private static long lastOpSeq = 0; // seq of the last patch/rollback/activate event (writer thread)
+
+    // Serialises patch/rollback/activate; -Dhotpatch.agent.coalesce=true collapses bursts (latest wins).
+    // Callers get 504 after -Dhotpatch.agent.queue.timeout.ms (default 30000) without an outcome.
+    private static final PatchQueue queue = new PatchQueue(new PatchQueue.Worker() {
+        public double execute(PatchQueue.Request r) throws Exception {
+            return r.opCode == AgentEvents.OP_ROLLBACK ? rollbackOnce() : applyPatchBytes(r.bytes, r.opCode, r.source);
+        }
+
+        public void superseded(PatchQueue.Request r, Throwable failure) {
+            if (failure == null) {
+                events.record(r.opCode, AgentEvents.COALESCED, r.wallMs, 0, 0, 0, 0, r.bytes.length, historyDepth,
+                        r.source, "coalesced into seq " + lastOpSeq);
+            } else {
+                events.record(r.opCode, AgentEvents.ERROR, r.wallMs, 0, 0, 0, 0, r.bytes.length, historyDepth,
+                        r.source, "coalesced into seq " + lastOpSeq + ", which failed: " + failure);
+            }
+        }
+    }, Boolean.getBoolean("hotpatch.agent.coalesce"), Long.getLong("hotpatch.agent.queue.timeout.ms", 30_000));
 
     // Called when agent is loaded at JVM startup
     public static void premain(String agentArgs, Instrumentation inst) {
@@ -43,7 +91,7 @@ public class HotPatchAgent {
             try {
                 // Back-compat: still allow path-based patch if someone uses dynamic attach
                 byte[] bytes = java.nio.file.Files.readAllBytes(java.nio.file.Path.of(agentArgs));
-                double lat = applyPatchBytes(bytes, "file:" + agentArgs);
+                double lat = queue.submit(AgentEvents.OP_PATCH, bytes, "file:" + agentArgs).await();
             } catch (Exception e) {
                 System.err.println("[HotPatchAgent] Failed to apply patch: " + e);
                 e.printStackTrace();
@@ -52,15 +100,27 @@ public class HotPatchAgent {
     }
 
     private static synchronized void startHttp() {
-        if (httpStarted) return;
+        if (httpStarted || !HTTP_ENABLED) return;
         try {
             HttpServer server = HttpServer.create(new InetSocketAddress("127.0.0.1", PORT), 0);
             server.createContext("/patch", HotPatchAgent::handlePatch);
             server.createContext("/rollback", HotPatchAgent::handleRollback);
-            server.setExecutor(null);
+            server.createContext("/stage", HotPatchAgent::handleStage);
+            server.createContext("/activate", HotPatchAgent::handleActivate);
+            server.createContext("/events", HotPatchAgent::handleEvents);
+            // Own named threads (instead of the shared "HTTP-Dispatcher" name) so per-thread
+            // CPU samplers can tell agent work apart from the service's request handling.
+            // Several handlers so concurrent patch requests can queue up (and coalesce).
+            AtomicInteger threadSeq = new AtomicInteger();
+            server.setExecutor(Executors.newFixedThreadPool(HTTP_THREADS, r -> {
+                Thread t = new Thread(r, "hotpatch-agent-" + threadSeq.incrementAndGet());
+                t.setDaemon(true);
+                return t;
+            }));
             server.start();
             httpStarted = true;
-            System.out.println("[HotPatchAgent] HTTP control listening at http://127.0.0.1:" + PORT + "/patch");
+            System.out.println("[HotPatchAgent] HTTP control listening at http://127.0.0.1:" + PORT + "/patch"
+                    + (queue.coalescing() ? " (coalescing patches)" : ""));
         } catch (IOException e) {
             System.err.println("[HotPatchAgent] Failed to start HTTP control: " + e);
         }
@@ -78,15 +138,27 @@ public class HotPatchAgent {
             respond(ex, 400, "empty body");
             return;
         }
+        PatchQueue.Request req = queue.submit(AgentEvents.OP_PATCH, body, "http-body");
+        double latencyMs;
         try {
-            // Preserve your printing/latency semantics:
-            System.out.println("[HotPatchAgent] Reading patched class from: HTTP body (" + body.length + " bytes)");
-            double latencyMs = applyPatchBytes(body, "http-body");
-            respond(ex, 200, String.format("OK %.3f ms", latencyMs));
+            latencyMs = req.await();
+        } catch (TimeoutException e) {
+            respond(ex, 504, "TIMEOUT: " + e.getMessage());
+            return;
         } catch (Throwable t) {
             t.printStackTrace();
             respond(ex, 500, "ERROR: " + t);
+            return;
+        }
+        if (req.coalescedInto != null) {
+            respond(ex, 200, String.format("OK %.3f ms (coalesced)", latencyMs));
+            System.out.println("[HotPatchAgent] ✓ Patch superseded by a newer one (" + body.length + " bytes)");
+            return;
         }
+        respond(ex, 200, String.format("OK %.3f ms", latencyMs));
+        // Console output only after the reply, so it is in neither agent_ms nor client_ms
+        System.out.println("[HotPatchAgent] ✓ Patch applied (" + body.length + " bytes, "
+                + String.format("%.3f", latencyMs) + " ms)");
     }
 
     private static void handleRollback(HttpExchange ex) throws IOException {
@@ -94,58 +166,220 @@ public class HotPatchAgent {
             ex.sendResponseHeaders(405, -1);
             return;
         }
-        if (history.isEmpty()) {
+        double latencyMs;
+        try {
+            latencyMs = queue.submit(AgentEvents.OP_ROLLBACK, null, "history").await();
+        } catch (NoHistoryException e) {
             respond(ex, 409, "no previous version to rollback to");
             return;
+        } catch (TimeoutException e) {
+            respond(ex, 504, "TIMEOUT: " + e.getMessage());
+            return;
+        } catch (Throwable t) {
+            t.printStackTrace();
+            respond(ex, 500, "ERROR: " + t);
+            return;
         }
-        try {
-            byte[] prev = history.pop();
-            long startTime = System.nanoTime();
-
-            Class<?> targetClass = findTargetClass();
-            System.out.println("[HotPatchAgent] Found target class: " + targetClass.getName());
-            instrumentation.redefineClasses(new ClassDefinition(targetClass, prev));
-
-            long endTime = System.nanoTime();
-            double latencyMs = (endTime - startTime) / 1_000_000.0;
+        respond(ex, 200, "OK " + String.format("%.3f ms (rollback)", latencyMs));
+        System.out.println("[HotPatchAgent] ✓ Rollback applied (" + String.format("%.3f", latencyMs) + " ms)");
+    }
 
-            currentBytes = prev;
+    // Phase 1: upload + validate ahead of the patch window. Nothing is redefined.
+    private static void handleStage(HttpExchange ex) throws IOException {
+        if (!"POST".equalsIgnoreCase(ex.getRequestMethod())) {
+            ex.sendResponseHeaders(405, -1);
+            return;
+        }
+        byte[] body = ex.getRequestBody().readAllBytes();
+        if (body.length == 0) {
+            respond(ex, 400, "empty body");
+            return;
+        }
+        long wallMs = System.currentTimeMillis();
+        long t0 = System.nanoTime();
+        // Allocated up front so failed stages carry the same "staged:<id>" source as good ones
+        String id = "s" + stageSeq.incrementAndGet();
+        double latencyMs;
+        try {
+            validatePatch(body);
+            long t1 = System.nanoTime();
+            staged.put(id, body);
+            long t2 = System.nanoTime();
 
-            System.out.println("[HotPatchAgent] ✓ Patch applied successfully!");
-            System.out.println("[HotPatchAgent] Latency: " + String.format("%.3f", latencyMs) + " ms");
-            System.out.println("[HotPatchAgent] Class redefined: " + TARGET_CLASS_NAME);
+            events.record(AgentEvents.OP_STAGE, AgentEvents.OK, wallMs, 0, t1 - t0, 0, t2 - t1,
+                    body.length, historyDepth, "staged:" + id, null);
+            latencyMs = (t2 - t0) / 1_000_000.0;
+        } catch (ClassFormatError | UnsupportedOperationException e) {
+            events.record(AgentEvents.OP_STAGE, AgentEvents.INVALID, wallMs, 0, System.nanoTime() - t0, 0, 0,
+                    body.length, historyDepth, "staged:" + id, e.getMessage());
+            respond(ex, 422, "INVALID: " + e.getMessage());
+            return;
+        } catch (Throwable t) {
+            events.record(AgentEvents.OP_STAGE, AgentEvents.ERROR, wallMs, 0, System.nanoTime() - t0, 0, 0,
+                    body.length, historyDepth, "staged:" + id, String.valueOf(t));
+            t.printStackTrace();
+            respond(ex, 500, "ERROR: " + t);
+            return;
+        }
+        respond(ex, 200, String.format("STAGED %s %.3f ms", id, latencyMs));
+        System.out.println("[HotPatchAgent] Staged " + id + " (" + body.length + " bytes)");
+    }
 
-            respond(ex, 200, "OK " + String.format("%.3f ms (rollback)", latencyMs));
+    // Phase 2: redefine from previously staged bytes (POST /activate?id=sN).
+    private static void handleActivate(HttpExchange ex) throws IOException {
+        if (!"POST".equalsIgnoreCase(ex.getRequestMethod())) {
+            ex.sendResponseHeaders(405, -1);
+            return;
+        }
+        String query = ex.getRequestURI().getQuery();
+        String id = (query != null && query.startsWith("id=")) ? query.substring(3) : null;
+        byte[] bytes = (id == null) ? null : staged.remove(id);
+        if (bytes == null) {
+            respond(ex, 404, "unknown or evicted staged id: " + id);
+            return;
+        }
+        double latencyMs;
+        try {
+            latencyMs = queue.submit(AgentEvents.OP_ACTIVATE, bytes, "staged:" + id).await();
+        } catch (TimeoutException e) {
+            // Still queued: not re-staged, it may yet be applied
+            respond(ex, 504, "TIMEOUT: " + e.getMessage());
+            return;
         } catch (Throwable t) {
+            staged.put(id, bytes); // keep it so the caller can retry
             t.printStackTrace();
             respond(ex, 500, "ERROR: " + t);
+            return;
         }
+        respond(ex, 200, String.format("OK %.3f ms", latencyMs));
+        System.out.println("[HotPatchAgent] ✓ Activated " + id + " (" + String.format("%.3f", latencyMs) + " ms)");
     }
 
-    // ---- Core helpers ----
+    // GET /events?since=N: retained events with seq > N, one JSON object per line.
+    // X-Events-Last-Seq carries the newest seq so callers can take a cursor cheaply.
+    private static void handleEvents(HttpExchange ex) throws IOException {
+        if (!"GET".equalsIgnoreCase(ex.getRequestMethod())) {
+            ex.sendResponseHeaders(405, -1);
+            return;
+        }
+        long since = 0;
+        String query = ex.getRequestURI().getQuery();
+        if (query != null) {
+            for (String kv : query.split("&")) {
+                if (kv.startsWith("since=")) {
+                    try {
+                        since = Long.parseLong(kv.substring(6));
+                    } catch (NumberFormatException e) {
+                        respond(ex, 400, "bad since: " + kv.substring(6));
+                        return;
+                    }
+                }
+            }
+        }
+        StringBuilder sb = new StringBuilder();
+        events.appendSince(since, sb);
+        ex.getResponseHeaders().add("X-Events-Last-Seq", Long.toString(events.lastSeq()));
+        respond(ex, 200, sb.toString(), "application/x-ndjson");
+    }
 
-    private static double applyPatchBytes(byte[] newBytes, String srcHint) throws Exception {
-        long startTime = System.nanoTime();
+    // ---- Core helpers ----
 
+    /**
+     * Parse the class file, check it is a compatible redefinition of the loaded
+     * target (same name, supertypes, fields and method signatures) and let the
+     * JVM format-check it by defining it in a throwaway loader.
+     */
+    private static void validatePatch(byte[] bytes) throws ClassNotFoundException {
+        ClassShape shape = ClassShape.parse(bytes);
+        String expected = TARGET_CLASS_NAME.replace('.', '/');
+        if (!expected.equals(shape.name)) {
+            throw new UnsupportedOperationException("patch defines " + shape.name + ", expected " + expected);
+        }
         Class<?> targetClass = findTargetClass();
-        System.out.println("[HotPatchAgent] Found target class: " + targetClass.getName());
+        byte[] active = currentBytes;
+        if (active == null) {
+            active = readClassBytes(targetClass.getClassLoader());
+        }
+        if (active == null) {
+            // Without the active bytes a staged patch could still be rejected at /activate
+            throw new IllegalStateException("active class bytes unavailable; cannot check compatibility");
+        }
+        List<String> problems = shape.incompatibilities(ClassShape.parse(active));
+        if (!problems.isEmpty()) {
+            throw new UnsupportedOperationException("not hot-swap compatible (fields and non-private methods must keep "
+                    + "their signatures; only private static/final methods may be added or removed): " + problems);
+        }
+        new ClassLoader(targetClass.getClassLoader()) {
+            { defineClass(TARGET_CLASS_NAME, bytes, 0, bytes.length); }
+        };
+    }
 
-        // Save current version for rollback
-        if (currentBytes != null) {
-            history.push(currentBytes);
+    /**
+     * Redefine the target with newBytes and record the operation as an event.
+     * Returns the agent-side latency (lookup + redefine + bookkeeping) in ms.
+     * Nothing is printed here so console I/O never lands in the timed region.
+     * Runs on the patch queue's writer thread.
+     */
+    private static double applyPatchBytes(byte[] newBytes, int opCode, String srcHint) throws Exception {
+        long wallMs = System.currentTimeMillis();
+        long t0 = System.nanoTime(), t1 = 0, t2;
+        try {
+            Class<?> targetClass = findTargetClass();
+            t1 = System.nanoTime();
+
+            // Apply new version
+            instrumentation.redefineClasses(new ClassDefinition(targetClass, newBytes));
+            t2 = System.nanoTime();
+
+            // Save previous version for rollback (only once the redefinition succeeded)
+            if (currentBytes != null) {
+                history.push(currentBytes);
+            }
+            currentBytes = newBytes;
+            historyDepth = history.size();
+        } catch (Throwable t) {
+            long now = System.nanoTime();
+            lastOpSeq = events.record(opCode, AgentEvents.ERROR, wallMs, (t1 == 0 ? now : t1) - t0, 0,
+                    t1 == 0 ? 0 : now - t1, 0, newBytes.length, history.size(), srcHint, String.valueOf(t));
+            throw t;
         }
-        // Apply new version
-        instrumentation.redefineClasses(new ClassDefinition(targetClass, newBytes));
-        currentBytes = newBytes;
+        long t3 = System.nanoTime();
+        lastOpSeq = events.record(opCode, AgentEvents.OK, wallMs, t1 - t0, 0, t2 - t1, t3 - t2,
+                newBytes.length, history.size(), srcHint, null);
+        return (t3 - t0) / 1_000_000.0;
+    }
 
-        long endTime = System.nanoTime();
-        double latencyMs = (endTime - startTime) / 1_000_000.0;
+    /** Redefine back to the top of history (writer thread). Throws NoHistoryException if empty. */
+    private static double rollbackOnce() throws Exception {
+        byte[] prev = history.peek();
+        if (prev == null) throw new NoHistoryException();
+        long wallMs = System.currentTimeMillis();
+        long t0 = System.nanoTime(), t1 = 0;
+        try {
+            Class<?> targetClass = findTargetClass();
+            t1 = System.nanoTime();
+            instrumentation.redefineClasses(new ClassDefinition(targetClass, prev));
+            long t2 = System.nanoTime();
 
-        System.out.println("[HotPatchAgent] ✓ Patch applied successfully!");
-        System.out.println("[HotPatchAgent] Latency: " + String.format("%.3f", latencyMs) + " ms");
-        System.out.println("[HotPatchAgent] Class redefined: " + TARGET_CLASS_NAME);
+            // Only drop the history entry once the redefinition succeeded
+            history.pop();
+            currentBytes = prev;
+            historyDepth = history.size();
+            long t3 = System.nanoTime();
 
-        return latencyMs;
+            lastOpSeq = events.record(AgentEvents.OP_ROLLBACK, AgentEvents.OK, wallMs, t1 - t0, 0, t2 - t1, t3 - t2,
+                    prev.length, history.size(), "history", null);
+            return (t3 - t0) / 1_000_000.0;
+        } catch (Throwable t) {
+            long now = System.nanoTime();
+            lastOpSeq = events.record(AgentEvents.OP_ROLLBACK, AgentEvents.ERROR, wallMs, (t1 == 0 ? now : t1) - t0, 0,
+                    t1 == 0 ? 0 : now - t1, 0, prev.length, history.size(), "history", String.valueOf(t));
+            throw t;
+        }
+    }
+
+    private static final class NoHistoryException extends Exception {
+        NoHistoryException() { super("no previous version to rollback to"); }
     }
 
     private static Class<?> findTargetClass() throws ClassNotFoundException {
@@ -160,18 +394,27 @@ public class HotPatchAgent {
     private static void tryInitBaselineBytes() {
         if (currentBytes != null) return;
         // Try to read the original bytes from the classpath resource
+        currentBytes = readClassBytes(HotPatchAgent.class.getClassLoader());
+    }
+
+    /** Target class file as a resource of loader, or null if it cannot be read. */
+    private static byte[] readClassBytes(ClassLoader loader) {
         String res = TARGET_CLASS_NAME.replace('.', '/') + ".class";
-        try (InputStream in = HotPatchAgent.class.getClassLoader().getResourceAsStream(res)) {
-            if (in != null) {
-                currentBytes = in.readAllBytes();
-                // No print needed; keep logs clean
-            }
-        } catch (IOException ignored) {}
+        if (loader == null) loader = ClassLoader.getSystemClassLoader();
+        try (InputStream in = loader.getResourceAsStream(res)) {
+            return in == null ? null : in.readAllBytes();
+        } catch (IOException ignored) {
+            return null;
+        }
     }
 
     private static void respond(HttpExchange ex, int code, String msg) throws IOException {
+        respond(ex, code, msg, "text/plain");
+    }
+
+    private static void respond(HttpExchange ex, int code, String msg, String contentType) throws IOException {
         byte[] out = msg.getBytes(StandardCharsets.UTF_8);
-        ex.getResponseHeaders().add("Content-Type", "text/plain; charset=utf-8");
+        ex.getResponseHeaders().add("Content-Type", contentType + "; charset=utf-8");
         ex.sendResponseHeaders(code, out.length);
         try (OutputStream os = ex.getResponseBody()) { os.write(out); }
     }
@@ -0,0 +1,173 @@
+package com.hotpatch.agent;
+
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.CompletableFuture;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.LinkedBlockingQueue;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.TimeoutException;
+
+/**
+ * Single-writer queue for operations that redefine the target class or touch
+ * the rollback history (patch, activate, rollback).
+ *
+ * HTTP handler threads submit a {@link Request} and block on {@link Request#await};
+ * one daemon thread ("hotpatch-writer") executes requests in arrival order, so
+ * history and currentBytes are only ever mutated from that thread.
+ *
+ * With coalescing on (-Dhotpatch.agent.coalesce=true), every run of consecutive
+ * pending patch/activate requests is collapsed to its newest one: only that one
+ * is redefined (one safepoint instead of N), and the superseded callers complete
+ * with its outcome. A rollback is a barrier; patches are never merged across it.
+ * The agent only redefines a single target class, so all patch/activate requests
+ * are for the same class.
+ *
+ * Every drained request is always completed, exceptionally if the writer fails
+ * while handling it, and callers wait at most the queue's timeout.
+ */
+final class PatchQueue {
+    /** Executes one request on the writer thread; returns the agent-side latency in ms. */
+    interface Worker {
+        double execute(Request r) throws Exception;
+
+        /** Called on the writer thread for each request collapsed into a newer one; failure is that one's. */
+        void superseded(Request r, Throwable failure);
+    }
+
+    static final class Request {
+        final int opCode;          // AgentEvents.OP_*
+        final byte[] bytes;        // null for rollback
+        final String source;
+        final long wallMs = System.currentTimeMillis();
+        private final long timeoutMs;
+        private final CompletableFuture<Double> done = new CompletableFuture<>();
+        volatile Request coalescedInto;  // set before completion when superseded
+
+        Request(int opCode, byte[] bytes, String source, long timeoutMs) {
+            this.opCode = opCode;
+            this.bytes = bytes;
+            this.source = source;
+            this.timeoutMs = timeoutMs;
+        }
+
+        boolean coalescable() {
+            return opCode == AgentEvents.OP_PATCH || opCode == AgentEvents.OP_ACTIVATE;
+        }
+
+        /**
+         * Latency of the redefinition that carried this request; rethrows its failure.
+         * Throws TimeoutException if there is no outcome within the queue's timeout
+         * (the request stays queued and may still be applied).
+         */
+        double await() throws Exception {
+            try {
+                return done.get(timeoutMs, TimeUnit.MILLISECONDS);
+            } catch (TimeoutException e) {
+                throw new TimeoutException("no outcome from the patch writer within " + timeoutMs
+                        + " ms; the operation may still be applied (see /events)");
+            } catch (ExecutionException e) {
+                Throwable cause = e.getCause();
+                if (cause instanceof Exception) throw (Exception) cause;
+                if (cause instanceof Error) throw (Error) cause;
+                throw e;
+            }
+        }
+    }
+
+    private final LinkedBlockingQueue<Request> pending = new LinkedBlockingQueue<>();
+    private final Worker worker;
+    private final boolean coalesce;
+    private final long timeoutMs;
+    private Thread writer;
+
+    PatchQueue(Worker worker, boolean coalesce, long timeoutMs) {
+        this.worker = worker;
+        this.coalesce = coalesce;
+        this.timeoutMs = timeoutMs;
+    }
+
+    boolean coalescing() {
+        return coalesce;
+    }
+
+    Request submit(int opCode, byte[] bytes, String source) {
+        Request r = new Request(opCode, bytes, source, timeoutMs);
+        ensureStarted();
+        pending.add(r);
+        return r;
+    }
+
+    private synchronized void ensureStarted() {
+        if (writer != null && writer.isAlive()) return;
+        if (writer != null) {
+            System.err.println("[HotPatchAgent] Patch writer thread died; restarting it");
+        }
+        writer = new Thread(this::run, "hotpatch-writer");
+        writer.setDaemon(true);
+        writer.start();
+    }
+
+    private void run() {
+        List<Request> batch = new ArrayList<>();
+        while (true) {
+            try {
+                batch.add(pending.take());
+            } catch (InterruptedException e) {
+                return;
+            }
+            pending.drainTo(batch);
+            try {
+                process(batch);
+            } catch (Throwable t) {
+                System.err.println("[HotPatchAgent] Patch writer failed: " + t);
+                t.printStackTrace();
+            } finally {
+                // Nobody waits forever: anything still unanswered fails instead
+                for (Request r : batch) {
+                    if (!r.done.isDone()) {
+                        r.done.completeExceptionally(new IllegalStateException("patch writer failed before answering"));
+                    }
+                }
+                batch.clear();
+            }
+        }
+    }
+
+    private void process(List<Request> batch) {
+        int i = 0;
+        while (i < batch.size()) {
+            int last = i;
+            if (coalesce && batch.get(i).coalescable()) {
+                while (last + 1 < batch.size() && batch.get(last + 1).coalescable()) last++;
+            }
+            Request winner = batch.get(last);
+            double latencyMs = 0;
+            Throwable failure = null;
+            try {
+                latencyMs = worker.execute(winner);
+            } catch (Throwable t) {
+                failure = t;
+            }
+            for (int k = i; k < last; k++) {
+                Request r = batch.get(k);
+                r.coalescedInto = winner;
+                try {
+                    worker.superseded(r, failure);
+                } catch (Throwable t) {
+                    // event bookkeeping must not cost the caller its answer
+                    System.err.println("[HotPatchAgent] Recording a coalesced patch failed: " + t);
+                } finally {
+                    complete(r, latencyMs, failure);
+                }
+            }
+            complete(winner, latencyMs, failure);
+            i = last + 1;
+        }
+    }
+
+    private static void complete(Request r, double latencyMs, Throwable failure) {
+        if (failure == null) r.done.complete(latencyMs);
+        else r.done.completeExceptionally(failure);
+    }
+}
@@ -0,0 +1,163 @@
+package com.hotpatch.agent;
+
+import java.io.InputStream;
+import java.lang.instrument.ClassDefinition;
+import java.lang.instrument.Instrumentation;
+import java.lang.reflect.Method;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.CountDownLatch;
+
+/**
+ * In-JVM redefinition microbenchmark: times Instrumentation.redefineClasses alone,
+ * with no HTTP, target lookup, logging or history bookkeeping in the timed region.
+ * JMH-style: warm-up iterations are discarded, results are consumed by a blackhole,
+ * and forks are handled by the driver (redefine-microbench.py) launching fresh JVMs.
+ *
+ * Run with the agent pre-loaded so Instrumentation is available:
+ *   java -javaagent:target/hotpatch-agent.jar -Dhotpatch.agent.http=false \
+ *        -cp target/classes com.hotpatch.agent.RedefineBench \
+ *        [--patches target/classes-patched] [--versions v1,v2] [--warmup 20] [--iterations 100] [--threads 0]
+ *        [--instances 0] [--frames 0] [--frame-depth 16]
+ *
+ * --instances keeps that many live instances of the target reachable; --frames parks
+ * threads inside the target's park(CountDownLatch, int) method (only present in the
+ * synthetic classes from synthetic-patches.py), --frame-depth frames per thread.
+ *
+ * Each measured iteration first restores the baseline class (untimed), then times
+ * the redefinition to the version. Output: "RESULT <version> <iteration> <nanos>".
+ */
+public class RedefineBench {
+    private static final String TARGET_CLASS_NAME = "com.hotpatch.demo.BusinessRules";
+
+    // Blackhole: results are folded in here so calls cannot be optimised away
+    private static volatile double sink;
+    private static volatile boolean running = true;
+    private static Object[] liveInstances;
+
+    public static void main(String[] args) throws Exception {
+        String patchesDir = "target/classes-patched";
+        String[] versions = {"v1", "v2", "v3", "v4", "v5", "v6", "v7", "v8", "v9", "v10", "v11"};
+        int warmup = 20, iterations = 100, threads = 0;
+        int instances = 0, frames = 0, frameDepth = 16;
+        for (int i = 0; i + 1 < args.length; i += 2) {
+            switch (args[i]) {
+                case "--patches": patchesDir = args[i + 1]; break;
+                case "--versions": versions = args[i + 1].split(","); break;
+                case "--warmup": warmup = Integer.parseInt(args[i + 1]); break;
+                case "--iterations": iterations = Integer.parseInt(args[i + 1]); break;
+                case "--threads": threads = Integer.parseInt(args[i + 1]); break;
+                case "--instances": instances = Integer.parseInt(args[i + 1]); break;
+                case "--frames": frames = Integer.parseInt(args[i + 1]); break;
+                case "--frame-depth": frameDepth = Math.max(1, Integer.parseInt(args[i + 1])); break;
+                default: throw new IllegalArgumentException("unknown option " + args[i]);
+            }
+        }
+
+        Instrumentation inst = HotPatchAgent.getInstrumentation();
+        if (inst == null) {
+            System.err.println("[RedefineBench] No Instrumentation: run with -javaagent:target/hotpatch-agent.jar");
+            System.exit(1);
+        }
+
+        Class<?> target = Class.forName(TARGET_CLASS_NAME);
+        Object rules = target.getDeclaredConstructor().newInstance();
+        Method calc = target.getMethod("calculateDiscount", double.class);
+
+        ClassDefinition baseline = new ClassDefinition(target, readBaseline(target));
+        List<String> names = new ArrayList<>();
+        List<ClassDefinition> defs = new ArrayList<>();
+        for (String v : versions) {
+            Path p = Path.of(patchesDir, v, TARGET_CLASS_NAME.replace('.', '/') + ".class");
+            names.add(v);
+            defs.add(new ClassDefinition(target, Files.readAllBytes(p)));
+        }
+
+        // Background threads keep executing the target so redefinition has to reach
+        // a safepoint with live frames, as it would under load.
+        List<Thread> workers = new ArrayList<>();
+        for (int t = 0; t < threads; t++) {
+            final double amount = 50 + t * 37;
+            Thread w = new Thread(() -> {
+                double acc = 0;
+                try {
+                    while (running) acc += (double) calc.invoke(rules, amount);
+                } catch (ReflectiveOperationException e) {
+                    throw new RuntimeException(e);
+                }
+                sink += acc;
+            }, "redefine-bench-worker-" + t);
+            w.setDaemon(true);
+            w.start();
+            workers.add(w);
+        }
+
+        liveInstances = new Object[instances];
+        for (int i = 0; i < instances; i++) liveInstances[i] = target.getDeclaredConstructor().newInstance();
+
+        CountDownLatch release = new CountDownLatch(1);
+        List<Thread> parked = new ArrayList<>();
+        if (frames > 0) {
+            Method park = target.getMethod("park", CountDownLatch.class, int.class);
+            CountDownLatch entered = new CountDownLatch((frames + frameDepth - 1) / frameDepth);
+            for (int left = frames, t = 0; left > 0; left -= frameDepth, t++) {
+                final int depth = Math.min(left, frameDepth);
+                Thread p = new Thread(() -> {
+                    entered.countDown();
+                    try {
+                        park.invoke(rules, release, depth);
+                    } catch (ReflectiveOperationException e) {
+                        throw new RuntimeException(e);
+                    }
+                }, "redefine-bench-parked-" + t);
+                p.setDaemon(true);
+                p.start();
+                parked.add(p);
+            }
+            entered.await();
+            Thread.sleep(100); // let the last threads reach the latch
+        }
+
+        System.out.println("CONFIG threads=" + threads + " instances=" + instances + " frames=" + frames + " warmup=" + warmup + " iterations=" + iterations
+                + " maxHeapMB=" + (Runtime.getRuntime().maxMemory() >> 20));
+        long[] samples = new long[iterations];
+        for (int d = 0; d < defs.size(); d++) {
+            ClassDefinition[] toBase = {baseline};
+            ClassDefinition[] toVersion = {defs.get(d)};
+
+            for (int i = 0; i < warmup; i++) {
+                inst.redefineClasses(toBase);
+                inst.redefineClasses(toVersion);
+                sink += (double) calc.invoke(rules, 150.0);
+            }
+            for (int i = 0; i < iterations; i++) {
+                inst.redefineClasses(toBase);
+                sink += (double) calc.invoke(rules, 150.0);
+                long t0 = System.nanoTime();
+                inst.redefineClasses(toVersion);
+                long t1 = System.nanoTime();
+                samples[i] = t1 - t0;
+                sink += (double) calc.invoke(rules, 150.0);
+            }
+            for (int i = 0; i < iterations; i++) {
+                System.out.println("RESULT " + names.get(d) + " " + i + " " + samples[i]);
+            }
+        }
+
+        running = false;
+        release.countDown();
+        for (Thread w : workers) w.join(1000);
+        for (Thread p : parked) p.join(1000);
+        System.out.println("DONE sink=" + sink);
+    }
+
+    private static byte[] readBaseline(Class<?> target) throws Exception {
+        String res = TARGET_CLASS_NAME.replace('.', '/') + ".class";
+        try (InputStream in = target.getClassLoader().getResourceAsStream(res)) {
+            if (in == null) throw new IllegalStateException("baseline class bytes not found: " + res);
+            return in.readAllBytes();
+        }
+    }
+}
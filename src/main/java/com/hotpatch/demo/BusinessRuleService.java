@@ -5,8 +5,18 @@ import com.sun.net.httpserver.HttpHandler;
 import com.sun.net.httpserver.HttpExchange;
 import java.io.IOException;
 import java.io.OutputStream;
+import java.lang.management.ManagementFactory;
 import java.net.InetSocketAddress;
+import java.nio.charset.StandardCharsets;
+import java.util.LinkedHashMap;
+import java.util.Map;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.Executor;
+import java.util.concurrent.Executors;
+import java.util.concurrent.ThreadFactory;
+import java.util.concurrent.atomic.AtomicInteger;
 import java.util.concurrent.atomic.AtomicLong;
+import java.util.concurrent.atomic.LongAdder;
 
 /**
  * Main business service with rules that can be hot-patched
@@ -14,24 +24,32 @@ import java.util.concurrent.atomic.AtomicLong;
 public class BusinessRuleService {
     private static final AtomicLong requestCount = new AtomicLong(0);
     private static volatile String currentVersion = "v1.0";
+    private static final int PORT = Integer.getInteger("hotpatch.service.port", 8080);
+    private static final long START_NANOS = System.nanoTime();
+    // Request executor: default (HttpServer dispatcher thread) | fixed:N | cached
+    private static final String EXECUTOR = System.getProperty("hotpatch.service.executor", "default");
+
+    // Server-side instrumentation (exposed on /api/metrics)
+    private static final Map<String, LatencyHistogram> histograms = new LinkedHashMap<>();
+    private static final ConcurrentHashMap<String, LongAdder> requestsByVersion = new ConcurrentHashMap<>();
     
     public static void main(String[] args) throws IOException {
-        HttpServer server = HttpServer.create(new InetSocketAddress(8080), 0);
+        HttpServer server = HttpServer.create(new InetSocketAddress(PORT), 0);
         
         // Business rule endpoint
-        server.createContext("/api/discount", new DiscountHandler());
+        server.createContext("/api/discount", timed("discount", new DiscountHandler()));
         
         // Health check endpoint
-        server.createContext("/api/health", exchange -> {
+        server.createContext("/api/health", timed("health", exchange -> {
             String response = "OK - Version: " + currentVersion;
             exchange.sendResponseHeaders(200, response.length());
             OutputStream os = exchange.getResponseBody();
             os.write(response.getBytes());
             os.close();
-        });
+        }));
         
         // Verification endpoint
-        server.createContext("/api/verify", exchange -> {
+        server.createContext("/api/verify", timed("verify", exchange -> {
             BusinessRules rules = new BusinessRules();
             double testDiscount = rules.calculateDiscount(150.0);
             String version = rules.getRuleVersion();
@@ -45,15 +63,78 @@ public class BusinessRuleService {
             OutputStream os = exchange.getResponseBody();
             os.write(response.getBytes());
             os.close();
+        }));
+        
+        // Metrics endpoint (not timed itself, so scraping does not show up in the histograms)
+        server.createContext("/api/metrics", exchange -> {
+            byte[] response = metricsJson().getBytes(StandardCharsets.UTF_8);
+            exchange.getResponseHeaders().add("Content-Type", "application/json");
+            exchange.sendResponseHeaders(200, response.length);
+            OutputStream os = exchange.getResponseBody();
+            os.write(response);
+            os.close();
         });
         
-        server.setExecutor(null);
+        server.setExecutor(createExecutor(EXECUTOR));
         server.start();
-        System.out.println("Business Rule Service started on port 8080");
+        System.out.println("Business Rule Service started on port " + PORT + " (executor: " + EXECUTOR + ")");
         System.out.println("Endpoints:");
-        System.out.println("  - http://localhost:8080/api/discount?amount=100");
-        System.out.println("  - http://localhost:8080/api/health");
-        System.out.println("  - http://localhost:8080/api/verify");
+        System.out.println("  - http://localhost:" + PORT + "/api/discount?amount=100");
+        System.out.println("  - http://localhost:" + PORT + "/api/health");
+        System.out.println("  - http://localhost:" + PORT + "/api/verify");
+        System.out.println("  - http://localhost:" + PORT + "/api/metrics");
+    }
+    
+    /** Executor for -Dhotpatch.service.executor; null keeps HttpServer's single dispatcher thread. */
+    private static Executor createExecutor(String spec) {
+        AtomicInteger seq = new AtomicInteger();
+        ThreadFactory named = r -> new Thread(r, "service-worker-" + seq.incrementAndGet());
+        if (spec.equals("default")) return null;
+        if (spec.equals("cached")) return Executors.newCachedThreadPool(named);
+        if (spec.startsWith("fixed:")) return Executors.newFixedThreadPool(Integer.parseInt(spec.substring(6)), named);
+        throw new IllegalArgumentException("Unknown hotpatch.service.executor: " + spec + " (default|fixed:N|cached)");
+    }
+    
+    /** Wraps a handler so its service time lands in the endpoint's histogram. */
+    private static HttpHandler timed(String endpoint, HttpHandler handler) {
+        LatencyHistogram histogram = new LatencyHistogram();
+        histograms.put(endpoint, histogram);
+        return exchange -> {
+            long start = System.nanoTime();
+            try {
+                handler.handle(exchange);
+            } finally {
+                histogram.record((System.nanoTime() - start) / 1_000);
+            }
+        };
+    }
+    
+    private static String metricsJson() {
+        StringBuilder sb = new StringBuilder(1024);
+        sb.append("{\"uptime_ms\":").append((System.nanoTime() - START_NANOS) / 1_000_000)
+          .append(",\"vm_start_ms\":").append(ManagementFactory.getRuntimeMXBean().getStartTime())
+          .append(",\"rule_version\":").append(jsonString(new BusinessRules().getRuleVersion()))
+          .append(",\"requests_total\":").append(requestCount.get())
+          .append(",\"requests_by_version\":{");
+        boolean first = true;
+        for (Map.Entry<String, LongAdder> e : requestsByVersion.entrySet()) {
+            if (!first) sb.append(',');
+            sb.append(jsonString(e.getKey())).append(':').append(e.getValue().sum());
+            first = false;
+        }
+        sb.append("},\"endpoints\":{");
+        first = true;
+        for (Map.Entry<String, LatencyHistogram> e : histograms.entrySet()) {
+            if (!first) sb.append(',');
+            sb.append(jsonString(e.getKey())).append(':');
+            e.getValue().appendJson(sb);
+            first = false;
+        }
+        return sb.append("}}").toString();
+    }
+    
+    private static String jsonString(String s) {
+        return "\"" + s.replace("\\", "\\\\").replace("\"", "\\\"") + "\"";
     }
     
     static class DiscountHandler implements HttpHandler {
@@ -74,10 +155,12 @@ public class BusinessRuleService {
             
             BusinessRules rules = new BusinessRules();
             double discount = rules.calculateDiscount(amount);
+            String version = rules.getRuleVersion();
+            requestsByVersion.computeIfAbsent(version, v -> new LongAdder()).increment();
             
             String response = String.format(
                 "Amount: $%.2f\nDiscount: %.2f%%\nRule Version: %s",
-                amount, discount, rules.getRuleVersion()
+                amount, discount, version
             );
             
             exchange.sendResponseHeaders(200, response.length());
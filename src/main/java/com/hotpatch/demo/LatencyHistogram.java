@@ -0,0 +1,68 @@
+package com.hotpatch.demo;
+
+import java.util.concurrent.atomic.AtomicLong;
+import java.util.concurrent.atomic.AtomicLongArray;
+import java.util.concurrent.atomic.LongAdder;
+
+/**
+ * Lock-free log-linear latency histogram with microsecond resolution.
+ * Values below 16 us get exact buckets; above that every power of two is
+ * split into 16 linear sub-buckets (worst-case relative error ~6%).
+ * Counts are cumulative; scrapers diff successive snapshots.
+ */
+public class LatencyHistogram {
+    private static final int SUB_BITS = 4;
+    private static final int SUB_COUNT = 1 << SUB_BITS;
+    private static final int BUCKETS = (64 - SUB_BITS) * SUB_COUNT;
+
+    private final AtomicLongArray counts = new AtomicLongArray(BUCKETS);
+    private final LongAdder total = new LongAdder();
+    private final LongAdder sumMicros = new LongAdder();
+    private final AtomicLong maxMicros = new AtomicLong();
+
+    public void record(long micros) {
+        if (micros < 0) micros = 0;
+        counts.incrementAndGet(bucketIndex(micros));
+        total.increment();
+        sumMicros.add(micros);
+        long max = maxMicros.get();
+        while (micros > max && !maxMicros.compareAndSet(max, micros)) {
+            max = maxMicros.get();
+        }
+    }
+
+    static int bucketIndex(long v) {
+        if (v < SUB_COUNT) return (int) v;
+        int msb = 63 - Long.numberOfLeadingZeros(v);
+        int shift = msb - SUB_BITS;
+        return (shift + 1) * SUB_COUNT + (int) ((v >>> shift) & (SUB_COUNT - 1));
+    }
+
+    static long bucketLow(int idx) {
+        if (idx < SUB_COUNT) return idx;
+        int shift = idx / SUB_COUNT - 1;
+        return (long) (SUB_COUNT + idx % SUB_COUNT) << shift;
+    }
+
+    static long bucketHigh(int idx) {
+        if (idx < SUB_COUNT) return idx + 1;
+        return bucketLow(idx) + (1L << (idx / SUB_COUNT - 1));
+    }
+
+    /** {"count":N,"sum_us":S,"max_us":M,"buckets":[[lo,hi,count],...]} with non-empty buckets only. */
+    public void appendJson(StringBuilder sb) {
+        sb.append("{\"count\":").append(total.sum())
+          .append(",\"sum_us\":").append(sumMicros.sum())
+          .append(",\"max_us\":").append(maxMicros.get())
+          .append(",\"buckets\":[");
+        boolean first = true;
+        for (int i = 0; i < BUCKETS; i++) {
+            long c = counts.get(i);
+            if (c == 0) continue;
+            if (!first) sb.append(',');
+            sb.append('[').append(bucketLow(i)).append(',').append(bucketHigh(i)).append(',').append(c).append(']');
+            first = false;
+        }
+        sb.append("]}");
+    }
+}
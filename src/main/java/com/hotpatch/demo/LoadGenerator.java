@@ -4,6 +4,7 @@ import java.net.HttpURLConnection;
 import java.net.URL;
 import java.io.BufferedReader;
 import java.io.InputStreamReader;
+import java.nio.file.Path;
 import java.util.Random;
 import java.util.concurrent.ExecutorService;
 import java.util.concurrent.Executors;
@@ -14,11 +15,16 @@ import java.util.concurrent.atomic.AtomicLong;
  * Load generator to simulate production traffic
  */
 public class LoadGenerator {
-    private static final String BASE_URL = "http://localhost:8080/api/discount";
+    private static final String BASE_URL =
+        "http://localhost:" + Integer.getInteger("hotpatch.service.port", 8080) + "/api/discount";
     private static final AtomicLong totalRequests = new AtomicLong(0);
     private static final AtomicLong successfulRequests = new AtomicLong(0);
     private static final AtomicLong failedRequests = new AtomicLong(0);
     private static volatile boolean running = true;
+
+    // Optional binary per-request log: -Dhotpatch.reqlog=<file> [-Dhotpatch.reqlog.cell=<id>]
+    private static final int CELL_ID = Integer.getInteger("hotpatch.reqlog.cell", 0);
+    private static RequestLog requestLog;
     
     public static void main(String[] args) throws InterruptedException {
         int threadCount = 5; // Number of concurrent clients
@@ -35,6 +41,16 @@ public class LoadGenerator {
         System.out.println("Threads: " + threadCount);
         System.out.println("Target RPS: " + requestsPerSecond);
         System.out.println("Press Ctrl+C to stop");
+        
+        String logPath = System.getProperty("hotpatch.reqlog");
+        if (logPath != null && !logPath.isEmpty()) {
+            try {
+                requestLog = new RequestLog(Path.of(logPath), CELL_ID);
+                System.out.println("Request log: " + logPath + " (cell " + CELL_ID + ")");
+            } catch (java.io.IOException e) {
+                System.err.println("Cannot open request log " + logPath + ": " + e);
+            }
+        }
         System.out.println();
         
         // Add shutdown hook
@@ -42,6 +58,9 @@ public class LoadGenerator {
             running = false;
             System.out.println("\n=== Final Statistics ===");
             printStats();
+            if (requestLog != null) {
+                try { requestLog.close(); } catch (java.io.IOException ignored) {}
+            }
         }));
         
         ExecutorService executor = Executors.newFixedThreadPool(threadCount);
@@ -55,6 +74,7 @@ public class LoadGenerator {
                 try {
                     Thread.sleep(5000);
                     printStats();
+                    if (requestLog != null) requestLog.flush();
                 } catch (InterruptedException e) {
                     break;
                 }
@@ -74,6 +94,7 @@ public class LoadGenerator {
     }
     
     private static void makeRequest(Random random) {
+        long start = System.nanoTime();
         try {
             double amount = 50 + random.nextDouble() * 550; // $50-$600
             URL url = new URL(BASE_URL + "?amount=" + String.format("%.2f", amount));
@@ -84,12 +105,17 @@ public class LoadGenerator {
             conn.setReadTimeout(2000);
             
             int responseCode = conn.getResponseCode();
+            String ruleVersion = null;
             
             if (responseCode == 200) {
                 BufferedReader in = new BufferedReader(
                     new InputStreamReader(conn.getInputStream())
                 );
-                in.lines().forEach(line -> {}); // Consume response
+                // Consume response, keeping the version that served it
+                String line;
+                while ((line = in.readLine()) != null) {
+                    if (line.startsWith("Rule Version: ")) ruleVersion = line.substring(14).trim();
+                }
                 in.close();
                 successfulRequests.incrementAndGet();
             } else {
@@ -98,10 +124,12 @@ public class LoadGenerator {
             
             totalRequests.incrementAndGet();
             conn.disconnect();
+            if (requestLog != null) requestLog.record(System.nanoTime() - start, responseCode, ruleVersion, CELL_ID);
             
         } catch (Exception e) {
             failedRequests.incrementAndGet();
             totalRequests.incrementAndGet();
+            if (requestLog != null) requestLog.record(System.nanoTime() - start, 0, null, CELL_ID);
         }
     }
     
@@ -0,0 +1,122 @@
+package com.hotpatch.demo;
+
+import java.io.Closeable;
+import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.channels.FileChannel;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Path;
+import java.nio.file.StandardOpenOption;
+import java.util.ArrayList;
+import java.util.List;
+
+/**
+ * Compact binary per-request log (read back with reqlog.py).
+ *
+ * Layout, little-endian:
+ *   header (1024 bytes)
+ *     0  char[4] magic "HPRL"       4  u16 format version (1)    6  u16 record size (24)
+ *     8  u32 header size (1024)    12  u16 version slots used    14  u16 slot size (32)
+ *    16  i64 start epoch ns        24  u32 default cell id       28..63 reserved
+ *    64  30 x 32-byte UTF-8 rule-version names, NUL padded (slot i = version id i+1)
+ *   records (24 bytes each, appended in completion order so t_ns is non-decreasing)
+ *     0  i64 t_ns  completion time, epoch ns (start = t_ns - latency_us * 1000)
+ *     8  u32 latency_us    12 u16 HTTP status (0 = transport error)
+ *    14  u16 rule version id (0 = unknown)    16 u32 load cell id
+ *    20  u16 client thread id                 22 u16 padding
+ */
+public final class RequestLog implements Closeable {
+    public static final int HEADER_SIZE = 1024;
+    public static final int RECORD_SIZE = 24;
+    private static final int VERSION_SLOTS = 30;
+    private static final int SLOT_SIZE = 32;
+    private static final int SLOTS_OFFSET = 64;
+
+    private final FileChannel channel;
+    private final ByteBuffer buffer = ByteBuffer.allocateDirect(RECORD_SIZE * 4096).order(ByteOrder.LITTLE_ENDIAN);
+    private final long startEpochNanos;
+    private final long startNanos;
+    private final List<String> versions = new ArrayList<>();
+    private boolean closed = false;
+
+    public RequestLog(Path path, int cellId) throws IOException {
+        channel = FileChannel.open(path, StandardOpenOption.CREATE, StandardOpenOption.WRITE,
+                StandardOpenOption.TRUNCATE_EXISTING);
+        startNanos = System.nanoTime();
+        startEpochNanos = System.currentTimeMillis() * 1_000_000L;
+
+        ByteBuffer header = ByteBuffer.allocate(HEADER_SIZE).order(ByteOrder.LITTLE_ENDIAN);
+        header.put("HPRL".getBytes(StandardCharsets.US_ASCII))
+              .putShort((short) 1)
+              .putShort((short) RECORD_SIZE)
+              .putInt(HEADER_SIZE)
+              .putShort((short) 0)
+              .putShort((short) SLOT_SIZE)
+              .putLong(startEpochNanos)
+              .putInt(cellId);
+        header.clear();
+        writeFully(header, 0);
+        channel.position(HEADER_SIZE);
+    }
+
+    public synchronized void record(long latencyNanos, int status, String ruleVersion, int cellId) {
+        if (closed) return;
+        if (!buffer.hasRemaining()) flushBuffer();
+        long tNanos = startEpochNanos + (System.nanoTime() - startNanos);
+        buffer.putLong(tNanos)
+              .putInt((int) Math.min(latencyNanos / 1_000, 0xFFFFFFFFL))
+              .putShort((short) status)
+              .putShort((short) versionId(ruleVersion))
+              .putInt(cellId)
+              .putShort((short) Thread.currentThread().getId())
+              .putShort((short) 0);
+    }
+
+    public synchronized void flush() {
+        if (!closed) flushBuffer();
+    }
+
+    @Override
+    public synchronized void close() throws IOException {
+        if (closed) return;
+        flushBuffer();
+        closed = true;
+        channel.close();
+    }
+
+    /** 1-based slot of the version name, registering it in the header on first sight; 0 if unknown/full. */
+    private int versionId(String version) {
+        if (version == null) return 0;
+        int idx = versions.indexOf(version);
+        if (idx >= 0) return idx + 1;
+        if (versions.size() >= VERSION_SLOTS) return 0;
+        versions.add(version);
+        byte[] name = version.getBytes(StandardCharsets.UTF_8);
+        ByteBuffer slot = ByteBuffer.allocate(SLOT_SIZE);
+        slot.put(name, 0, Math.min(name.length, SLOT_SIZE - 1));
+        slot.clear();
+        ByteBuffer count = ByteBuffer.allocate(2).order(ByteOrder.LITTLE_ENDIAN).putShort(0, (short) versions.size());
+        try {
+            writeFully(slot, SLOTS_OFFSET + (long) (versions.size() - 1) * SLOT_SIZE);
+            writeFully(count, 12);
+        } catch (IOException e) {
+            System.err.println("[RequestLog] Failed to write version slot: " + e);
+        }
+        return versions.size();
+    }
+
+    private void flushBuffer() {
+        buffer.flip();
+        try {
+            while (buffer.hasRemaining()) channel.write(buffer);
+        } catch (IOException e) {
+            System.err.println("[RequestLog] Write failed: " + e);
+        }
+        buffer.clear();
+    }
+
+    private void writeFully(ByteBuffer src, long position) throws IOException {
+        while (src.hasRemaining()) position += channel.write(src, position);
+    }
+}
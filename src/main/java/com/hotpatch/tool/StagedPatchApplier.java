@@ -0,0 +1,68 @@
+package com.hotpatch.tool;
+
+import java.net.URI;
+import java.net.http.HttpClient;
+import java.net.http.HttpRequest;
+import java.net.http.HttpResponse;
+import java.nio.file.Files;
+import java.nio.file.Path;
+
+/**
+ * StagedPatchApplier: two-phase patching against the agent's HTTP control channel.
+ *
+ * Usage:
+ *   java com.hotpatch.tool.StagedPatchApplier stage <classFilePath> [http://127.0.0.1:8088]
+ *   java com.hotpatch.tool.StagedPatchApplier activate <stagedId> [http://127.0.0.1:8088]
+ */
+public class StagedPatchApplier {
+
+    public static void main(String[] args) {
+        if (args.length < 2 || !("stage".equals(args[0]) || "activate".equals(args[0]))) {
+            System.out.println("Usage: java com.hotpatch.tool.StagedPatchApplier stage <classFilePath> [agentBase]");
+            System.out.println("       java com.hotpatch.tool.StagedPatchApplier activate <stagedId> [agentBase]");
+            System.out.println("Default agentBase: http://127.0.0.1:8088");
+            System.exit(1);
+        }
+
+        String mode = args[0];
+        String base = (args.length >= 3) ? args[2] : "http://127.0.0.1:8088";
+
+        try {
+            HttpRequest req;
+            if ("stage".equals(mode)) {
+                byte[] bytes = Files.readAllBytes(Path.of(args[1]));
+                req = HttpRequest.newBuilder(URI.create(base + "/stage"))
+                        .header("Content-Type", "application/octet-stream")
+                        .POST(HttpRequest.BodyPublishers.ofByteArray(bytes))
+                        .build();
+            } else {
+                req = HttpRequest.newBuilder(URI.create(base + "/activate?id=" + args[1]))
+                        .POST(HttpRequest.BodyPublishers.noBody())
+                        .build();
+            }
+
+            HttpClient client = HttpClient.newHttpClient();
+            long t0 = System.nanoTime();
+            HttpResponse<String> resp = client.send(req, HttpResponse.BodyHandlers.ofString());
+            long t1 = System.nanoTime();
+
+            double totalMs = (t1 - t0) / 1_000_000.0;
+
+            System.out.println("HTTP " + resp.statusCode() + " from agent: " + resp.body());
+            System.out.println(String.format("Request→response latency: %.3f ms", totalMs));
+
+            // stage replies "STAGED <id> <ms> ms", activate replies "OK <ms> ms"
+            String[] parts = resp.body().trim().split("\\s+");
+            if ("stage".equals(mode) && parts.length >= 3 && "STAGED".equals(parts[0])) {
+                System.out.println(String.format("METRIC client_ms=%.3f agent_ms=%s id=%s", totalMs, parts[2], parts[1]));
+            } else {
+                System.out.println(String.format("METRIC client_ms=%.3f agent_ms=%s", totalMs, resp.body().replace("OK","").replace("ms","").trim()));
+            }
+
+            if (resp.statusCode() != 200) System.exit(2);
+        } catch (Exception e) {
+            e.printStackTrace();
+            System.exit(1);
+        }
+    }
+}
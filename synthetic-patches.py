@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Synthetic patch sweep: how does redefinition cost scale with class shape?
+
+The hand-written BusinessRules-patched-v1..v11 only cover a few class sizes.
+This script generates hot-swap-legal pairs of BusinessRules (a base that is
+loaded and a variant with the same fields/methods but different bodies and
+constants) along one dimension at a time, compiles them, and times the
+base -> variant redefinition in-process with RedefineBench:
+
+  bytecode   N filler statements in pad()            (code bytes)
+  constants  N distinct string literals in constants() (constant-pool entries)
+  methods    N extra small methods                     (method count)
+  instances  N live instances of the class             (runtime, baseline shape)
+  frames     N stack frames parked inside park()       (runtime, baseline shape)
+
+Each point's shape is measured from the compiled variant class file. Per
+dimension a linear fit of median latency against that measure is made, plus
+one multivariate least-squares model over all points that --predict uses to
+estimate the cost of a real patch before shipping it.
+
+Outputs:
+  results/synthetic_sweep.csv   one row per point (shape + p50/mean/p99 ms)
+  results/synthetic_fit.csv     model,term,coefficient (per-dimension + multivariate)
+  Figure 9 in generate-plots.py plots both.
+
+Usage:
+  python3 synthetic-patches.py                      # generate, build, run, fit
+  python3 synthetic-patches.py --steps fit          # refit an existing sweep
+  python3 synthetic-patches.py --predict target/classes-patched/v11/com/hotpatch/demo/BusinessRules.class
+"""
+
+import argparse
+import csv
+import os
+import shutil
+import struct
+import subprocess
+
+import benchutil as bu
+
+SRC_DIR = "target/synthetic-src"
+OUT_DIR = "target/synthetic"
+
+DIMENSIONS = {
+    "bytecode": [0, 500, 1500, 3000, 6000],
+    "constants": [0, 1000, 2500, 5000, 7500],
+    "methods": [0, 50, 200, 500, 1000],
+    "instances": [0, 1000, 100000, 1000000],
+    "frames": [0, 16, 128, 512],
+}
+RUNTIME_DIMENSIONS = ("instances", "frames")
+
+# Measured feature for each dimension (x axis of its fit)
+FEATURE = {
+    "bytecode": "code_bytes",
+    "constants": "cp_entries",
+    "methods": "methods",
+    "instances": "instances",
+    "frames": "frames",
+}
+MULTI_TERMS = ["code_bytes", "cp_entries", "methods", "instances", "frames"]
+
+SWEEP_HEADER = ["point", "dimension", "value", "class_bytes", "cp_entries", "methods", "code_bytes",
+                "instances", "frames", "n", "p50_ms", "mean_ms", "p99_ms"]
+
+
+# ---------------------------------------------------------------------------
+# Source generation
+# ---------------------------------------------------------------------------
+
+def render(point, role, bytecode=0, constants=0, methods=0):
+    """Java source for one side of a pair; role 'base' or 'variant' only changes bodies/constants."""
+    salt = 7 if role == "base" else 13
+    prefix = "b" if role == "base" else "r"
+    threshold, pct = (100, 10.0) if role == "base" else (150, 12.5)
+    lines = [
+        "package com.hotpatch.demo;",
+        "",
+        "/**",
+        f" * Synthetic BusinessRules ({point}, {role}) - generated by synthetic-patches.py",
+        " */",
+        "public class BusinessRules {",
+        "",
+        "    public double calculateDiscount(double amount) {",
+        f"        if (amount > {threshold}) {{",
+        f"            return {pct};",
+        "        }",
+        "        return 0.0;",
+        "    }",
+        "",
+        "    public String getRuleVersion() {",
+        f'        return "synthetic-{point}-{role}";',
+        "    }",
+        "",
+        "    public int park(java.util.concurrent.CountDownLatch latch, int depth) throws InterruptedException {",
+        "        if (depth <= 1) {",
+        "            latch.await();",
+        f"            return {salt};",
+        "        }",
+        "        return park(latch, depth - 1) + 1;",
+        "    }",
+        "",
+        "    public int pad(int acc) {",
+    ]
+    lines += [f"        acc = acc * 31 + {(i * salt) % 30000};" for i in range(bytecode)]
+    lines += ["        return acc;", "    }", "", "    public String[] constants() {", "        return new String[] {"]
+    lines += [f'            "{prefix}{i}",' for i in range(constants)]
+    lines += ["        };", "    }"]
+    for i in range(methods):
+        lines += ["", f"    public int m{i}(int x) {{", f"        return x + {(i * salt) % 30000};", "    }"]
+    lines += ["}", ""]
+    return "\n".join(lines)
+
+
+def points():
+    """(point, dimension, value, shape kwargs, runtime kwargs) for every sweep point."""
+    out = []
+    for dim, values in DIMENSIONS.items():
+        for v in values:
+            if dim in RUNTIME_DIMENSIONS:
+                out.append((f"{dim}_{v}", dim, v, "shape_0", {dim: v}))
+            else:
+                out.append((f"{dim}_{v}", dim, v, f"{dim}_{v}", {}))
+    return out
+
+
+def shape_dir(name):
+    return os.path.join(OUT_DIR, name)
+
+
+def generate():
+    """Write and compile every distinct shape (runtime dimensions share shape_0)."""
+    shutil.rmtree(SRC_DIR, ignore_errors=True)
+    shutil.rmtree(OUT_DIR, ignore_errors=True)
+    shapes = {"shape_0": {}}
+    for dim, values in DIMENSIONS.items():
+        if dim not in RUNTIME_DIMENSIONS:
+            for v in values:
+                shapes[f"{dim}_{v}"] = {dim: v}
+    for name, kwargs in shapes.items():
+        for role in ("base", "variant"):
+            src = os.path.join(SRC_DIR, name, role, "com/hotpatch/demo")
+            os.makedirs(src, exist_ok=True)
+            path = os.path.join(src, "BusinessRules.java")
+            with open(path, "w") as f:
+                f.write(render(name, role, **kwargs))
+            subprocess.run(["javac", "-d", os.path.join(shape_dir(name), role), path], check=True)
+        print(f"  ✓ {name}")
+
+
+# ---------------------------------------------------------------------------
+# Class-file shape (mirrors the agent's ClassShape parser)
+# ---------------------------------------------------------------------------
+
+def class_shape(path):
+    """Measured shape of a compiled class: file bytes, constant-pool entries, methods, code bytes."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != b"\xca\xfe\xba\xbe":
+        raise ValueError(f"{path}: not a class file")
+    cp_count = struct.unpack_from(">H", data, 8)[0]
+    pos, i, utf8 = 10, 1, {}
+    while i < cp_count:
+        tag = data[pos]
+        if tag == 1:
+            n = struct.unpack_from(">H", data, pos + 1)[0]
+            utf8[i] = data[pos + 3:pos + 3 + n].decode("utf-8", "replace")
+            pos += 3 + n
+        elif tag in (3, 4, 9, 10, 11, 12, 17, 18):
+            pos += 5
+        elif tag in (5, 6):
+            pos += 9
+            i += 1                                    # long/double take two slots
+        elif tag in (7, 8, 16, 19, 20):
+            pos += 3
+        elif tag == 15:
+            pos += 4
+        else:
+            raise ValueError(f"{path}: bad constant-pool tag {tag}")
+        i += 1
+    pos += 6                                          # access, this, super
+    interfaces = struct.unpack_from(">H", data, pos)[0]
+    pos += 2 + 2 * interfaces
+
+    def members(pos):
+        count = struct.unpack_from(">H", data, pos)[0]
+        pos += 2
+        code = 0
+        for _ in range(count):
+            attrs = struct.unpack_from(">H", data, pos + 6)[0]
+            pos += 8
+            for _ in range(attrs):
+                name_idx, length = struct.unpack_from(">HI", data, pos)
+                if utf8.get(name_idx) == "Code":
+                    code += struct.unpack_from(">I", data, pos + 10)[0]
+                pos += 6 + length
+        return count, code, pos
+
+    _, _, pos = members(pos)                          # fields
+    methods, code_bytes, _ = members(pos)
+    return {"class_bytes": len(data), "cp_entries": cp_count - 1, "methods": methods, "code_bytes": code_bytes}
+
+
+# ---------------------------------------------------------------------------
+# Sweep
+# ---------------------------------------------------------------------------
+
+def run_point(shape, runtime, forks, warmup, iterations, heap):
+    cp = os.pathsep.join([os.path.join(shape_dir(shape), "base"), bu.CLASSES_DIR])
+    bench_args = ["--patches", shape_dir(shape), "--versions", "variant",
+                  "--warmup", warmup, "--iterations", iterations,
+                  "--instances", runtime.get("instances", 0), "--frames", runtime.get("frames", 0)]
+    ms = []
+    for _, samples in bu.redefine_bench_forks(forks, bench_args, heap, classpath=cp, what=f"{shape} {runtime}"):
+        ms.extend(nanos / 1e6 for _, nanos in samples)
+    return ms
+
+
+def sweep(args):
+    bu.check_build()
+    rows = []
+    for point, dim, value, shape, runtime in points():
+        variant = os.path.join(shape_dir(shape), "variant", bu.TARGET_CLASS_PATH)
+        if not os.path.isfile(variant):
+            raise SystemExit(f"Missing {variant}. Run with --steps generate first")
+        ms = run_point(shape, runtime, args.forks, args.warmup, args.iterations, args.heap)
+        s = class_shape(variant)
+        p50, p99 = bu.percentile(ms, 50), bu.percentile(ms, 99)
+        rows.append([point, dim, value, s["class_bytes"], s["cp_entries"], s["methods"], s["code_bytes"],
+                     runtime.get("instances", 0), runtime.get("frames", 0), len(ms),
+                     f"{p50:.4f}", f"{sum(ms) / len(ms):.4f}", f"{p99:.4f}"])
+        print(f"  {point:<18} p50 {p50:.3f} ms  p99 {p99:.3f} ms  ({s['code_bytes']} code bytes, "
+              f"{s['cp_entries']} cp entries, {s['methods']} methods)")
+    os.makedirs(os.path.dirname(args.sweep_csv) or ".", exist_ok=True)
+    with open(args.sweep_csv, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(SWEEP_HEADER)
+        w.writerows(rows)
+    print(f"Saved {args.sweep_csv}")
+
+
+# ---------------------------------------------------------------------------
+# Fit / predict
+# ---------------------------------------------------------------------------
+
+def fit(args):
+    import numpy as np
+
+    with open(args.sweep_csv, newline="") as f:
+        rows = list(csv.DictReader(f))
+    y_all = np.array([float(r["p50_ms"]) for r in rows])
+    out = []
+
+    def r2(y, pred):
+        ss_tot = float(((y - y.mean()) ** 2).sum())
+        return 1.0 - float(((y - pred) ** 2).sum()) / ss_tot if ss_tot > 0 else float("nan")
+
+    for dim, feature in FEATURE.items():
+        sel = [r for r in rows if r["dimension"] == dim]
+        if len(sel) < 2:
+            continue
+        x = np.array([float(r[feature]) for r in sel])
+        y = np.array([float(r["p50_ms"]) for r in sel])
+        slope, intercept = np.polyfit(x, y, 1)
+        out += [[dim, "intercept", intercept], [dim, feature, slope], [dim, "r2", r2(y, slope * x + intercept)]]
+        print(f"  {dim:<10} p50 ≈ {intercept:.4f} + {slope:.3e} × {feature}  (R² {out[-1][2]:.3f})")
+
+    X = np.column_stack([np.ones(len(rows))] + [[float(r[t]) for r in rows] for t in MULTI_TERMS])
+    coef, *_ = np.linalg.lstsq(X, y_all, rcond=None)
+    out += [["multivariate", t, c] for t, c in zip(["intercept"] + MULTI_TERMS, coef)]
+    out.append(["multivariate", "r2", r2(y_all, X @ coef)])
+    print(f"  multivariate R² {out[-1][2]:.3f}")
+
+    with open(args.fit_csv, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["model", "term", "coefficient"])
+        w.writerows([m, t, f"{c:.6e}"] for m, t, c in out)
+    print(f"Saved {args.fit_csv}")
+
+
+def predict(args):
+    with open(args.fit_csv, newline="") as f:
+        coef = {r["term"]: float(r["coefficient"]) for r in csv.DictReader(f) if r["model"] == "multivariate"}
+    features = class_shape(args.predict)
+    features.update(instances=args.instances, frames=args.frames)
+    total = coef["intercept"]
+    print(f"Predicted redefinition cost for {args.predict}:")
+    print(f"  {'intercept':<12} {coef['intercept']:>10.4f} ms")
+    for t in MULTI_TERMS:
+        part = coef[t] * features[t]
+        total += part
+        print(f"  {t:<12} {part:>10.4f} ms  ({features[t]} × {coef[t]:.3e})")
+    print(f"  {'total':<12} {total:>10.4f} ms  (model R² {coef.get('r2', float('nan')):.3f})")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--steps", default="generate,run,fit", help="comma-separated subset of generate,run,fit")
+    ap.add_argument("--forks", type=int, default=2)
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument("--iterations", type=int, default=50)
+    ap.add_argument("--heap", default="1g")
+    ap.add_argument("--sweep-csv", default="results/synthetic_sweep.csv")
+    ap.add_argument("--fit-csv", default="results/synthetic_fit.csv")
+    ap.add_argument("--predict", metavar="CLASS_FILE", help="predict agent-side cost of a compiled patch and exit")
+    ap.add_argument("--instances", type=int, default=0, help="live instances assumed by --predict")
+    ap.add_argument("--frames", type=int, default=0, help="active frames assumed by --predict")
+    args = ap.parse_args()
+
+    if args.predict:
+        if not os.path.isfile(args.fit_csv):
+            raise SystemExit(f"No {args.fit_csv}: run the sweep first")
+        predict(args)
+        return
+
+    steps = {s.strip() for s in args.steps.split(",") if s.strip()}
+    if "generate" in steps:
+        print("Generating synthetic BusinessRules pairs...")
+        generate()
+    if "run" in steps:
+        print("Running sweep (RedefineBench)...")
+        sweep(args)
+    if "fit" in steps:
+        print("Fitting...")
+        fit(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Per-thread CPU sampler for the service JVM, and throughput lost per patch.
+
+Sample mode (default) reads /proc/<pid>/task/*/{comm,schedstat} every
+--interval-ms (falling back to utime+stime from .../stat, clock-tick resolution,
+where schedstat is unavailable) and attributes the CPU used in each interval to:
+
+  service  "HTTP-Dispatcher" (request handling with the default executor, plus
+           the agent server's acceptor) and "service-worker-N" pool threads
+  agent    "hotpatch-*" (the agent's HTTP handler thread)
+  vm       "VM Thread" (safepoint operations; redefineClasses runs here)
+  gc       GC worker / concurrent threads
+  jit      C1/C2 compiler threads
+  other    everything else
+
+  results/thread_cpu.csv  timestamp_ms,interval_ms,cpu_service_ms,cpu_agent_ms,cpu_vm_ms,
+                          cpu_gc_ms,cpu_jit_ms,cpu_other_ms
+
+Analyze mode aligns the samples with agent operations (results/agent_events.csv,
+else latency.csv) and the achieved request rate (results/server_hist.csv from
+metrics-scraper.py). For every patch/rollback/activate it compares the --window-s
+after the operation with the same span before it:
+
+  lost_requests   /api/discount requests served before minus after
+  cpu_*_excess_ms CPU per category after minus before
+
+Operations closer together than the window overlap; they are marked and can be
+left out of the per-scenario summary with --exclude-overlap.
+
+  results/throughput_loss.csv          one row per operation
+  results/throughput_loss_summary.csv  per scenario (Figure 12 plots CPU over time)
+
+Usage:
+  python3 thread-cpu-sampler.py [--pid PID] [--interval-ms 50] &
+  python3 thread-cpu-sampler.py --analyze [--window-s 1.0]
+"""
+
+import argparse
+import bisect
+import csv
+import os
+import re
+import signal
+import time
+
+import benchutil as bu
+
+CATEGORIES = [
+    ("service", re.compile(r"^(HTTP-Dispatcher|service-worker-)")),
+    ("agent", re.compile(r"^hotpatch")),
+    ("vm", re.compile(r"^VM Thread")),
+    ("gc", re.compile(r"^(GC Thread|GC |G1 |ZDirector|ZDriver|ZStat|ZUnmapper|ZWorker|Shenandoah|ParGC)")),
+    ("jit", re.compile(r"^(C1 CompilerThre|C2 CompilerThre|Sweeper|JVMCI)")),
+]
+NAMES = [name for name, _ in CATEGORIES] + ["other"]
+HEADER = ["timestamp_ms", "interval_ms"] + [f"cpu_{n}_ms" for n in NAMES]
+OPS = ("patch", "rollback", "activate")
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def category(comm):
+    for name, rx in CATEGORIES:
+        if rx.match(comm):
+            return name
+    return "other"
+
+
+def thread_cpu_ns(task_dir):
+    """Cumulative CPU time of one thread in ns, or None if it has exited."""
+    try:
+        with open(os.path.join(task_dir, "schedstat")) as f:
+            return int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open(os.path.join(task_dir, "stat")) as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) * 1_000_000_000 // CLK_TCK
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_threads(pid, names):
+    """{tid: cpu_ns}; thread names are cached in `names` (tid -> category)."""
+    base = f"/proc/{pid}/task"
+    out = {}
+    for tid in os.listdir(base):
+        task_dir = os.path.join(base, tid)
+        if tid not in names:
+            try:
+                with open(os.path.join(task_dir, "comm")) as f:
+                    names[tid] = category(f.read().strip())
+            except OSError:
+                continue
+        ns = thread_cpu_ns(task_dir)
+        if ns is not None:
+            out[tid] = ns
+    return out
+
+
+def sample(args):
+    pid = args.pid or bu.find_service_pid()
+    out_path = os.path.join(args.results_dir, "thread_cpu.csv")
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(1))
+    signal.signal(signal.SIGINT, lambda *_: stop.append(1))
+    deadline = time.monotonic() + args.duration if args.duration > 0 else None
+    print(f"Sampling threads of PID {pid} every {args.interval_ms:.0f} ms -> {out_path}")
+
+    names = {}
+    with open(out_path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        prev, prev_t = read_threads(pid, names), time.monotonic()
+        next_t = prev_t
+        while not stop and (deadline is None or time.monotonic() < deadline):
+            next_t += args.interval_ms / 1000.0
+            time.sleep(max(0.0, next_t - time.monotonic()))
+            try:
+                cur = read_threads(pid, names)
+            except FileNotFoundError:
+                break                               # JVM gone
+            now = time.monotonic()
+            totals = dict.fromkeys(NAMES, 0)
+            for tid, ns in cur.items():
+                totals[names[tid]] += ns - prev.get(tid, 0)   # new threads count from zero
+            w.writerow([int(time.time() * 1000), f"{(now - prev_t) * 1000:.1f}"]
+                       + [f"{totals[n] / 1e6:.3f}" for n in NAMES])
+            prev, prev_t = cur, now
+        f.flush()
+
+
+# ---------------------------------------------------------------------------
+# Analysis
+# ---------------------------------------------------------------------------
+
+class Series:
+    """Sorted (timestamp_ms, value) deltas with window sums."""
+
+    def __init__(self, points):
+        points.sort()
+        self.t = [p[0] for p in points]
+        self.cum = [0.0]
+        for _, v in points:
+            self.cum.append(self.cum[-1] + v)
+
+    def sum(self, t0, t1):
+        return self.cum[bisect.bisect_left(self.t, t1)] - self.cum[bisect.bisect_left(self.t, t0)]
+
+
+def analyze(args):
+    cpu_path = os.path.join(args.results_dir, "thread_cpu.csv")
+    hist_path = os.path.join(args.results_dir, "server_hist.csv")
+    for p in (cpu_path, hist_path, os.path.join(args.results_dir, "latency.csv")):
+        if not os.path.isfile(p):
+            raise SystemExit(f"Need {p}")
+
+    with open(cpu_path, newline="") as f:
+        cpu_rows = list(csv.DictReader(f))
+    cpu = {n: Series([(int(r["timestamp_ms"]), float(r[f"cpu_{n}_ms"])) for r in cpu_rows]) for n in NAMES}
+    with open(hist_path, newline="") as f:
+        requests = Series([(int(r["timestamp_ms"]), int(r["count"])) for r in csv.DictReader(f)
+                           if r["endpoint"] == "discount"])
+
+    # (ms, op, scenario); operations without a latency.csv row (resets, warm-ups) are "unlabelled".
+    # Only operations whose whole before/after span was sampled count (SIDECARS may cover S7 only).
+    w_ms = int(args.window_s * 1000)
+    first, last = (cpu["vm"].t[0], cpu["vm"].t[-1]) if cpu_rows else (0, -1)
+    ops = [(t, op, row["scenario"] if row else "unlabelled") for t, op, row in bu.op_rows(args.results_dir, OPS)
+           if first <= t - w_ms and t + w_ms <= last]
+
+    times = [t for t, _, _ in ops]
+    out, by_scen = [], {}
+    for i, (t, op, scen) in enumerate(ops):
+        overlap = (i > 0 and t - times[i - 1] < w_ms) or (i + 1 < len(ops) and times[i + 1] - t < w_ms)
+        before = requests.sum(t - w_ms, t)
+        after = requests.sum(t, t + w_ms)
+        lost = before - after
+        excess = {n: cpu[n].sum(t, t + w_ms) - cpu[n].sum(t - w_ms, t) for n in NAMES}
+        out.append([t, scen, op, int(before), int(after), int(lost),
+                    f"{100.0 * lost / before:.2f}" if before else "NaN"]
+                   + [f"{excess[n]:.3f}" for n in NAMES] + ["true" if overlap else "false"])
+        if not (overlap and args.exclude_overlap):
+            by_scen.setdefault(scen, []).append((lost, before, excess))
+
+    header = ["timestamp_ms", "scenario", "op", "requests_before", "requests_after", "lost_requests",
+              "lost_pct"] + [f"cpu_{n}_excess_ms" for n in NAMES] + ["overlapped"]
+    path = os.path.join(args.results_dir, "throughput_loss.csv")
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        w.writerows(out)
+
+    summary = []
+    for scen, rs in by_scen.items():
+        lost = [r[0] for r in rs]
+        rate = sum(r[1] for r in rs) / (len(rs) * args.window_s)
+        summary.append([scen, len(rs), f"{rate:.1f}", f"{sum(lost) / len(rs):.2f}", f"{bu.percentile(lost, 50):.2f}"]
+                       + [f"{sum(r[2][n] for r in rs) / len(rs):.3f}" for n in NAMES])
+    spath = os.path.join(args.results_dir, "throughput_loss_summary.csv")
+    with open(spath, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["scenario", "ops", "baseline_rps", "lost_requests_mean", "lost_requests_p50"]
+                   + [f"cpu_{n}_excess_ms_mean" for n in NAMES])
+        w.writerows(summary)
+
+    print(f"{'scenario':<36} {'ops':>4} {'rps':>7} {'lost/op':>8} " + " ".join(f"{n:>8}" for n in NAMES))
+    for s in summary:
+        print(f"{s[0]:<36} {s[1]:>4} {s[2]:>7} {s[3]:>8} " + " ".join(f"{v:>8}" for v in s[5:]))
+    print(f"Saved {path} and {spath} (window {args.window_s:g} s; CPU excess in ms)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pid", type=int, help="service JVM pid (default: find BusinessRuleService via jps)")
+    ap.add_argument("--interval-ms", type=float, default=50.0)
+    ap.add_argument("--duration", type=float, default=0.0, help="seconds; 0 = until SIGTERM/SIGINT")
+    ap.add_argument("--results-dir", default="results")
+    ap.add_argument("--analyze", action="store_true", help="throughput lost / CPU excess per operation")
+    ap.add_argument("--window-s", type=float, default=1.0, help="span compared before vs after each operation")
+    ap.add_argument("--exclude-overlap", action="store_true",
+                    help="leave operations with a neighbour inside the window out of the summary")
+    args = ap.parse_args()
+    os.makedirs(args.results_dir, exist_ok=True)
+    if args.analyze:
+        analyze(args)
+    else:
+        sample(args)
+
+
+if __name__ == "__main__":
+    main()
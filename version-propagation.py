@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Version-propagation analysis for run-propagation-benchmark.sh.
+
+redefineClasses returning does not mean request threads serve the new rule yet.
+For every successful patch event of the agent (wall_ms = when the patch request
+reached the agent) this script looks at the binary request log, where the load
+generator recorded the Rule Version of every response, and computes:
+
+  first_new_ms    patch -> first response reporting the new version
+  last_old_ms     patch -> last response still reporting the old version
+  overlap_ms      mixed-version window (last old - first new, >= 0)
+  stale_start_ms  latest start of an old-version request after redefineClasses
+                  returned (> 0 means a request that began after the patch
+                  still saw the old rule)
+  mixed_threads   client threads that got an old response after another
+                  thread had already seen the new one
+
+Times are request completion times unless stated. Results are reported per
+patch and summarised by executor model and load level.
+
+Inputs:   results/propagation_cells.csv  (cell,executor,load_rps,reqlog,events)
+Outputs:  results/propagation.csv, results/propagation_summary.csv
+"""
+
+import argparse
+import csv
+import math
+import os
+
+import numpy as np
+
+import benchutil as bu
+from reqlog import RequestLog
+
+DETAIL_HEADER = ["cell", "executor", "load_rps", "seq", "patch_ms", "old_version", "new_version",
+                 "first_new_ms", "last_old_ms", "overlap_ms", "stale_start_ms", "old_after_new",
+                 "mixed_threads", "threads"]
+SUMMARY_HEADER = ["executor", "load_rps", "patches", "first_new_p50_ms", "first_new_p95_ms",
+                  "last_old_p50_ms", "last_old_p95_ms", "overlap_p50_ms", "overlap_max_ms",
+                  "stale_patches", "mixed_threads_mean"]
+
+
+def read_events(path):
+    with open(path, newline="") as f:
+        rows = [r for r in csv.DictReader(f) if r["op"] == "patch" and r["outcome"] == "ok"]
+    out = []
+    for r in rows:
+        wall = int(r["wall_ms"])
+        redefined = wall + (int(r["lookup_ns"]) + int(r["redefine_ns"])) / 1e6
+        out.append((int(r["seq"]), wall, redefined))
+    return sorted(out, key=lambda e: e[1])
+
+
+def analyse_patch(log, patch_ms, redefined_ms, end_ms, before_s):
+    """Propagation metrics for one patch, or None if the version did not change."""
+    ns = 1_000_000
+    base = log.slice(int((patch_ms - before_s * 1000) * ns), int(patch_ms * ns))
+    base = base[(base["status"] == 200) & (base["version"] != 0)]
+    after = log.slice(int(patch_ms * ns), None if math.isinf(end_ms) else int(end_ms * ns))
+    after = after[(after["status"] == 200) & (after["version"] != 0)]
+    if len(base) == 0 or len(after) == 0:
+        return None
+    old = int(np.bincount(base["version"]).argmax())
+    changed = np.nonzero(after["version"] != old)[0]
+    if len(changed) == 0:
+        return None
+    new = int(after["version"][changed[0]])
+    t_ms = after["t_ns"] / ns
+    first_new = float(t_ms[changed[0]])
+
+    is_old = after["version"] == old
+    res = {"old": old, "new": new, "first_new_ms": first_new - patch_ms,
+           "last_old_ms": float("nan"), "overlap_ms": 0.0, "stale_start_ms": float("nan"),
+           "old_after_new": 0, "mixed_threads": 0, "threads": int(len(np.unique(after["thread"])))}
+    if is_old.any():
+        last_old = float(t_ms[is_old].max())
+        starts = t_ms[is_old] - after["latency_us"][is_old] / 1000.0
+        late = is_old & (t_ms > first_new)
+        res.update(last_old_ms=last_old - patch_ms,
+                   overlap_ms=max(0.0, last_old - first_new),
+                   stale_start_ms=float(starts.max()) - redefined_ms,
+                   old_after_new=int(late.sum()),
+                   mixed_threads=int(len(np.unique(after["thread"][late]))))
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cells", default="results/propagation_cells.csv")
+    ap.add_argument("--out", default="results/propagation.csv")
+    ap.add_argument("--summary", default="results/propagation_summary.csv")
+    ap.add_argument("--before-s", type=float, default=1.0, help="pre-patch window that defines the old version")
+    args = ap.parse_args()
+
+    with open(args.cells, newline="") as f:
+        cells = list(csv.DictReader(f))
+
+    rows = []
+    groups = {}
+    for c in cells:
+        if not (os.path.isfile(c["reqlog"]) and os.path.isfile(c["events"])):
+            print(f"  ! cell {c['cell']}: missing {c['reqlog']} or {c['events']}, skipped")
+            continue
+        log = RequestLog(c["reqlog"])
+        patches = read_events(c["events"])
+        for i, (seq, patch_ms, redefined_ms) in enumerate(patches):
+            end_ms = patches[i + 1][1] if i + 1 < len(patches) else float("inf")
+            r = analyse_patch(log, patch_ms, redefined_ms, end_ms, args.before_s)
+            if r is None:
+                print(f"  ! cell {c['cell']} patch seq {seq}: no version change observed, skipped")
+                continue
+            names = log.version_names([r["old"], r["new"]])
+            rows.append([c["cell"], c["executor"], c["load_rps"], seq, patch_ms, names[0], names[1],
+                         bu.fmt(r["first_new_ms"]), bu.fmt(r["last_old_ms"]), bu.fmt(r["overlap_ms"]),
+                         bu.fmt(r["stale_start_ms"]), r["old_after_new"], r["mixed_threads"], r["threads"]])
+            groups.setdefault((c["executor"], int(c["load_rps"])), []).append(r)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(DETAIL_HEADER)
+        w.writerows(rows)
+
+    def finite(values):
+        return [v for v in values if not math.isnan(v)]
+
+    summary = []
+    for (executor, load), rs in sorted(groups.items()):
+        fn = [r["first_new_ms"] for r in rs]
+        lo = finite([r["last_old_ms"] for r in rs])
+        ov = [r["overlap_ms"] for r in rs]
+        stale = sum(1 for r in rs if r["stale_start_ms"] == r["stale_start_ms"] and r["stale_start_ms"] > 0)
+        summary.append([executor, load, len(rs), bu.fmt(bu.percentile(fn, 50)), bu.fmt(bu.percentile(fn, 95)),
+                        bu.fmt(bu.percentile(lo, 50)), bu.fmt(bu.percentile(lo, 95)),
+                        bu.fmt(bu.percentile(ov, 50)), bu.fmt(max(ov)), stale,
+                        bu.fmt(sum(r["mixed_threads"] for r in rs) / len(rs))])
+    with open(args.summary, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(SUMMARY_HEADER)
+        w.writerows(summary)
+
+    print(f"{'executor':<10} {'load':>6} {'n':>3} {'first new p50':>14} {'last old p50':>13} "
+          f"{'overlap p50':>12} {'overlap max':>12} {'stale':>6} {'mixed thr':>10}")
+    for s in summary:
+        print(f"{s[0]:<10} {s[1]:>6} {s[2]:>3} {s[3]:>14} {s[5]:>13} {s[7]:>12} {s[8]:>12} {s[9]:>6} {s[10]:>10}")
+    print(f"Saved {args.out} and {args.summary}")
+
+
+if __name__ == "__main__":
+    main()